@@ -0,0 +1,262 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, OpenAI, RateLimitError
+
+from utils.rate_limit import FairSemaphore, TokenBucket
+
+# Limits shared by every session in the process; the LLM_MAX_IN_FLIGHT and
+# LLM_TOKENS_PER_MINUTE environment variables override them
+DEFAULT_LLM_MAX_IN_FLIGHT = 8
+DEFAULT_LLM_TOKENS_PER_MINUTE = 90000
+# Longest a request waits in the queue before giving up
+LLM_QUEUE_TIMEOUT = 120.0
+LLM_MAX_RETRIES = 4
+LLM_MAX_BACKOFF = 30.0
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> int:
+    """Rough token count of a chat request: prompt characters / 4 plus the completion allowance."""
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    return prompt_chars // CHARS_PER_TOKEN + (max_tokens or 0)
+
+class Lease:
+    """A granted request slot and the tokens reserved for it."""
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        # Set once the actual usage is known, to refund the difference
+        self.used_tokens: Optional[int] = None
+        self.released = False
+
+class LLMGovernor:
+    """
+    Admission control for LLM requests across all sessions.
+
+    Requests queue in arrival order for one of a fixed number of in-flight
+    slots, then reserve their estimated tokens from a tokens-per-minute
+    bucket. A rate-limit response pauses admissions for every caller until
+    the provider's retry window has passed, so queued requests wait rather
+    than being rejected in turn.
+
+    Limits not given are read from the environment when the governor is
+    built, so values loaded from .env after import still apply.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT
+    ):
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv("LLM_MAX_IN_FLIGHT", DEFAULT_LLM_MAX_IN_FLIGHT))
+        if tokens_per_minute is None:
+            tokens_per_minute = int(os.getenv("LLM_TOKENS_PER_MINUTE", DEFAULT_LLM_TOKENS_PER_MINUTE))
+        self.queue_timeout = queue_timeout
+        self._slots = FairSemaphore(max_in_flight)
+        self._tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float):
+        """Hold back all admissions for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, float]:
+        """Return in_flight, queued and available_tokens."""
+        return {
+            "in_flight": self._slots.in_use(),
+            "queued": self._slots.waiting(),
+            "available_tokens": self._tokens.available(),
+        }
+
+    def acquire(self, tokens: int) -> Lease:
+        """
+        Wait for a request slot and token budget.
+
+        Args:
+            tokens: Estimated tokens the request will use
+
+        Returns:
+            Lease: To be passed to release when the request finishes
+
+        Raises:
+            TimeoutError: If the request could not be admitted within queue_timeout
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        if not self._slots.acquire(self.queue_timeout):
+            raise TimeoutError("Timed out waiting for an LLM request slot (rate limit)")
+        try:
+            while True:
+                with self._lock:
+                    pause = self._paused_until - time.monotonic()
+                if pause <= 0:
+                    break
+                if time.monotonic() + pause > deadline:
+                    raise TimeoutError("Timed out waiting for the LLM rate limit to reset")
+                time.sleep(pause)
+            if not self._tokens.acquire(tokens, max(0.0, deadline - time.monotonic())):
+                raise TimeoutError("Timed out waiting for LLM token budget (rate limit)")
+        except BaseException:
+            self._slots.release()
+            raise
+        return Lease(tokens)
+
+    def release(self, lease: Lease):
+        """Free a request slot, refunding reserved tokens the request didn't use."""
+        if lease.released:
+            return
+        lease.released = True
+        self._slots.release()
+        if lease.used_tokens is not None and lease.used_tokens < lease.tokens:
+            self._tokens.refund(lease.tokens - lease.used_tokens)
+
+_governor: Optional[LLMGovernor] = None
+_sync_client: Optional[OpenAI] = None
+_async_client: Optional[AsyncOpenAI] = None
+_clients_lock = threading.Lock()
+
+def get_llm_governor() -> LLMGovernor:
+    """Return the process-wide LLM governor."""
+    global _governor
+    if _governor is None:
+        with _clients_lock:
+            if _governor is None:
+                _governor = LLMGovernor()
+    return _governor
+
+def get_openai_client() -> OpenAI:
+    """
+    Return the process-wide OpenAI client, so all sessions share one connection pool.
+
+    Retries are left to the governed calls below, which coordinate them across sessions.
+    """
+    global _sync_client
+    if _sync_client is None:
+        with _clients_lock:
+            if _sync_client is None:
+                _sync_client = OpenAI(api_key=os.environ["OPENAI_API_KEY"], max_retries=0)
+    return _sync_client
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Return the process-wide async OpenAI client."""
+    global _async_client
+    if _async_client is None:
+        with _clients_lock:
+            if _async_client is None:
+                _async_client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"], max_retries=0)
+    return _async_client
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's Retry-After if given, else jittered backoff."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return min(float(retry_after), LLM_MAX_BACKOFF)
+    except ValueError:
+        pass
+    return min(2 ** attempt, LLM_MAX_BACKOFF) * (0.5 + random.random() / 2)
+
+def _handle_retry(governor: LLMGovernor, error: Exception, attempt: int) -> float:
+    """Return how long this caller should sleep before retrying (0 if the governor pause covers it)."""
+    delay = _retry_delay(error, attempt)
+    if isinstance(error, RateLimitError):
+        # Everyone waits out a rate limit, not just the caller that hit it
+        governor.pause(delay)
+        return 0.0
+    return delay
+
+def _stream_usage(lease: Lease, prompt_tokens: int, completion_chars: int):
+    lease.used_tokens = prompt_tokens + completion_chars // CHARS_PER_TOKEN
+
+def _governed_stream(stream, governor: LLMGovernor, lease: Lease, prompt_tokens: int) -> Iterator:
+    completion_chars = 0
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                completion_chars += len(chunk.choices[0].delta.content)
+            yield chunk
+    finally:
+        _stream_usage(lease, prompt_tokens, completion_chars)
+        governor.release(lease)
+
+def chat_completion(**kwargs):
+    """
+    Create a chat completion through the shared client and governor.
+
+    Takes the same arguments as client.chat.completions.create. Rate-limit
+    and transient connection errors are retried after queueing again.
+    With stream=True, the returned iterator holds its slot until it is
+    exhausted or closed.
+    """
+    governor = get_llm_governor()
+    client = get_openai_client()
+    estimate = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    prompt_tokens = estimate - (kwargs.get("max_tokens") or 0)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        lease = governor.acquire(estimate)
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except (RateLimitError, APIConnectionError, InternalServerError) as e:
+            governor.release(lease)
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            time.sleep(_handle_retry(governor, e, attempt))
+            continue
+        except BaseException:
+            governor.release(lease)
+            raise
+        if kwargs.get("stream"):
+            return _governed_stream(response, governor, lease, prompt_tokens)
+        usage = getattr(response, "usage", None)
+        lease.used_tokens = getattr(usage, "total_tokens", None)
+        governor.release(lease)
+        return response
+
+async def _governed_async_stream(stream, governor: LLMGovernor, lease: Lease, prompt_tokens: int) -> AsyncIterator:
+    completion_chars = 0
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                completion_chars += len(chunk.choices[0].delta.content)
+            yield chunk
+    finally:
+        _stream_usage(lease, prompt_tokens, completion_chars)
+        governor.release(lease)
+
+async def achat_completion(**kwargs):
+    """
+    Async counterpart of chat_completion, sharing the same governor queue.
+
+    Waiting for admission happens on a worker thread, so the event loop is never blocked.
+    """
+    governor = get_llm_governor()
+    client = get_async_openai_client()
+    estimate = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    prompt_tokens = estimate - (kwargs.get("max_tokens") or 0)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        lease = await asyncio.to_thread(governor.acquire, estimate)
+        try:
+            response = await client.chat.completions.create(**kwargs)
+        except (RateLimitError, APIConnectionError, InternalServerError) as e:
+            governor.release(lease)
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            await asyncio.sleep(_handle_retry(governor, e, attempt))
+            continue
+        except BaseException:
+            governor.release(lease)
+            raise
+        if kwargs.get("stream"):
+            return _governed_async_stream(response, governor, lease, prompt_tokens)
+        usage = getattr(response, "usage", None)
+        lease.used_tokens = getattr(usage, "total_tokens", None)
+        governor.release(lease)
+        return response
@@ -1,92 +1,181 @@
-from openai import OpenAI
-import streamlit as st
-import os
-from typing import Dict, Optional
-
-def get_openai_client() -> Optional[OpenAI]:
-    """Initialize and return the OpenAI client."""
-    if "OPENAI_API_KEY" not in os.environ:
-        st.error("OpenAI API key not found in environment variables.")
-        return None
-    return OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-
-def validate_inputs(destination: str, duration: int, preferences: Dict, search_data: str) -> tuple[bool, str]:
-    """Validate input parameters for plan generation."""
-    if not destination or not isinstance(destination, str):
-        return False, "Invalid destination provided"
-        
-    if not isinstance(duration, int) or duration < 1 or duration > 30:
-        return False, "Duration must be between 1 and 30 days"
-        
-    if not preferences or not isinstance(preferences, dict):
-        return False, "Invalid preferences provided"
-        
-    if not search_data or not isinstance(search_data, str):
-        return False, "Invalid search data provided"
-        
-    return True, ""
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from agents.llm_client import chat_completion
+
+PLAN_MODEL = "gpt-3.5-turbo"
+PLAN_MAX_TOKENS = 2500
+PLAN_TEMPERATURE = 0.7
+SYSTEM_PROMPT = "You are a professional travel planner. Generate detailed, personalized travel plans in Markdown format."
 
-def generate_plan(destination: str, duration: int, preferences: Dict, search_data: str) -> str:
+class PlanError(str):
+    """An error message returned in place of plan or section content."""
+
+def build_messages(planning_prompt: str) -> List[Dict[str, str]]:
+    """Build the chat messages for a planning prompt."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": planning_prompt}
+    ]
+
+def check_plan(plan: Optional[str]) -> Optional[str]:
     """
-    Generate a travel plan based on search data and user preferences.
+    Check a finished plan before it is shown to the user.
     
+    Args:
+        plan: The generated plan text
+        
+    Returns:
+        str: Error message if the plan is unusable, None otherwise
+    """
+    if not plan or len(plan.strip()) < 100:
+        return "Error: Generated plan is too short or empty. Please try again."
+    return None
+
+def describe_error(e: Exception) -> str:
+    """Map an exception raised while generating a plan to a user-facing error message."""
+    error_msg = str(e)
+    if "API key" in error_msg.lower():
+        return "Error: Invalid OpenAI API key. Please check your configuration."
+    elif "rate limit" in error_msg.lower():
+        return "Error: OpenAI API rate limit exceeded. Please try again later."
+    else:
+        return f"Error generating plan: {error_msg}"
+
+# Daily itineraries for trips longer than this are written in parallel chunks of days
+CHUNKED_PLAN_MIN_DAYS = 8
+DAYS_PER_CHUNK = 4
+SKELETON_TOKENS_PER_DAY = 40
+DAY_CHUNK_MAX_TOKENS = 1800
+
+def build_skeleton_prompt(destination: str, duration: int, preferences: Dict, search_data: str) -> str:
+    """Build the prompt for a one-line-per-day outline of a trip."""
+    return f"""
+        Outline a {duration}-day trip to {destination} in 2025.
+        User preferences: {preferences}.
+        Use this search data: {search_data}.
+        Return exactly {duration} lines, one per day, formatted as
+        "Day <number>: <theme> - <area or neighbourhood>".
+        Spread areas sensibly, avoid repeating the same sights, and output nothing else.
+        """
+
+def parse_skeleton(text: str, duration: int) -> List[str]:
+    """
+    Parse an outline into one "theme - area" line per day.
+
+    Args:
+        text: Outline returned for build_skeleton_prompt
+        duration: Number of days
+
+    Returns:
+        List[str]: Outline for each day; days missing from the text get a free-day placeholder
+    """
+    days = {}
+    for match in re.finditer(r"^[\s*#>-]*\**Day\s+(\d+)\**\s*[:.\-–—]\s*(.+?)\s*$", text or "", flags=re.IGNORECASE | re.MULTILINE):
+        day = int(match.group(1))
+        if 1 <= day <= duration and day not in days:
+            days[day] = match.group(2).strip("* ")
+    return [days.get(day, "Free day to explore at your own pace") for day in range(1, duration + 1)]
+
+def build_day_range_prompt(
+    destination: str,
+    duration: int,
+    preferences: Dict,
+    search_data: str,
+    skeleton: List[str],
+    first_day: int,
+    last_day: int
+) -> str:
+    """Build the prompt for days first_day..last_day (1-based, inclusive) of a chunked itinerary."""
+    outline = "\n".join(f"Day {day}: {skeleton[day - 1]}" for day in range(1, duration + 1))
+    return f"""
+        You are writing days {first_day} to {last_day} of a {duration}-day travel plan for {destination} in 2025.
+        User preferences: {preferences}.
+        Incorporate this search data: {search_data}.
+        The whole trip follows this outline:
+        {outline}
+        For each day from {first_day} to {last_day}, write a "### Day <number>: <theme>" heading followed by
+        morning, afternoon and evening activities, places to eat and practical tips, tailored to the preferences.
+        Write only those days, with no introduction or conclusion. Format in clean Markdown.
+        """
+
+def normalize_day_headings(text: str) -> str:
+    """Make every day heading a "### Day N" heading and demote any other top-level heading."""
+    text = re.sub(r"^\s*#{1,6}\s*\**(Day\s+\d+[^\n]*?)\**\s*$", r"### \1", text, flags=re.IGNORECASE | re.MULTILINE)
+    text = re.sub(r"^\s*\*\*(Day\s+\d+[^\n]*?)\*\*\s*$", r"### \1", text, flags=re.IGNORECASE | re.MULTILINE)
+    return re.sub(r"^#{1,2}\s+(?!Day\s+\d)", "#### ", text, flags=re.IGNORECASE | re.MULTILINE)
+
+def _complete(prompt: str, max_tokens: int) -> str:
+    response = chat_completion(
+        model=PLAN_MODEL,
+        messages=build_messages(prompt),
+        max_tokens=max_tokens,
+        temperature=PLAN_TEMPERATURE
+    )
+    if not response.choices or not response.choices[0].message.content:
+        raise ValueError("No response generated from OpenAI.")
+    return response.choices[0].message.content.strip()
+
+def _stream_complete(prompt: str, max_tokens: int) -> Iterator[str]:
+    """Like _complete, but yield the response content as it arrives."""
+    stream = chat_completion(
+        model=PLAN_MODEL,
+        messages=build_messages(prompt),
+        max_tokens=max_tokens,
+        temperature=PLAN_TEMPERATURE,
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def _submit_day_chunks(
+    executor: ThreadPoolExecutor,
+    destination: str,
+    duration: int,
+    preferences: Dict,
+    search_data: str
+) -> List[Future]:
+    """Outline the trip, then request every range of DAYS_PER_CHUNK days at once."""
+    skeleton = parse_skeleton(
+        _complete(
+            build_skeleton_prompt(destination, duration, preferences, search_data),
+            SKELETON_TOKENS_PER_DAY * duration
+        ),
+        duration
+    )
+    return [
+        executor.submit(
+            _complete,
+            build_day_range_prompt(
+                destination, duration, preferences, search_data, skeleton,
+                first_day, min(first_day + DAYS_PER_CHUNK - 1, duration)
+            ),
+            DAY_CHUNK_MAX_TOKENS
+        )
+        for first_day in range(1, duration + 1, DAYS_PER_CHUNK)
+    ]
+
+def generate_daily_itinerary(destination: str, duration: int, preferences: Dict, search_data: str) -> str:
+    """
+    Generate the day-by-day part of a long plan in parallel chunks of days.
+
     Args:
         destination: The travel destination
         duration: Number of days for the trip
         preferences: User preferences dictionary
         search_data: Search data from the search agent
-        
+
     Returns:
-        str: Generated travel plan or error message
+        str: "### Day N" sections for every day, in order
+
+    Raises:
+        Exception: If any request fails
     """
-    # Validate inputs
-    is_valid, error_msg = validate_inputs(destination, duration, preferences, search_data)
-    if not is_valid:
-        return f"Error: {error_msg}"
-        
+    executor = ThreadPoolExecutor(max_workers=duration // DAYS_PER_CHUNK + 1, thread_name_prefix="plan-chunk")
     try:
-        client = get_openai_client()
-        if not client:
-            return "Error: Unable to initialize OpenAI client. Please check your API key configuration."
-            
-        planning_prompt = f"""
-        Create a detailed travel plan for {destination} for {duration} days in 2025.
-        User preferences: {preferences}.
-        Incorporate this search data: {search_data}.
-        Include:
-        - Best time to visit
-        - Top attractions and activities tailored to preferences
-        - Recommended hotels matching budget
-        - Local transportation options and tips
-        - Estimated daily budget breakdown in JPY and USD (1 USD = 154 JPY)
-        Format in clean Markdown. Ensure all sections are complete and tailored to preferences.
-        """
-        
-        with st.spinner("Generating your personalized travel plan..."):
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a professional travel planner. Generate detailed, personalized travel plans in Markdown format."},
-                    {"role": "user", "content": planning_prompt}
-                ],
-                max_tokens=2500,
-                temperature=0.7
-            )
-            
-            if not response.choices:
-                return "Error: No response generated from OpenAI."
-                
-            plan = response.choices[0].message.content
-            if not plan or len(plan.strip()) < 100:
-                return "Error: Generated plan is too short or empty. Please try again."
-                
-            return plan
-            
-    except Exception as e:
-        error_msg = str(e)
-        if "API key" in error_msg.lower():
-            return "Error: Invalid OpenAI API key. Please check your configuration."
-        elif "rate limit" in error_msg.lower():
-            return "Error: OpenAI API rate limit exceeded. Please try again later."
-        else:
-            return f"Error generating plan: {error_msg}" 
\ No newline at end of file
+        chunks = _submit_day_chunks(executor, destination, duration, preferences, search_data)
+        return "\n\n".join(normalize_day_headings(chunk.result()) for chunk in chunks)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
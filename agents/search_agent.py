@@ -2,6 +2,19 @@ from duckduckgo_search import DDGS
 import streamlit as st
 from typing import List, Dict
 
+from utils.search_cache import get_search_cache, make_search_key
+
+SEARCH_PROMPT_TEMPLATE = """
+        Search for 2025 travel data for {destination}. Include:
+        - Best time to visit (weather, events)
+        - Popular attractions and activities
+        - Hotel options in different price ranges
+        - Local transportation info
+        - Typical travel costs
+        """
+SEARCH_MAX_RESULTS = 5
+SEARCH_ERROR_MESSAGE = "Limited information available due to search error."
+
 def search_destination(query: str, max_results: int = 5) -> List[Dict]:
     """Search for destination information using DuckDuckGo."""
     if not query or not isinstance(query, str):
@@ -32,29 +45,29 @@ def search_destination_info(destination: str) -> str:
         return "Error: Invalid destination provided."
         
     try:
-        search_prompt = f"""
-        Search for 2025 travel data for {destination}. Include:
-        - Best time to visit (weather, events)
-        - Popular attractions and activities
-        - Hotel options in different price ranges
-        - Local transportation info
-        - Typical travel costs
-        """
+        # Repeat destinations are answered from the local cache
+        search_cache = get_search_cache()
+        cache_key = make_search_key(destination, SEARCH_PROMPT_TEMPLATE, SEARCH_MAX_RESULTS)
+        results = search_cache.get(cache_key)
         
-        with st.spinner("Searching destination information..."):
-            results = search_destination(search_prompt)
+        if results is None:
+            search_prompt = SEARCH_PROMPT_TEMPLATE.format(destination=destination)
+            with st.spinner("Searching destination information..."):
+                results = search_destination(search_prompt, max_results=SEARCH_MAX_RESULTS)
+            if results:
+                search_cache.put(cache_key, destination, results)
             
-            if not results:
-                return "Error: No search data found for the destination."
-                
-            # Format the results
-            search_data = "\n\n".join([
-                f"### {result['title']}\n{result['body']}"
-                for result in results
-            ])
+        if not results:
+            return "Error: No search data found for the destination."
             
-            return search_data
+        # Format the results
+        search_data = "\n\n".join([
+            f"### {result['title']}\n{result['body']}"
+            for result in results
+        ])
+        
+        return search_data
             
     except Exception as e:
         st.error(f"Search error: {str(e)}")
-        return "Limited information available due to search error." 
\ No newline at end of file
+        return SEARCH_ERROR_MESSAGE
\ No newline at end of file
@@ -0,0 +1,420 @@
+import math
+import queue
+import re
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from agents.planning_agent import (
+    CHUNKED_PLAN_MIN_DAYS, PLAN_MAX_TOKENS, PlanError,
+    _stream_complete, describe_error, generate_daily_itinerary, normalize_day_headings
+)
+from utils.context_builder import section_context
+from utils.itinerary import format_route_section
+from utils.plan_cache import get_section_cache, make_section_key
+
+# Sections of a plan in document order, with their headings
+PLAN_SECTIONS = {
+    "best_time": "Best Time to Visit",
+    "attractions": "Top Attractions and Activities",
+    "hotels": "Recommended Hotels",
+    "transport": "Local Transportation",
+    "budget": "Daily Budget Breakdown",
+}
+
+# Bump when a section prompt changes, so sections cached from the old prompt are not reused
+SECTION_PROMPT_VERSION = 1
+SECTION_MAX_TOKENS = 900
+ATTRACTIONS_TOKENS_PER_DAY = 250
+
+SECTION_PROMPTS = {
+    "best_time": """
+        Write the "Best Time to Visit" section of a travel plan for {destination} in 2025.
+        The trip starts in {month}.
+        Cover the seasons, typical weather and notable events, and say what to expect during the trip.
+        Use this information: {weather}
+        {context}
+        """,
+    "attractions": """
+        Write the "Top Attractions and Activities" section of a {duration}-day travel plan for {destination} in 2025.
+        Interests: {interests}. Travel pace: {pace}.
+        Lay the attractions and activities out day by day, with a "### Day <number>: <theme>" heading
+        for each day, following the suggested daily routes where given.
+        Use this information: {context}
+        {routes}
+        """,
+    "hotels": """
+        Write the "Recommended Hotels" section of a travel plan for {destination} in 2025.
+        Budget level: {budget}.
+        Suggest a few hotels in different areas, with approximate nightly prices and who each suits.
+        Use this information: {context}
+        """,
+    "transport": """
+        Write the "Local Transportation" section of a travel plan for {destination} in 2025.
+        Cover getting from the airport, public transport and passes, taxis and ride-hailing, with practical tips.
+        Use this information: {context}
+        """,
+    "budget": """
+        Write the "Daily Budget Breakdown" section of a {duration}-day {budget} travel plan for {destination} in 2025.
+        Break a typical day down into accommodation, food, transport and activities, in {currency_code} and USD,
+        consistent with these estimates: {costs}
+        {context}
+        """,
+}
+
+SECTION_INSTRUCTIONS = "Write only the content of this section, without the section heading. Format in clean Markdown."
+DRAFT_INSTRUCTIONS = """
+        This section was written for a similar trip; use it as a draft, keeping whatever still fits
+        and changing the rest to match this trip:
+        {draft}
+        """
+SECTION_FAILED_NOTE = "_This section could not be generated. Regenerate it to try again._"
+
+# Cost figures given to the budget section, by label
+BUDGET_FIGURES = {
+    "Flights": "flight_cost",
+    "Hotels": "hotel_cost",
+    "Daily expenses": "daily_expenses",
+    "Daily budget": "daily_budget",
+    "Total": "total_cost",
+}
+
+def summarize_forecast(weather_data: Optional[Dict]) -> str:
+    """
+    Condense a forecast into the outlook the best time section is written from.
+
+    Temperatures are averaged and rounded to whole degrees and conditions
+    reduced to the most frequent ones, so the summary (and the section's
+    cache key) changes with the outlook rather than with every forecast refresh.
+
+    Args:
+        weather_data: Result of get_weather_forecast
+
+    Returns:
+        str: One-line outlook, empty if no forecast is available
+    """
+    forecast = (weather_data or {}).get("forecast") or []
+    if not forecast:
+        return ""
+    low = round(sum(day["temp_min"] for day in forecast) / len(forecast))
+    high = round(sum(day["temp_max"] for day in forecast) / len(forecast))
+    conditions = sorted(description for description, _ in Counter(day["description"] for day in forecast).most_common(2))
+    return f"Forecast for the coming days: {low}°C to {high}°C, mostly {' and '.join(conditions)}."
+
+def _round_amount(value: float, digits: int = 2) -> float:
+    """Round to significant digits: 1234.5 -> 1200."""
+    if not value:
+        return 0.0
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+def summarize_costs(cost: Optional[Dict], currency_code: str, currency_symbol: str) -> str:
+    """
+    List the cost figures the budget section is written from.
+
+    USD amounts come straight from the cost model; local amounts are
+    rounded to two significant digits, so hourly exchange rate moves don't
+    change the list (or the section's cache key).
+
+    Args:
+        cost: The "cost" result of utils.pipeline.gather_trip_data
+        currency_code: Local currency code
+        currency_symbol: Local currency symbol
+
+    Returns:
+        str: Markdown list of approximate amounts, empty without an estimate
+    """
+    if not cost or not cost.get("estimate"):
+        return ""
+    usd, local = cost["estimate"], cost.get("local")
+    lines = []
+    for label, field in BUDGET_FIGURES.items():
+        amount = f"${usd[field]:,.0f}"
+        if local and currency_code != "USD":
+            amount = f"{currency_symbol}{_round_amount(local[field]):,.0f} ({amount})"
+        lines.append(f"- {label}: about {amount}")
+    return "\n".join(lines)
+
+def build_section_inputs(
+    destination: str,
+    duration: int,
+    preferences: Dict,
+    results: Dict[str, Any],
+    start_date: Optional[date] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Collect what each section is written from.
+
+    Each section only sees the request fields and data it needs, so its
+    cache key (and its content) stays the same when anything else changes:
+    hotels don't depend on interests, the budget doesn't depend on pace.
+    Weather and costs are given as rounded summaries, which only change
+    when the outlook or the estimate does.
+
+    Args:
+        destination: The travel destination
+        duration: Number of days for the trip
+        preferences: User preferences dictionary (interests, budget, pace, currency_code)
+        results: Result of utils.pipeline.gather_trip_data
+        start_date: First day of the trip
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Inputs for each section in PLAN_SECTIONS
+    """
+    search = results.get("search") or ""
+    interests = sorted(preferences.get("interests") or [])
+    return {
+        "best_time": {
+            "destination": destination,
+            "month": f"{start_date:%B}" if start_date else "a month not yet chosen",
+            "weather": summarize_forecast(results.get("weather")),
+            "context": section_context(search, "best_time"),
+        },
+        "attractions": {
+            "destination": destination,
+            "duration": duration,
+            "interests": ", ".join(interests) or "general sightseeing",
+            "pace": preferences.get("pace", ""),
+            "routes": format_route_section(results.get("route")),
+            "context": section_context(search, "attractions"),
+        },
+        "hotels": {
+            "destination": destination,
+            "budget": preferences.get("budget", ""),
+            "context": section_context(search, "hotels"),
+        },
+        "transport": {
+            "destination": destination,
+            "context": section_context(search, "transport"),
+        },
+        "budget": {
+            "destination": destination,
+            "duration": duration,
+            "budget": preferences.get("budget", ""),
+            "currency_code": preferences.get("currency_code", "USD"),
+            "costs": summarize_costs(
+                results.get("cost"), preferences.get("currency_code", "USD"), preferences.get("currency", "")
+            ),
+            "context": section_context(search, "costs"),
+        },
+    }
+
+def add_drafts(section_inputs: Dict[str, Dict[str, Any]], similar: Optional[Dict]) -> Dict[str, Dict[str, Any]]:
+    """
+    Give the sections of a request a similar plan's sections as drafts.
+
+    Only sections whose inputs differ from the ones the similar plan was
+    written from get a draft; the others come from the section cache anyway.
+
+    Args:
+        section_inputs: Result of build_section_inputs
+        similar: Draft match from SimilarPlanIndex.find, or None
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Section inputs, with a "draft" added where one applies
+    """
+    if not similar or not similar.get("sections"):
+        return section_inputs
+    matched_inputs = similar.get("section_inputs") or {}
+    drafted = {}
+    for section, inputs in section_inputs.items():
+        draft = similar["sections"].get(section)
+        matched = {key: value for key, value in (matched_inputs.get(section) or {}).items() if key != "draft"}
+        drafted[section] = dict(inputs, draft=draft) if draft and matched != inputs else inputs
+    return drafted
+
+def build_section_prompt(section: str, inputs: Dict[str, Any]) -> str:
+    """Build the prompt for one section from its inputs."""
+    prompt = SECTION_PROMPTS[section].format(**inputs)
+    if inputs.get("draft"):
+        prompt += DRAFT_INSTRUCTIONS.format(draft=inputs["draft"])
+    return prompt + "\n        " + SECTION_INSTRUCTIONS
+
+def _demote_headings(text: str) -> str:
+    """Keep headings inside a section below its "## " heading."""
+    return re.sub(r"^\s*#{1,2}\s+", "### ", text, flags=re.MULTILINE)
+
+def _map_lines(pieces: Iterable[str], transform: Callable[[str], str]) -> Iterator[str]:
+    """Apply a line-based rewrite to streamed text, holding back each line until it is complete."""
+    pending = ""
+    for piece in pieces:
+        pending += piece
+        end = pending.rfind("\n") + 1
+        if end:
+            yield transform(pending[:end])
+            pending = pending[end:]
+    if pending:
+        yield transform(pending)
+
+def _strip_stream(pieces: Iterable[str]) -> Iterator[str]:
+    """Streamed equivalent of str.strip: leading whitespace is dropped, trailing whitespace held back."""
+    held = ""
+    started = False
+    for piece in pieces:
+        text = held + piece if started else piece.lstrip()
+        stripped = text.rstrip()
+        held = text[len(stripped):]
+        if stripped:
+            started = True
+            yield stripped
+
+def _write_section(section: str, inputs: Dict[str, Any]) -> Iterator[str]:
+    if section == "attractions" and inputs["duration"] > CHUNKED_PLAN_MIN_DAYS:
+        # Long trips are written a few days at a time, so the itinerary arrives in one piece
+        preferences = {"interests": inputs["interests"], "pace": inputs["pace"]}
+        search_data = inputs["context"] + inputs["routes"]
+        if inputs.get("draft"):
+            search_data += "\n\nItinerary written for a similar trip:\n" + inputs["draft"]
+        yield generate_daily_itinerary(inputs["destination"], inputs["duration"], preferences, search_data).strip()
+        return
+    if section == "attractions":
+        max_tokens = min(ATTRACTIONS_TOKENS_PER_DAY * inputs["duration"] + 300, PLAN_MAX_TOKENS)
+        pieces = _map_lines(_stream_complete(build_section_prompt(section, inputs), max_tokens), normalize_day_headings)
+    else:
+        pieces = _map_lines(_stream_complete(build_section_prompt(section, inputs), SECTION_MAX_TOKENS), _demote_headings)
+    yield from _strip_stream(pieces)
+
+def generate_section(
+    section: str,
+    inputs: Dict[str, Any],
+    refresh: bool = False,
+    on_text: Optional[Callable[[str], None]] = None
+) -> str:
+    """
+    Generate one plan section, reusing the cached copy for the same inputs.
+
+    Args:
+        section: Name from PLAN_SECTIONS
+        inputs: The section's inputs from build_section_inputs
+        refresh: Write the section again even if it is cached
+        on_text: Called with each piece of content as it is written (once with a cached section)
+
+    Returns:
+        str: Section content, without its heading
+
+    Raises:
+        Exception: If the section could not be generated
+    """
+    cache = get_section_cache()
+    key = make_section_key(section, inputs, SECTION_PROMPT_VERSION)
+    if not refresh:
+        cached = cache.get(key)
+        if cached:
+            if on_text:
+                on_text(cached)
+            return cached
+    parts = []
+    for piece in _write_section(section, inputs):
+        parts.append(piece)
+        if on_text:
+            on_text(piece)
+    content = "".join(parts)
+    if not content:
+        raise ValueError("No response generated from OpenAI.")
+    cache.put(key, content, {"section": section, "destination": inputs["destination"]})
+    return content
+
+def _section_pieces(future: "Future[str]", pieces: "queue.Queue[Optional[str]]") -> Iterator[str]:
+    """Yield a section's content as it is written; raises the section's error once it ends."""
+    yield from iter(pieces.get, None)
+    future.result()
+
+def _run_section(section: str, inputs: Dict[str, Any], refresh: bool, pieces: "queue.Queue[Optional[str]]") -> str:
+    try:
+        return generate_section(section, inputs, refresh, on_text=pieces.put)
+    finally:
+        pieces.put(None)
+
+def generate_sections(
+    section_inputs: Dict[str, Dict[str, Any]],
+    refresh: Iterable[str] = ()
+) -> Iterator[Tuple[str, Iterator[str]]]:
+    """
+    Generate every section concurrently, streaming them in document order.
+
+    Cached sections come back immediately; the rest are requested at the
+    same time, within the shared LLM governor's limits. Each section's text
+    streams as it is written, and sections further down are buffered until
+    their turn. A failed section doesn't stop the others.
+
+    Args:
+        section_inputs: Result of build_section_inputs
+        refresh: Sections to write again even if cached
+
+    Yields:
+        Tuple[str, Iterator[str]]: (section, content pieces); iterating the pieces
+        raises the section's error after any content it produced
+    """
+    refresh = set(refresh)
+    executor = ThreadPoolExecutor(max_workers=len(PLAN_SECTIONS), thread_name_prefix="plan-section")
+    try:
+        streams = {}
+        for section in PLAN_SECTIONS:
+            pieces: "queue.Queue[Optional[str]]" = queue.Queue()
+            future = executor.submit(_run_section, section, section_inputs[section], section in refresh, pieces)
+            streams[section] = _section_pieces(future, pieces)
+        yield from streams.items()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def plan_title(destination: str, duration: int) -> str:
+    """Top-level heading of a sectioned plan."""
+    return f"# {duration}-Day Travel Plan for {destination}\n\n"
+
+def format_section(section: str, content: Optional[str]) -> str:
+    """Format a section under its heading, with a note in place of a section that failed."""
+    body = content if content else SECTION_FAILED_NOTE
+    return f"## {PLAN_SECTIONS[section]}\n\n{body.strip()}\n\n"
+
+def section_chunks(
+    destination: str,
+    duration: int,
+    section_inputs: Dict[str, Dict[str, Any]],
+    sections: Dict[str, Optional[str]]
+) -> Iterator[str]:
+    """
+    Stream a sectioned plan as Markdown chunks, each section's text as it is written.
+
+    Args:
+        destination: The travel destination
+        duration: Number of days for the trip
+        section_inputs: Result of build_section_inputs
+        sections: Dict filled with each section's content (None for a section that failed)
+
+    Yields:
+        str: The title, then each section under its heading; a PlanError if every section failed
+    """
+    yield plan_title(destination, duration)
+    errors = []
+    for section, pieces in generate_sections(section_inputs):
+        yield f"## {PLAN_SECTIONS[section]}\n\n"
+        parts = []
+        try:
+            for piece in pieces:
+                parts.append(piece)
+                yield piece
+            sections[section] = "".join(parts)
+            yield "\n\n"
+        except Exception as e:
+            print(f"Error generating {section} section: {str(e)}")
+            errors.append(PlanError(describe_error(e)))
+            sections[section] = None
+            yield ("\n\n" if parts else "") + SECTION_FAILED_NOTE + "\n\n"
+    if len(errors) == len(PLAN_SECTIONS):
+        yield errors[0]
+
+def assemble_plan(destination: str, duration: int, sections: Dict[str, Optional[str]]) -> str:
+    """
+    Join sections into a complete plan.
+
+    Args:
+        destination: The travel destination
+        duration: Number of days for the trip
+        sections: Content of each section, None for sections that failed
+
+    Returns:
+        str: Markdown plan with the sections in PLAN_SECTIONS order
+    """
+    return plan_title(destination, duration) + "".join(
+        format_section(section, sections.get(section)) for section in PLAN_SECTIONS
+    )
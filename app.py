@@ -2,17 +2,29 @@ import streamlit as st
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
+import time
 
-from agents.search_agent import search_destination_info
-from agents.planning_agent import generate_plan
-from utils.markdown_utils import clean_markdown, sanitize_filename
+from agents.planning_agent import check_plan, describe_error, PlanError
+from agents.section_planner import (
+    PLAN_SECTIONS, add_drafts, assemble_plan, build_section_inputs, generate_section, section_chunks
+)
+from utils.markdown_utils import MarkdownSanitizer, clean_markdown, sanitize_filename
 from utils.validation import validate_inputs
-from utils.weather_currency import get_weather_forecast, convert_currency, get_currency_symbol
-from utils.cost_estimation import estimate_total_cost
+from utils.weather_currency import get_currency_symbol
+from utils.pipeline import gather_trip_data, stream_comparison
+from utils.plan_cache import get_plan_cache, make_plan_key
+from utils.plan_similarity import get_similar_plans
+from utils.currency_resolver import resolve_currency_code
+from utils.cost_estimation import cheapest_start_dates, estimate_total_cost
+from utils.destination_finder import get_destination_finder, add_local_totals
+from utils.multi_city import plan_multi_city
 
 # Load environment variables
 load_dotenv()
 
+# Destinations that can be planned side by side in comparison mode
+MAX_COMPARE_DESTINATIONS = 5
+
 def validate_api_keys():
     required_keys = {
         "OPENAI_API_KEY": "OpenAI API key is required for trip planning",
@@ -27,24 +39,262 @@ def validate_api_keys():
     
     return missing_keys
 
-# Utility: Map destination to currency code (simple version)
+# Utility: Map destination to currency code
 def get_currency_code(destination):
-    mapping = {
-        'japan': 'JPY', 'tokyo': 'JPY', 'osaka': 'JPY',
-        'france': 'EUR', 'paris': 'EUR',
-        'uk': 'GBP', 'london': 'GBP',
-        'united kingdom': 'GBP',
-        'usa': 'USD', 'united states': 'USD', 'new york': 'USD', 'los angeles': 'USD',
-        'india': 'INR', 'delhi': 'INR', 'mumbai': 'INR',
-        'china': 'CNY', 'beijing': 'CNY', 'shanghai': 'CNY',
-        'australia': 'AUD', 'sydney': 'AUD',
-        'canada': 'CAD', 'toronto': 'CAD',
+    # Names only: a geocoding fallback could block the submit for seconds, so unknown places use USD
+    return resolve_currency_code(destination, geocode=False)
+
+def render_plan_stream(chunks, placeholder, refresh_interval=0.1):
+    """
+    Render streamed plan chunks progressively into a placeholder.
+    
+    Args:
+        chunks: Iterator of plan chunks from section_chunks
+        placeholder: Streamlit placeholder to render into
+        refresh_interval: Minimum seconds between re-renders
+        
+    Returns:
+        str: The complete plan, or an error message starting with "Error"
+    """
+    plan = ""
+    # Each chunk is cleaned once as it arrives; only an unfinished link is held back
+    sanitizer = MarkdownSanitizer()
+    shown = ""
+    last_render = 0.0
+    for chunk in chunks:
+        if isinstance(chunk, PlanError):
+            placeholder.empty()
+            return chunk
+        plan += chunk
+        shown += sanitizer.feed(chunk)
+        now = time.monotonic()
+        if now - last_render >= refresh_interval:
+            placeholder.markdown(shown, unsafe_allow_html=True)
+            last_render = now
+    
+    # Final checks run once the stream has ended
+    plan_error = check_plan(plan)
+    if plan_error:
+        placeholder.empty()
+        return plan_error
+    placeholder.markdown(shown + sanitizer.close(), unsafe_allow_html=True)
+    return plan
+
+def remember_plan(plan, destination, sections=None, section_inputs=None, cache_key=None, request=None):
+    """Keep the last plan, and what is needed to regenerate its sections, in session state."""
+    st.session_state.last_plan = plan
+    st.session_state.last_destination = destination
+    st.session_state.plan_sections = sections
+    st.session_state.plan_section_inputs = section_inputs
+    st.session_state.plan_request = dict(request or {}, cache_key=cache_key)
+
+def render_section_regenerator():
+    """
+    Panel that writes one section of the last plan again, keeping the others.
+    """
+    sections = st.session_state.get("plan_sections")
+    if not sections:
+        return
+    with st.expander("🔁 Regenerate a Section"):
+        with st.form(key="regenerate_form"):
+            section = st.selectbox(
+                "Section", options=list(PLAN_SECTIONS), format_func=PLAN_SECTIONS.get, key="regenerate_section"
+            )
+            regenerate = st.form_submit_button("Regenerate Section")
+        if not regenerate:
+            return
+        with st.spinner(f"Rewriting {PLAN_SECTIONS[section]}..."):
+            try:
+                sections[section] = generate_section(
+                    section, st.session_state.plan_section_inputs[section], refresh=True
+                )
+            except Exception as e:
+                st.error(describe_error(e))
+                return
+    
+    request = st.session_state.plan_request
+    plan = clean_markdown(assemble_plan(request["destination"], request["duration"], sections))
+    if all(sections.values()):
+        get_plan_cache().put(request["cache_key"], plan, {
+            "origin": request["origin"],
+            "destination": request["destination"],
+            "duration": request["duration"],
+            "start_date": request["start_date"],
+            "preferences": request["preferences"],
+            "sections": sections,
+            "section_inputs": st.session_state.plan_section_inputs
+        })
+    st.session_state.last_plan = plan
+    st.markdown("## ✈️ Your Travel Plan")
+    st.markdown(plan, unsafe_allow_html=True)
+
+def render_cheapest_dates(origin, destination, duration, budget, start_date, count=5):
+    """
+    Show the cheapest start dates over the next year next to the chosen one.
+    
+    Args:
+        origin: The starting city
+        destination: The travel destination
+        duration: Number of days for the trip
+        budget: Budget level
+        start_date: Start date chosen in the form
+        count: Number of dates to list
+    """
+    chosen = estimate_total_cost(origin, destination, duration, budget, start_date)
+    cheapest = cheapest_start_dates(origin, destination, duration, budget, count=count)
+    if not cheapest or cheapest[0]["total_cost"] >= chosen["total_cost"]:
+        return
+    with st.expander("💸 Cheaper start dates"):
+        st.markdown(f"Estimated total for {start_date:%b %d, %Y}: ${chosen['total_cost']:,.2f}")
+        for option in cheapest:
+            saving = chosen["total_cost"] - option["total_cost"]
+            st.markdown(
+                f"- {option['start_date']:%a, %b %d, %Y}: ${option['total_cost']:,.2f} "
+                f"(save ${saving:,.2f})"
+            )
+
+def render_destination_finder():
+    """
+    Sidebar search for destinations that fit a spending limit.
+    
+    Runs on every widget change; the finder answers repeated queries for the
+    same origin, duration and budget level with a binary search.
+    """
+    st.sidebar.markdown("## 🧭 Where Can I Go?")
+    finder_origin = st.sidebar.text_input("Flying From", key="finder_origin")
+    finder_duration = st.sidebar.slider("Number of Days", min_value=1, max_value=30, value=7, key="finder_duration")
+    finder_budget = st.sidebar.selectbox(
+        "Budget Level", options=["Budget", "Mid-Range", "Luxury"], index=1, key="finder_budget"
+    )
+    max_total = st.sidebar.slider(
+        "Maximum Total Spend ($)", min_value=250, max_value=15000, value=2500, step=250, key="finder_max_total"
+    )
+    if not finder_origin:
+        st.sidebar.caption("Enter a departure city to see destinations within your budget.")
+        return
+    
+    matches = get_destination_finder().find(finder_origin, finder_duration, finder_budget, max_total, limit=15)
+    if not matches:
+        st.sidebar.info("No known destinations fit this budget. Try a shorter trip or a higher limit.")
+        return
+    for match in add_local_totals(matches):
+        line = f"**{match['destination']}** — ${match['total_cost']:,.0f}"
+        if match["currency_code"] != "USD" and "local_total" in match:
+            line += f" ({get_currency_symbol(match['currency_code'])}{match['local_total']:,.0f})"
+        st.sidebar.markdown(line)
+
+def parse_destinations(destination, compare_with):
+    """
+    Collect the destinations to plan: the main one plus any entered for comparison.
+    
+    Args:
+        destination: Destination from the main input
+        compare_with: Extra destinations, one per line
+        
+    Returns:
+        list: Distinct destinations in input order, at most MAX_COMPARE_DESTINATIONS
+    """
+    destinations = []
+    seen = set()
+    for name in [destination] + (compare_with or "").splitlines():
+        name = " ".join(name.split())
+        if name and name.casefold() not in seen:
+            seen.add(name.casefold())
+            destinations.append(name)
+    return destinations[:MAX_COMPARE_DESTINATIONS]
+
+def comparison_row(destination, summary):
+    """Format a destination's trip summary as a comparison table row."""
+    cost = summary.get("cost")
+    return {
+        "Destination": destination,
+        "Total ($)": f"{cost['total_cost']:,.0f}" if cost else "—",
+        "Daily Budget ($)": f"{cost['daily_budget']:,.0f}" if cost else "—",
+        "Flight ($)": f"{cost['flight_cost']:,.0f}" if cost else "—",
+        "Avg Temp": f"{summary['avg_temp']}°C" if summary.get("avg_temp") is not None else "—",
+        "Weather": summary.get("conditions") or "—",
+        "Highlights": " · ".join(summary.get("highlights") or []) or "—",
     }
-    dest = destination.lower().strip()
-    for key in mapping:
-        if key in dest:
-            return mapping[key]
-    return 'USD'  # fallback
+
+def render_comparison(origin, destinations, duration, preferences, start_date, refresh_interval=0.1):
+    """
+    Plan several destinations concurrently and show them side by side.
+    
+    The comparison table fills in as each destination's data arrives, and
+    each plan streams into its own tab.
+    
+    Args:
+        origin: The starting city
+        destinations: Destinations to compare
+        duration: Number of days for the trip
+        preferences: User preferences dictionary
+        start_date: Start date chosen in the form
+        refresh_interval: Minimum seconds between re-renders of a plan
+    """
+    st.markdown("## 🆚 Destination Comparison")
+    table = st.empty()
+    table.info("Gathering destination data...")
+    tabs = st.tabs(destinations)
+    placeholders = {name: tab.empty() for name, tab in zip(destinations, tabs)}
+    rows = {}
+    sanitizers = {name: MarkdownSanitizer() for name in destinations}
+    shown = {name: "" for name in destinations}
+    last_render = {name: 0.0 for name in destinations}
+    
+    for event, name, payload in stream_comparison(origin, destinations, duration, preferences, start_date):
+        if event == "summary":
+            rows[name] = comparison_row(name, payload)
+            table.dataframe([rows[d] for d in destinations if d in rows], use_container_width=True, hide_index=True)
+        elif event == "chunk":
+            shown[name] += sanitizers[name].feed(payload)
+            now = time.monotonic()
+            if now - last_render[name] >= refresh_interval:
+                placeholders[name].markdown(shown[name], unsafe_allow_html=True)
+                last_render[name] = now
+        elif isinstance(payload, PlanError):
+            placeholders[name].error(payload)
+        else:
+            placeholders[name].markdown(payload, unsafe_allow_html=True)
+
+def render_multi_city_planner():
+    """
+    Panel that finds the cheapest order to visit several cities.
+    """
+    with st.expander("🗺️ Multi-City Trip"):
+        with st.form(key="multi_city_form"):
+            multi_origin = st.text_input("✈️ Flying From", key="multi_origin")
+            multi_cities = st.text_area("🏙️ Cities to Visit", placeholder="One city per line", key="multi_cities")
+            days_per_city = st.slider("📅 Days in Each City", min_value=1, max_value=14, value=3, key="multi_days")
+            multi_budget = st.selectbox(
+                "💰 Budget Level", options=["Budget", "Mid-Range", "Luxury"], index=1, key="multi_budget"
+            )
+            return_home = st.checkbox("Fly back home at the end", value=True, key="multi_return")
+            plan_route = st.form_submit_button("Find Cheapest Route")
+        if not plan_route:
+            return
+        cities = [line.strip() for line in (multi_cities or "").splitlines() if line.strip()]
+        if not multi_origin or len(cities) < 2:
+            st.error("Please enter a starting city and at least two cities to visit.")
+            return
+        
+        route = plan_multi_city(multi_origin, cities, days_per_city, multi_budget, return_home)
+        st.markdown(f"**Route:** {' → '.join([multi_origin.strip()] + route['order'] + ([multi_origin.strip()] if return_home else []))}")
+        st.dataframe(
+            [
+                {"From": leg["from"], "To": leg["to"], "Flight ($)": f"{leg['flight_cost']:,.0f}"}
+                for leg in route["legs"]
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+        st.markdown(
+            f"- Flights: ${route['flight_cost']:,.2f}\n"
+            f"- Hotels: ${route['hotel_cost']:,.2f}\n"
+            f"- Daily Expenses: ${route['daily_expenses']:,.2f}\n"
+            f"- **Total: ${route['total_cost']:,.2f}**"
+        )
+        if route["method"] == "heuristic":
+            st.caption("Long route: order found with a fast heuristic and may not be the absolute cheapest.")
 
 def main():
     # Validate API keys
@@ -240,6 +490,8 @@ def main():
         </style>
     """, unsafe_allow_html=True)
 
+    render_destination_finder()
+
     # Header
     st.markdown("""
         <div class='main-header'>
@@ -271,6 +523,12 @@ def main():
             placeholder="Enter city or airport",
             key="destination_input"
         )
+        compare_with = st.text_area(
+            label="🆚 Compare With (optional)",
+            placeholder="One destination per line",
+            key="compare_input",
+            help=f"Plan up to {MAX_COMPARE_DESTINATIONS - 1} more destinations side by side"
+        )
         st.markdown("</div></div>", unsafe_allow_html=True)
 
         # --- Duration ---
@@ -325,6 +583,8 @@ def main():
     st.markdown("</div>", unsafe_allow_html=True)  # Close center-card
     st.markdown("</div>", unsafe_allow_html=True)  # Close main-content
 
+    render_multi_city_planner()
+
     # Footer
     st.markdown("""
         <div class='footer'>
@@ -337,6 +597,8 @@ def main():
         st.session_state.last_plan = None
     if 'last_destination' not in st.session_state:
         st.session_state.last_destination = None
+    if 'stage_memo' not in st.session_state:
+        st.session_state.stage_memo = {}
 
     # Results Section
     if submit_button:
@@ -351,6 +613,17 @@ def main():
             "pace": pace
         }
         
+        # Several destinations are planned side by side
+        destinations = parse_destinations(destination, compare_with)
+        if len(destinations) > 1:
+            for candidate in destinations:
+                is_valid, error_msg = validate_inputs(origin, candidate, duration, preferences)
+                if not is_valid:
+                    st.error(f"{candidate}: {error_msg}")
+                    return
+            render_comparison(origin, destinations, duration, preferences, start_date)
+            return
+        
         # Get local currency code and symbol
         currency_code = get_currency_code(destination)
         currency_symbol = get_currency_symbol(currency_code)
@@ -362,51 +635,70 @@ def main():
             st.error(error_msg)
             return
         
-        with st.spinner("🔍 Creating your personalized travel plan..."):
-            # Search phase
-            search_data = search_destination_info(destination)
-            
-            # Get weather information
-            weather_data = get_weather_forecast(destination, days=duration)
-            if weather_data:
-                weather_info = "\n\n### Weather Forecast\n"
-                for day in weather_data["forecast"]:
-                    weather_info += f"- {day['date']}: {day['temp']}°C, {day['description']}\n"
-                search_data += weather_info
-            
-            # Get cost estimation in USD
-            cost_estimation = estimate_total_cost(origin, destination, duration, budget)
-            # Convert costs to local currency if not USD
-            def conv(amount):
-                if currency_code == 'USD':
-                    return amount
-                converted = convert_currency(amount, 'USD', currency_code)
-                return converted if converted is not None else amount
-            cost_info = f"\n\n### Cost Estimation (in {currency_symbol} and $)\n"
-            cost_info += f"- Flight Cost: {currency_symbol}{conv(cost_estimation['flight_cost']):.2f} (${'{:.2f}'.format(cost_estimation['flight_cost'])})\n"
-            cost_info += f"- Hotel Cost: {currency_symbol}{conv(cost_estimation['hotel_cost']):.2f} (${'{:.2f}'.format(cost_estimation['hotel_cost'])})\n"
-            cost_info += f"- Daily Expenses: {currency_symbol}{conv(cost_estimation['daily_expenses']):.2f} (${'{:.2f}'.format(cost_estimation['daily_expenses'])})\n"
-            cost_info += f"- Daily Budget: {currency_symbol}{conv(cost_estimation['daily_budget']):.2f} (${'{:.2f}'.format(cost_estimation['daily_budget'])})\n"
-            cost_info += f"- Total Cost: {currency_symbol}{conv(cost_estimation['total_cost']):.2f} (${'{:.2f}'.format(cost_estimation['total_cost'])})\n"
-            search_data += cost_info
-            
-            # Planning phase
-            # Update the planning prompt to mention the correct currencies
+        render_cheapest_dates(origin, destination, duration, budget, start_date)
+        
+        # Identical requests are served straight from the plan cache
+        plan_cache = get_plan_cache()
+        cache_key = make_plan_key(destination, duration, preferences, origin, start_date)
+        request = {
+            "origin": origin,
+            "destination": destination,
+            "duration": duration,
+            "start_date": str(start_date),
+            "preferences": preferences
+        }
+        cached_entry = plan_cache.get_entry(cache_key)
+        # Near-identical requests (a day shorter, one more interest) reuse a saved plan
+        similar = None if cached_entry else get_similar_plans().find(destination, duration, preferences, origin, start_date)
+        if cached_entry:
+            st.markdown("## ✈️ Your Travel Plan")
+            st.markdown(cached_entry["plan"], unsafe_allow_html=True)
+            meta = cached_entry["meta"]
+            remember_plan(
+                cached_entry["plan"], destination, meta.get("sections"), meta.get("section_inputs"), cache_key, request
+            )
+        elif similar and similar["mode"] == "serve":
+            similar_plan = similar["note"] + similar["plan"]
+            st.markdown("## ✈️ Your Travel Plan")
+            st.markdown(similar_plan, unsafe_allow_html=True)
+            remember_plan(similar_plan, destination)
+        else:
+            with st.spinner("🔍 Creating your personalized travel plan..."):
+                # Search, weather, cost and route lookups run concurrently; those whose
+                # inputs are unchanged since this session's last request are reused
+                results = gather_trip_data(
+                    origin, destination, duration, budget, currency_code, start_date, pace,
+                    memo=st.session_state.stage_memo
+                )
+                
+            # Planning phase: each section is written (or reused from the cache) on its own,
+            # adapting the matching section of a less similar saved plan where there is one
             preferences['currency_code'] = currency_code
-            result = generate_plan(destination, duration, preferences, search_data)
+            section_inputs = add_drafts(
+                build_section_inputs(destination, duration, preferences, results, start_date), similar
+            )
+            sections = {}
+            st.markdown("## ✈️ Your Travel Plan")
+            result = render_plan_stream(
+                section_chunks(destination, duration, section_inputs, sections),
+                st.empty()
+            )
             
-            if result.startswith("Error:"):
+            if result.startswith("Error"):
                 st.error(result)
             else:
                 # Clean and format the markdown
                 cleaned_result = clean_markdown(result)
-                
-                st.markdown("## ✈️ Your Travel Plan")
-                st.markdown(cleaned_result, unsafe_allow_html=True)
+                # Plans with a failed section are not cached, so the next request retries it
+                if all(sections.values()):
+                    plan_cache.put(cache_key, cleaned_result, dict(
+                        request, sections=sections, section_inputs=section_inputs
+                    ))
                 
                 # Store the last plan in session state
-                st.session_state.last_plan = cleaned_result
-                st.session_state.last_destination = destination
+                remember_plan(cleaned_result, destination, sections, section_inputs, cache_key, request)
+
+    render_section_regenerator()
 
     # Download button
     if st.session_state.last_plan:
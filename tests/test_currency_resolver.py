@@ -0,0 +1,34 @@
+import pytest
+
+from utils.currency_resolver import get_currency_resolver, resolve_currency_code
+
+@pytest.mark.parametrize("destination, currency", [
+    # Sub-national names that contain or equal another country's name
+    ("New Mexico", "USD"),
+    ("Atlanta, Georgia", "USD"),
+    ("Panama City, Florida", "USD"),
+    ("Cambridge, Massachusetts", "USD"),
+    ("Cambridge, MA", "USD"),
+    ("Jersey City", "USD"),
+    ("Perth, WA", "AUD"),
+    ("Seattle, WA", "USD"),
+    ("London, Ontario", "CAD"),
+    ("Baja California", "MXN"),
+    # The countries themselves still resolve
+    ("Georgia", "GEL"),
+    ("Tbilisi, Georgia", "GEL"),
+    ("Panama City", "PAB"),
+    ("Mexico City", "MXN"),
+    ("Rio de Janeiro", "BRL"),
+    ("Tokyo, Japan", "JPY"),
+])
+def test_resolves_destination_currency(destination, currency):
+    assert resolve_currency_code(destination, geocode=False) == currency
+
+def test_abbreviations_only_count_as_whole_parts():
+    # "de" is Delaware only as a qualifier of its own
+    assert get_currency_resolver().match("Rio de Janeiro")[1] == "BR"
+    assert get_currency_resolver().match("Dover, DE")[1] == "US"
+
+def test_unknown_destination_defaults_to_usd():
+    assert resolve_currency_code("Nowhere In Particular Xyz", geocode=False) == "USD"
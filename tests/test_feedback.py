@@ -0,0 +1,18 @@
+from utils.feedback import FeedbackAnalytics
+
+def test_rows_split_across_reads_are_parsed_once_complete(tmp_path):
+    path = tmp_path / "feedback_202607.csv"
+    complete = 'Timestamp,Destination,Duration,Rating,Comments\r\n2026-07-01,Paris,5,4,"Loved it,\r\nwould return"\r\n'
+    # A concurrent append stopped inside a quoted field and inside a multibyte character
+    partial = '2026-07-02,Zürich,3,5,"Great'.encode("utf-8")
+    path.write_bytes(complete.encode("utf-8") + partial[:13])
+    analytics = FeedbackAnalytics(str(tmp_path))
+    assert analytics.summary()["count"] == 1
+
+    path.write_bytes(complete.encode("utf-8") + partial)
+    assert analytics.summary()["count"] == 1
+
+    path.write_bytes(complete.encode("utf-8") + '2026-07-02,Zürich,3,5,"Great\r\nfood"\r\n'.encode("utf-8"))
+    columns = analytics.columns()
+    assert list(columns["destination"]) == ["paris", "zürich"]
+    assert list(columns["rating"]) == [4.0, 5.0]
@@ -0,0 +1,43 @@
+import csv
+
+from utils import gazetteer
+from utils.gazetteer import Gazetteer
+
+def make_gazetteer(tmp_path):
+    path = tmp_path / "places.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "lat", "lon", "country_code", "population", "admin1"])
+        writer.writerow(["Paris", 48.85, 2.35, "FR", 2138551, "11"])
+        writer.writerow(["Paris", 33.66, -95.56, "US", 24171, "TX"])
+        writer.writerow(["Springfield", 39.80, -89.64, "US", 116565, "IL"])
+        writer.writerow(["Springfield", 37.22, -93.30, "US", 169176, "MO"])
+    places = Gazetteer()
+    places.load(str(path))
+    return places
+
+def test_plain_name_returns_most_populous(tmp_path):
+    assert make_gazetteer(tmp_path).lookup("Paris")["country_code"] == "FR"
+
+def test_qualifier_narrows_the_candidates(tmp_path):
+    places = make_gazetteer(tmp_path)
+    assert places.lookup("Paris, Texas")["country_code"] == "US"
+    assert places.lookup("Paris, France")["country_code"] == "FR"
+    assert places.lookup("Paris, FR")["country_code"] == "FR"
+    assert places.lookup("Springfield, IL")["lat"] == 39.80
+    assert places.lookup("Springfield, USA")["lat"] == 37.22
+
+def test_unmatched_qualifier_leaves_it_to_the_geocoder(tmp_path):
+    places = make_gazetteer(tmp_path)
+    assert places.lookup("Paris, Ontario") is None
+    assert places.lookup("Nowhere, France") is None
+
+def test_learned_places_are_written_once(tmp_path, monkeypatch):
+    learned = tmp_path / "learned.csv"
+    monkeypatch.setattr(gazetteer, "LEARNED_PATH", str(learned))
+    monkeypatch.setattr(gazetteer, "_learned_names", None)
+    monkeypatch.setattr(gazetteer, "_gazetteer", Gazetteer())
+    for _ in range(3):
+        gazetteer.remember_place("Paris, Texas", 33.66, -95.56, "us")
+    with open(learned, newline="", encoding="utf-8") as f:
+        assert [row["name"] for row in csv.DictReader(f)] == ["paris, texas"]
@@ -0,0 +1,57 @@
+import random
+import re
+
+import pytest
+
+from utils.markdown_utils import MarkdownSanitizer, clean_markdown
+
+def reference_clean_markdown(text: str) -> str:
+    """The regex implementation MarkdownSanitizer replaced, kept as the reference."""
+    text = re.sub(r'\[([^\[\]]*?)(?=\s*$|\n)', r'\1', text)
+    text = re.sub(r'\[([^\[\]]*?)\]\s*(\([^)]*$)', r'\1', text)
+    text = re.sub(r'\[([^\[\]]*?)\]\(\)', r'\1', text)
+    return text
+
+# Characters the cleaning reacts to, weighted towards brackets, plus filler
+ALPHABET = "[[[]]]((())) \n\t ab"
+TOKENS = ["[", "]", "(", ")", "](", "]()", " ", "\n", "text", "https://example.com", "[a](b)", "[x]()"]
+
+def random_markdown(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+    return "".join(rng.choice(TOKENS) for _ in range(rng.randint(0, 15)))
+
+def random_chunks(rng: random.Random, text: str):
+    cuts = sorted(rng.sample(range(len(text) + 1), rng.randint(0, min(len(text), 8))))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+@pytest.mark.parametrize("text", [
+    "",
+    "See [the museum",
+    "See [the museum](https://example.com",
+    "See [the museum]()",
+    "See [the museum]  (https://example.com) and [more",
+    "[a](b) [c]() [d](e\n[f",
+    "[[nested]](x)",
+])
+def test_matches_reference_on_examples(text):
+    assert clean_markdown(text) == reference_clean_markdown(text)
+
+def test_matches_reference_on_random_corpus():
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = random_markdown(rng)
+        assert clean_markdown(text) == reference_clean_markdown(text), repr(text)
+
+def test_streamed_chunks_match_reference_and_only_grow():
+    rng = random.Random(1)
+    for _ in range(20000):
+        text = random_markdown(rng)
+        expected = reference_clean_markdown(text)
+        sanitizer = MarkdownSanitizer()
+        shown = ""
+        for chunk in random_chunks(rng, text):
+            shown += sanitizer.feed(chunk)
+            # Text already shown is never taken back
+            assert expected.startswith(shown), repr(text)
+        assert shown + sanitizer.close() == expected, repr(text)
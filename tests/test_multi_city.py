@@ -0,0 +1,25 @@
+import pytest
+
+from utils.cost_estimation import get_cost_model
+from utils.multi_city import plan_multi_city
+
+def test_costs_follow_the_budget_level_and_days():
+    model = get_cost_model()
+    paris, rome = model.city_index["paris"], model.city_index["rome"]
+    level = model.level_index["mid-range"]
+    route = plan_multi_city("London", ["Paris", "Rome"], [2, 3], "Mid-Range")
+    stays = {stay["city"]: stay for stay in route["stays"]}
+    assert stays["Paris"]["days"] == 2 and stays["Rome"]["days"] == 3
+    assert stays["Paris"]["hotel_cost"] == model.hotel[paris, level] * 2
+    assert stays["Rome"]["daily_expenses"] == model.daily[rome, level] * 3
+    assert route["total_cost"] == pytest.approx(route["flight_cost"] + route["hotel_cost"] + route["daily_expenses"])
+
+def test_luxury_costs_more_than_budget():
+    budget = plan_multi_city("London", ["Paris", "Rome"], 3, "Budget")
+    luxury = plan_multi_city("London", ["Paris", "Rome"], 3, "Luxury")
+    assert luxury["hotel_cost"] > budget["hotel_cost"]
+    assert luxury["total_cost"] > budget["total_cost"]
+
+def test_mismatched_day_counts_raise():
+    with pytest.raises(ValueError):
+        plan_multi_city("London", ["Paris", "Rome", "Madrid"], [2, 3], "Mid-Range")
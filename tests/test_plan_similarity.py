@@ -0,0 +1,41 @@
+from utils.plan_cache import PlanCache, make_plan_key
+from utils.plan_similarity import SimilarPlanIndex
+
+PREFERENCES = {"interests": ["Food", "Culture"], "budget": "Mid-Range", "pace": "Moderate"}
+
+def make_index(tmp_path, destination="Paris", duration=5, preferences=PREFERENCES, origin="London", start_date="2026-07-10"):
+    cache = PlanCache(cache_dir=str(tmp_path))
+    cache.put(make_plan_key(destination, duration, preferences, origin, start_date), "# Saved plan\n", {
+        "origin": origin,
+        "destination": destination,
+        "duration": duration,
+        "start_date": start_date,
+        "preferences": preferences,
+    })
+    return SimilarPlanIndex(cache)
+
+def test_serves_a_plan_one_day_shorter(tmp_path):
+    match = make_index(tmp_path).find("paris", 4, PREFERENCES, "london", "2026-07-12")
+    assert match["mode"] == "serve"
+
+def test_serves_a_plan_with_overlapping_interests_a_day_longer(tmp_path):
+    index = make_index(tmp_path, duration=7, preferences=dict(PREFERENCES, interests=["Culture", "Food", "History"]))
+    match = index.find("Paris", 6, PREFERENCES, "London", "2026-07-10")
+    assert match["mode"] == "serve"
+    assert "history" in match["note"]
+
+def test_other_place_with_the_same_name_is_not_matched(tmp_path):
+    assert make_index(tmp_path).find("Paris, Texas", 5, PREFERENCES, "London", "2026-07-10") is None
+
+def test_same_place_with_a_qualifier_is_served(tmp_path):
+    match = make_index(tmp_path).find("Paris, France", 5, PREFERENCES, "London", "2026-07-10")
+    assert match["mode"] == "serve"
+
+def test_differences_that_change_the_plan_only_give_a_draft(tmp_path):
+    index = make_index(tmp_path)
+    other_origin = index.find("Paris", 5, PREFERENCES, "New York", "2026-07-10")
+    no_interests = index.find("Paris", 5, dict(PREFERENCES, interests=[]), "London", "2026-07-10")
+    other_interests = index.find("Paris", 5, dict(PREFERENCES, interests=["Food", "Nightlife", "Shopping"]), "London", "2026-07-10")
+    other_season = index.find("Paris", 5, PREFERENCES, "London", "2027-01-10")
+    for match in (other_origin, no_interests, other_interests, other_season):
+        assert match["mode"] == "draft"
@@ -0,0 +1,32 @@
+from utils.geo import geohashes_covering
+from utils.poi_index import PoiTileIndex
+
+PLACES = [
+    {"name": "Museum", "type": "museum", "lat": 48.8606, "lon": 2.3376},
+    {"name": "Viewpoint", "type": "viewpoint", "lat": 48.8867, "lon": 2.3431},
+]
+
+def test_cover_wider_than_the_tile_limit_is_fetched_once():
+    calls = []
+
+    def fetch(south, west, north, east):
+        calls.append((south, west, north, east))
+        return PLACES
+
+    index = PoiTileIndex(max_tiles=4)
+    assert len(geohashes_covering(48.8606, 2.3376, 5000, index.precision)) > index.max_tiles
+    places = index.query(48.8606, 2.3376, 5000, fetch)
+    assert len(calls) == 1
+    assert [place["name"] for place in places] == ["Museum", "Viewpoint"]
+
+def test_cached_tiles_are_not_fetched_again():
+    calls = []
+
+    def fetch(south, west, north, east):
+        calls.append(1)
+        return PLACES
+
+    index = PoiTileIndex()
+    index.query(48.8606, 2.3376, 500, fetch)
+    assert index.query(48.8606, 2.3376, 500, fetch, place_type="museum")[0]["name"] == "Museum"
+    assert len(calls) == 1
@@ -0,0 +1,81 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import agents.planning_agent as planning_agent
+import agents.section_planner as section_planner
+import utils.plan_cache as plan_cache
+from agents.planning_agent import PlanError
+from agents.section_planner import PLAN_SECTIONS, assemble_plan, section_chunks
+
+def fake_chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+@pytest.fixture
+def section_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(plan_cache, "_section_cache", plan_cache.PlanCache(cache_dir=str(tmp_path)))
+
+def make_inputs(duration=3):
+    return {
+        section: {"destination": "Lisbon", "duration": duration, "interests": "Food", "pace": "Moderate",
+                  "context": "", "routes": "", "section": section}
+        for section in PLAN_SECTIONS
+    }
+
+def test_sections_stream_before_their_completion_ends(section_cache, monkeypatch):
+    release = threading.Event()
+
+    def stream(**kwargs):
+        yield fake_chunk("  First line\n# Heading")
+        release.wait(5)
+        yield fake_chunk("\nLast line\n\n")
+
+    monkeypatch.setattr(section_planner, "build_section_prompt", lambda section, inputs: section)
+    monkeypatch.setattr(planning_agent, "chat_completion", stream)
+    sections = {}
+    chunks = section_chunks("Lisbon", 3, make_inputs(), sections)
+    streamed = [next(chunks), next(chunks), next(chunks)]
+    # The first line arrives while the completion is still running
+    assert streamed[1:] == ["## Best Time to Visit\n\n", "First line"]
+    release.set()
+    plan = "".join(streamed) + "".join(chunks)
+    assert sections["best_time"] == "First line\n### Heading\nLast line"
+    assert plan == assemble_plan("Lisbon", 3, sections)
+
+def test_failed_section_is_noted_and_others_kept(section_cache, monkeypatch):
+    def stream(**kwargs):
+        yield fake_chunk("Partial text\n")
+        if "hotels" in kwargs["messages"][-1]["content"]:
+            raise TimeoutError("Timed out waiting for an LLM request slot")
+        yield fake_chunk("More text")
+
+    monkeypatch.setattr(section_planner, "build_section_prompt", lambda section, inputs: section)
+    monkeypatch.setattr(planning_agent, "chat_completion", stream)
+    sections = {}
+    chunks = list(section_chunks("Lisbon", 3, make_inputs(), sections))
+    assert sections["hotels"] is None
+    assert sections["transport"] == "Partial text\nMore text"
+    assert section_planner.SECTION_FAILED_NOTE in "".join(chunks)
+    assert not any(isinstance(chunk, PlanError) for chunk in chunks)
+
+def test_every_section_failing_ends_with_an_error(section_cache, monkeypatch):
+    def stream(**kwargs):
+        raise TimeoutError("Timed out waiting for an LLM request slot")
+
+    monkeypatch.setattr(section_planner, "build_section_prompt", lambda section, inputs: section)
+    monkeypatch.setattr(planning_agent, "chat_completion", stream)
+    chunks = list(section_chunks("Lisbon", 3, make_inputs(), {}))
+    assert isinstance(chunks[-1], PlanError)
+
+def test_drafts_go_only_to_sections_whose_inputs_changed():
+    inputs = make_inputs()
+    matched_inputs = dict(make_inputs(), attractions=dict(inputs["attractions"], duration=4, draft="Older draft"))
+    similar = {"sections": {section: f"Saved {section}" for section in PLAN_SECTIONS}, "section_inputs": matched_inputs}
+    drafted = section_planner.add_drafts(inputs, similar)
+    assert drafted["attractions"]["draft"] == "Saved attractions"
+    assert "draft" not in drafted["hotels"]
+    assert "Saved attractions" in section_planner.build_section_prompt("attractions", dict(
+        drafted["attractions"], interests="Food", routes=""
+    ))
+    assert section_planner.add_drafts(inputs, None) is inputs
@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+from utils import storage
+
+@pytest.fixture(autouse=True)
+def plan_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "PLANS_DIR", str(tmp_path))
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "plans.db"))
+    monkeypatch.setattr(storage, "_local", type(storage._local)())
+    return tmp_path
+
+def ids(plans):
+    return sorted(plan["id"] for plan in plans)
+
+def test_search_follows_saves_replacements_and_deletes():
+    storage.save_travel_plan({"id": "a", "destination": "Paris", "plan": "Louvre and croissants"})
+    storage.save_travel_plan({"id": "b", "destination": "Rome", "plan": "Colosseum and gelato"})
+    assert ids(storage.search_travel_plans("louvre")) == ["a"]
+
+    storage.save_travel_plan({"id": "a", "destination": "Paris", "plan": "Orsay and macarons"})
+    assert storage.search_travel_plans("louvre") == []
+    assert ids(storage.search_travel_plans("orsay")) == ["a"]
+
+    assert storage.delete_travel_plan("a")
+    assert not storage.delete_travel_plan("a")
+    assert storage.search_travel_plans("orsay") == []
+    assert ids(storage.search_travel_plans("gelato")) == ["b"]
+
+def test_index_keyed_by_id_is_rebuilt(plan_store):
+    conn = sqlite3.connect(str(plan_store / "plans.db"))
+    conn.execute(
+        "CREATE TABLE plans (id TEXT PRIMARY KEY, destination TEXT, origin TEXT, start_date TEXT, end_date TEXT,"
+        " budget TEXT, duration INTEGER, created_at TEXT NOT NULL, body TEXT NOT NULL)"
+    )
+    conn.execute("CREATE VIRTUAL TABLE plans_fts USING fts5(id UNINDEXED, destination, content)")
+    conn.execute(
+        "INSERT INTO plans (id, destination, created_at, body) VALUES ('old', 'Lisbon', '2025-01-01', ?)",
+        ('{"destination": "Lisbon", "plan": "Tram 28"}',)
+    )
+    conn.commit()
+    conn.close()
+    assert ids(storage.search_travel_plans("tram")) == ["old"]
@@ -0,0 +1,154 @@
+import os
+import re
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Prompt budget for the search snippets behind a whole plan, split evenly
+# across its sections; the CONTEXT_TOKEN_BUDGET environment variable overrides it
+DEFAULT_CONTEXT_TOKEN_BUDGET = 2500
+CHARS_PER_TOKEN = 4
+
+# Snippets at least this similar to one already kept are dropped
+DUPLICATE_THRESHOLD = 0.6
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+
+# What the planning prompt asks for, as BM25 queries
+SECTION_QUERIES = {
+    "best_time": "best time visit season weather climate festival events month",
+    "attractions": "attractions things to do sights museum landmark tour activities park temple",
+    "hotels": "hotel hotels hostel accommodation stay resort room night booking",
+    "transport": "transport metro subway bus train tram taxi airport transfer getting around",
+    "costs": "cost costs price prices budget cheap expensive meal ticket fee daily spend",
+}
+
+# One seed per MinHash permutation
+_SEEDS = np.random.default_rng(0x5EED).integers(0, np.iinfo(np.int64).max, MINHASH_PERMUTATIONS).astype(np.uint64)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: characters / 4."""
+    return len(text) // CHARS_PER_TOKEN
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens."""
+    return re.findall(r"\w+", text.lower())
+
+def split_snippets(search_text: str) -> List[str]:
+    """Split formatted search results into snippets, one per "### title" block."""
+    snippets = re.split(r"\n\s*\n(?=### )", search_text.strip())
+    return [snippet.strip() for snippet in snippets if snippet.strip()]
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: an independent-looking 64-bit hash per seed (multiplication wraps mod 2^64)."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def minhash_signatures(texts: List[str]) -> np.ndarray:
+    """
+    MinHash signatures of each text's word shingles.
+
+    Args:
+        texts: Texts to sign
+
+    Returns:
+        np.ndarray: len(texts) x MINHASH_PERMUTATIONS matrix; the fraction of equal
+        columns between two rows estimates the Jaccard similarity of their shingle sets
+    """
+    signatures = np.full((len(texts), MINHASH_PERMUTATIONS), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for row, text in enumerate(texts):
+        words = tokenize(text)
+        shingles = {
+            " ".join(words[i:i + SHINGLE_SIZE])
+            for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+        }
+        hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in shingles], dtype=np.uint64)
+        signatures[row] = _mix(hashes[:, None] ^ _SEEDS[None, :]).min(axis=0)
+    return signatures
+
+def dedupe_snippets(snippets: List[str], threshold: float = DUPLICATE_THRESHOLD) -> List[str]:
+    """
+    Drop snippets that are near-duplicates of an earlier one.
+
+    Args:
+        snippets: Snippets in priority order
+        threshold: Estimated Jaccard similarity at or above which a snippet is dropped
+
+    Returns:
+        List[str]: Remaining snippets, in their original order
+    """
+    if len(snippets) < 2:
+        return list(snippets)
+    signatures = minhash_signatures(snippets)
+    similarity = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+    kept: List[int] = []
+    for i in range(len(snippets)):
+        if not kept or similarity[i, kept].max() < threshold:
+            kept.append(i)
+    return [snippets[i] for i in kept]
+
+class BM25:
+    """
+    Okapi BM25 over a small document set, held as a dense term-frequency matrix.
+    """
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.vocabulary: Dict[str, int] = {}
+        rows, columns = [], []
+        for row, tokens in enumerate(documents):
+            for token in tokens:
+                rows.append(row)
+                columns.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+        self.tf = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float64)
+        np.add.at(self.tf, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1.0)
+        lengths = self.tf.sum(axis=1)
+        average = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+        df = (self.tf > 0).sum(axis=0)
+        n = len(documents)
+        self.idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        self.norm = k1 * (1.0 - b + b * lengths / average)
+        self.k1 = k1
+
+    def scores(self, query: List[str]) -> np.ndarray:
+        """Score every document against a tokenized query."""
+        columns = [self.vocabulary[token] for token in set(query) if token in self.vocabulary]
+        if not columns:
+            return np.zeros(len(self.tf))
+        tf = self.tf[:, columns]
+        return (self.idf[columns] * tf * (self.k1 + 1) / (tf + self.norm[:, None])).sum(axis=1)
+
+def section_token_budget() -> int:
+    """Snippet budget for one plan section, read from CONTEXT_TOKEN_BUDGET when called so .env values apply."""
+    return int(os.getenv("CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKEN_BUDGET)) // len(SECTION_QUERIES)
+
+def section_context(search_text: str, section: str, token_budget: Optional[int] = None) -> str:
+    """
+    Pick the search snippets relevant to one part of the plan.
+
+    Args:
+        search_text: Formatted search results ("### title" blocks)
+        section: Key of SECTION_QUERIES
+        token_budget: Approximate token budget for the snippets (defaults to section_token_budget())
+
+    Returns:
+        str: Best-ranked snippets that fit the budget, in their original order
+        (empty if none match)
+    """
+    snippets = dedupe_snippets(split_snippets(search_text))
+    if not snippets:
+        return ""
+    scores = BM25([tokenize(snippet) for snippet in snippets]).scores(tokenize(SECTION_QUERIES[section]))
+    selected = []
+    remaining = section_token_budget() if token_budget is None else token_budget
+    for i in np.argsort(-scores, kind="stable"):
+        if scores[i] <= 0:
+            break
+        cost = estimate_tokens(snippets[i]) + 1
+        if cost <= remaining:
+            selected.append(int(i))
+            remaining -= cost
+    return "\n\n".join(snippets[i] for i in sorted(selected))
@@ -1,82 +1,318 @@
-import requests
-from typing import Dict, Optional
+import json
 import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.geo import distance_matrix
+
+# Bundled mock cost model (all amounts in USD)
+COST_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cost_model.json")
+
+# Used for cities, routes and budget levels the model doesn't know
+DEFAULT_FLIGHT_COST = 1000
+DEFAULT_HOTEL_COST = 150
+DEFAULT_DAILY_EXPENSES = 75
+
+def _normalize(name: str) -> str:
+    return " ".join(str(name).split()).lower()
+
+class CostModel:
+    """
+    Trip cost tables as dense NumPy arrays.
+
+    Cities and budget levels are mapped to integer indices once. The flight
+    matrix is (cities + 1) x (cities + 1) and the hotel and daily-expense
+    tables are (cities + 1) x (levels + 1); the extra last row/column holds
+    the defaults, so unknown names index into it and pricing any number of
+    trips is a handful of fancy-indexing operations.
+    """
+
+    def __init__(self, data: Dict):
+        defaults = data.get("defaults", {})
+        default_flight = defaults.get("flight", DEFAULT_FLIGHT_COST)
+        default_hotel = defaults.get("hotel_per_night", DEFAULT_HOTEL_COST)
+        default_daily = defaults.get("daily_expenses", DEFAULT_DAILY_EXPENSES)
+
+        cities = data["cities"]
+        self.cities = [_normalize(city["name"]) for city in cities]
+        self.budget_levels = [_normalize(level) for level in data["budget_levels"]]
+        self.city_index: Dict[str, int] = {}
+        for i, city in enumerate(cities):
+            for name in [city["name"]] + city.get("aliases", []):
+                self.city_index.setdefault(_normalize(name), i)
+        self.level_index = {level: i for i, level in enumerate(self.budget_levels)}
+        self.unknown_city = len(cities)
+        self.unknown_level = len(self.budget_levels)
+        self.lat = np.array([city["lat"] for city in cities], dtype=np.float64)
+        self.lon = np.array([city["lon"] for city in cities], dtype=np.float64)
+
+        n = len(cities)
+        self.hotel = np.full((n + 1, self.unknown_level + 1), default_hotel, dtype=np.float64)
+        self.daily = np.full((n + 1, self.unknown_level + 1), default_daily, dtype=np.float64)
+        for i, city in enumerate(cities):
+            for level, j in self.level_index.items():
+                self.hotel[i, j] = city["hotel"].get(level, default_hotel)
+                self.daily[i, j] = city["daily"].get(level, default_daily)
+
+        # Routes without an explicit fare are priced by great-circle distance
+        pricing = data.get("flight_pricing", {})
+        distance_km = distance_matrix(self.lat, self.lon) / 1000.0
+        round_to = pricing.get("round_to", 10)
+        fares = pricing.get("base_fare", 90) + pricing.get("per_km", 0.11) * distance_km
+        self.flight = np.full((n + 1, n + 1), default_flight, dtype=np.float64)
+        self.flight[:n, :n] = np.round(fares / round_to) * round_to
+        np.fill_diagonal(self.flight, default_flight)
+        for origin, destination, fare in data.get("flight_overrides", []):
+            self.flight[self.city_index[_normalize(origin)], self.city_index[_normalize(destination)]] = fare
+
+        # Seasonal factors; southern-hemisphere destinations use the months shifted by half a year
+        seasonality = data.get("seasonality", {})
+        self.flight_month = np.array(seasonality.get("flight_month", [1.0] * 12), dtype=np.float64)
+        self.hotel_month = np.array(seasonality.get("hotel_month", [1.0] * 12), dtype=np.float64)
+        self.daily_month = np.array(seasonality.get("daily_month", [1.0] * 12), dtype=np.float64)
+        self.flight_weekday = np.array(seasonality.get("flight_weekday", [1.0] * 7), dtype=np.float64)
+        self.hotel_weekday = np.array(seasonality.get("hotel_weekday", [1.0] * 7), dtype=np.float64)
+        self.southern = np.append(self.lat < 0, False).astype(np.intp)
+
+    def city_indices(self, names: Union[str, Iterable[str]]) -> np.ndarray:
+        """Map city names to row indices; unknown cities map to the defaults row."""
+        values, inverse = np.unique(np.atleast_1d(np.asarray(names, dtype=str)), return_inverse=True)
+        lookup = np.array([self.city_index.get(_normalize(v), self.unknown_city) for v in values], dtype=np.intp)
+        return lookup[inverse]
+
+    def level_indices(self, levels: Union[str, Iterable[str]]) -> np.ndarray:
+        """Map budget levels to column indices; unknown levels map to the defaults column."""
+        values, inverse = np.unique(np.atleast_1d(np.asarray(levels, dtype=str)), return_inverse=True)
+        lookup = np.array([self.level_index.get(_normalize(v), self.unknown_level) for v in values], dtype=np.intp)
+        return lookup[inverse]
+
+    def _day_factors(self, first_day: np.datetime64, n_days: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-day multipliers for a run of consecutive days.
+
+        Returns:
+            Tuple: flight factors, and cumulative hotel and daily-expense factors
+            (with a leading zero column), each with one row per hemisphere
+        """
+        days = first_day + np.arange(n_days)
+        months = days.astype("datetime64[M]").astype(np.int64) % 12
+        # 1970-01-01 was a Thursday; shift so Monday is 0
+        weekdays = (days.astype(np.int64) + 3) % 7
+        months = np.stack([months, (months + 6) % 12])
+        flight = self.flight_month[months] * self.flight_weekday[weekdays]
+        hotel = self.hotel_month[months] * self.hotel_weekday[weekdays]
+        daily = self.daily_month[months]
+        zeros = np.zeros((2, 1))
+        return (
+            flight,
+            np.concatenate([zeros, np.cumsum(hotel, axis=1)], axis=1),
+            np.concatenate([zeros, np.cumsum(daily, axis=1)], axis=1)
+        )
+
+    def price(
+        self,
+        origin_idx: np.ndarray,
+        destination_idx: np.ndarray,
+        durations: np.ndarray,
+        level_idx: np.ndarray,
+        start_dates: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Price trips given pre-computed indices. Arguments broadcast together.
+
+        Without start dates prices are flat across the year. With them, each
+        night's hotel rate and each day's expenses get their month and weekday
+        multipliers, and the flight its departure and return-day multipliers;
+        per-trip sums come from cumulative sums over the covered date range.
+
+        Returns:
+            Dict[str, np.ndarray]: flight_cost, hotel_cost, daily_expenses, total_cost and daily_budget
+        """
+        arrays = [origin_idx, destination_idx, np.asarray(durations, dtype=np.int64), level_idx]
+        if start_dates is not None:
+            arrays.append(np.asarray(start_dates, dtype="datetime64[D]"))
+        arrays = np.broadcast_arrays(*arrays)
+        origin_idx, destination_idx, durations, level_idx = arrays[:4]
+
+        flight_cost = self.flight[origin_idx, destination_idx]
+        hotel_cost = self.hotel[destination_idx, level_idx] * durations
+        daily_expenses = self.daily[destination_idx, level_idx] * durations
+        if start_dates is not None and durations.size:
+            start_dates = arrays[4]
+            first_day = start_dates.min()
+            offsets = (start_dates - first_day).astype(np.int64)
+            n_days = int((offsets + durations).max()) + 1
+            flight_factors, hotel_cumulative, daily_cumulative = self._day_factors(first_day, n_days)
+            hemisphere = self.southern[destination_idx]
+            ends = offsets + durations
+            flight_cost = flight_cost * (flight_factors[hemisphere, offsets] + flight_factors[hemisphere, ends]) / 2
+            hotel_cost = self.hotel[destination_idx, level_idx] * (
+                hotel_cumulative[hemisphere, ends] - hotel_cumulative[hemisphere, offsets]
+            )
+            daily_expenses = self.daily[destination_idx, level_idx] * (
+                daily_cumulative[hemisphere, ends] - daily_cumulative[hemisphere, offsets]
+            )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            daily_budget = np.where(durations > 0, (hotel_cost + daily_expenses) / durations, 0.0)
+        return {
+            "flight_cost": flight_cost,
+            "hotel_cost": hotel_cost,
+            "daily_expenses": daily_expenses,
+            "total_cost": flight_cost + hotel_cost + daily_expenses,
+            "daily_budget": daily_budget
+        }
+
+_cost_model: Optional[CostModel] = None
+_cost_model_lock = threading.Lock()
+
+def get_cost_model() -> CostModel:
+    """Return the process-wide cost model, loaded from the bundled data file on first use."""
+    global _cost_model
+    if _cost_model is None:
+        with _cost_model_lock:
+            if _cost_model is None:
+                with open(COST_MODEL_PATH, "r", encoding="utf-8") as f:
+                    _cost_model = CostModel(json.load(f))
+    return _cost_model
+
+def estimate_costs_batch(origins, destinations, durations, budget_levels, start_dates=None) -> Dict[str, np.ndarray]:
+    """
+    Estimate the cost of many trips in one vectorized call.
+
+    Each argument may be a single value or a sequence; they broadcast
+    together, so e.g. one origin can be priced against every destination.
+
+    Args:
+        origins: Origin city name(s)
+        destinations: Destination city name(s)
+        durations: Trip length(s) in days
+        budget_levels: Budget level(s)
+        start_dates: Optional start date(s), to apply seasonal and weekday pricing
+
+    Returns:
+        Dict[str, np.ndarray]: Arrays of flight_cost, hotel_cost, daily_expenses, total_cost and daily_budget in USD
+    """
+    model = get_cost_model()
+    origin_idx = model.city_indices(origins)
+    destination_idx = model.city_indices(destinations)
+    level_idx = model.level_indices(budget_levels)
+    durations = np.atleast_1d(np.asarray(durations, dtype=np.int64))
+    if start_dates is not None:
+        start_dates = np.atleast_1d(_as_days(start_dates))
+    return model.price(origin_idx, destination_idx, durations, level_idx, start_dates)
+
+def _as_days(dates) -> np.ndarray:
+    """Convert a date, datetime, ISO string or sequence of them to datetime64[D]."""
+    if isinstance(dates, (date, str)):
+        dates = [dates]
+    return np.array([np.datetime64(d.isoformat()[:10] if isinstance(d, date) else d, "D") for d in dates])
+
+def price_calendar(
+    origin: str,
+    destination: str,
+    duration: int,
+    budget_level: str,
+    window_start: Optional[date] = None,
+    window_days: int = 365
+) -> Dict[str, np.ndarray]:
+    """
+    Price a trip for every start date in a window in one vectorized call.
+
+    Args:
+        origin: The starting city
+        destination: The travel destination
+        duration: Number of days for the trip
+        budget_level: Budget level
+        window_start: First start date to price (defaults to tomorrow)
+        window_days: Number of consecutive start dates
+
+    Returns:
+        Dict[str, np.ndarray]: start_date (datetime64[D]) plus the cost arrays of estimate_costs_batch
+    """
+    first_day = _as_days(window_start or date.today() + timedelta(days=1))[0]
+    start_dates = first_day + np.arange(window_days)
+    costs = estimate_costs_batch(origin, destination, duration, budget_level, start_dates)
+    costs["start_date"] = start_dates
+    return costs
+
+def cheapest_start_dates(
+    origin: str,
+    destination: str,
+    duration: int,
+    budget_level: str,
+    window_start: Optional[date] = None,
+    window_days: int = 365,
+    count: int = 5
+) -> List[Dict]:
+    """
+    Find the cheapest start dates for a trip within a window.
+
+    Args:
+        origin: The starting city
+        destination: The travel destination
+        duration: Number of days for the trip
+        budget_level: Budget level
+        window_start: First start date to consider (defaults to tomorrow)
+        window_days: Number of consecutive start dates to consider
+        count: Number of dates to return
+
+    Returns:
+        List[Dict]: Cheapest first (earliest on ties), each with start_date (date) and the cost breakdown in USD
+    """
+    calendar = price_calendar(origin, destination, duration, budget_level, window_start, window_days)
+    totals = calendar["total_cost"]
+    count = min(count, len(totals))
+    if count <= 0:
+        return []
+    candidates = np.argpartition(totals, count - 1)[:count] if count < len(totals) else np.arange(len(totals))
+    # Ties at the partition boundary are resolved by taking every date priced at the cutoff
+    cutoff = totals[candidates].max()
+    candidates = np.flatnonzero(totals <= cutoff)
+    order = candidates[np.lexsort((candidates, totals[candidates]))][:count]
+    return [
+        {
+            "start_date": calendar["start_date"][i].astype(date),
+            **{key: float(calendar[key][i]) for key in ("flight_cost", "hotel_cost", "daily_expenses", "total_cost", "daily_budget")}
+        }
+        for i in order
+    ]
 
 def get_flight_cost(origin: str, destination: str) -> Optional[float]:
     """
-    Get estimated flight cost using a flight API.
+    Get estimated flight cost.
     This is a mock implementation - in production, you would use a real flight API.
     """
-    # Mock flight costs (in USD)
-    mock_costs = {
-        "new york": {"london": 800, "tokyo": 1200, "paris": 900},
-        "london": {"new york": 800, "tokyo": 1000, "paris": 200},
-        "tokyo": {"new york": 1200, "london": 1000, "paris": 1100},
-        "paris": {"new york": 900, "london": 200, "tokyo": 1100}
-    }
-    
-    origin = origin.lower()
-    destination = destination.lower()
-    
-    if origin in mock_costs and destination in mock_costs[origin]:
-        return mock_costs[origin][destination]
-    return 1000  # Default cost if route not found
+    model = get_cost_model()
+    return float(model.flight[model.city_indices(origin)[0], model.city_indices(destination)[0]])
 
 def get_hotel_cost(destination: str, duration: int, budget_level: str) -> float:
     """
     Get estimated hotel cost based on destination and budget level.
     """
-    # Mock hotel costs per night (in USD)
-    mock_costs = {
-        "new york": {"budget": 100, "mid-range": 200, "luxury": 400},
-        "london": {"budget": 80, "mid-range": 160, "luxury": 320},
-        "tokyo": {"budget": 70, "mid-range": 140, "luxury": 280},
-        "paris": {"budget": 90, "mid-range": 180, "luxury": 360}
-    }
-    
-    destination = destination.lower()
-    budget_level = budget_level.lower()
-    
-    if destination in mock_costs and budget_level in mock_costs[destination]:
-        return mock_costs[destination][budget_level] * duration
-    return 150 * duration  # Default cost if destination not found
+    model = get_cost_model()
+    return float(model.hotel[model.city_indices(destination)[0], model.level_indices(budget_level)[0]] * duration)
 
 def get_daily_expenses(destination: str, budget_level: str) -> float:
     """
     Get estimated daily expenses based on destination and budget level.
     """
-    # Mock daily expenses (in USD)
-    mock_costs = {
-        "new york": {"budget": 50, "mid-range": 100, "luxury": 200},
-        "london": {"budget": 40, "mid-range": 80, "luxury": 160},
-        "tokyo": {"budget": 35, "mid-range": 70, "luxury": 140},
-        "paris": {"budget": 45, "mid-range": 90, "luxury": 180}
-    }
-    
-    destination = destination.lower()
-    budget_level = budget_level.lower()
-    
-    if destination in mock_costs and budget_level in mock_costs[destination]:
-        return mock_costs[destination][budget_level]
-    return 75  # Default cost if destination not found
-
-def estimate_total_cost(origin: str, destination: str, duration: int, budget_level: str) -> Dict[str, float]:
+    model = get_cost_model()
+    return float(model.daily[model.city_indices(destination)[0], model.level_indices(budget_level)[0]])
+
+def estimate_total_cost(
+    origin: str,
+    destination: str,
+    duration: int,
+    budget_level: str,
+    start_date: Optional[date] = None
+) -> Dict[str, float]:
     """
     Estimate total trip cost including flights, accommodation, and daily expenses.
+    Prices are seasonal when a start date is given.
     """
-    flight_cost = get_flight_cost(origin, destination)
-    hotel_cost = get_hotel_cost(destination, duration, budget_level)
-    daily_expenses = get_daily_expenses(destination, budget_level) * duration
-    
-    total_cost = flight_cost + hotel_cost + daily_expenses
-    
-    # Calculate daily budget
-    daily_budget = (hotel_cost + daily_expenses) / duration
-    
-    return {
-        "flight_cost": flight_cost,
-        "hotel_cost": hotel_cost,
-        "daily_expenses": daily_expenses,
-        "total_cost": total_cost,
-        "daily_budget": daily_budget
-    } 
\ No newline at end of file
+    costs = estimate_costs_batch(origin, destination, duration, budget_level, start_date)
+    return {key: float(values[0]) for key, values in costs.items()}
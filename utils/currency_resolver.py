@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.map_checklist import get_place_coordinates
+
+# Bundled table of ISO 4217 currencies and the countries, aliases and
+# cities that use them
+CURRENCY_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "currencies.json")
+DEFAULT_CURRENCY = "USD"
+
+def _fold(text: str) -> str:
+    """Case-fold text, strip accents and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", " ".join(text.split()).casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed set of patterns.
+
+    Matching visits each character of the input once, regardless of how many
+    patterns the automaton holds.
+    """
+
+    def __init__(self, patterns: Dict[str, object]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # state -> [(pattern length, payload), ...]
+        self._output: List[List[Tuple[int, object]]] = [[]]
+        for pattern, payload in patterns.items():
+            self._add(pattern, payload)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, payload: object):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), payload))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """
+        Find every pattern occurrence in text.
+
+        Args:
+            text: Text to scan
+
+        Yields:
+            Tuple: (start index, end index, payload) of each match
+        """
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, payload in self._output[state]:
+                yield i + 1 - length, i + 1, payload
+
+# Levels of the names in the table; higher levels win
+CITY, REGION, COUNTRY = range(3)
+
+class CurrencyResolver:
+    """
+    Maps free-text destinations to ISO 4217 currency codes.
+
+    Country names, aliases, regions (states, provinces) and city names from
+    the bundled table are compiled once into an Aho-Corasick automaton, so a
+    lookup is a single pass over the destination string.
+    """
+
+    def __init__(self, data: Dict):
+        self.symbols = {code: info["symbol"] for code, info in data["currencies"].items()}
+        self.country_currency = {country["code"]: country["currency"] for country in data["countries"]}
+        # folded name -> [(currency, country code, level, segment only), ...]; a name such as
+        # "georgia" can be a country and a region of another country at once
+        patterns: Dict[str, List[Tuple[str, str, int, bool]]] = {}
+        for country in data["countries"]:
+            names = [(name, COUNTRY, False) for name in [country["name"]] + country.get("aliases", [])]
+            names += [(name, REGION, False) for name in country.get("regions", [])]
+            # Abbreviations such as "TX" or "NSW" only count as a whole comma-separated part
+            names += [(name, REGION, True) for name in country.get("region_codes", [])]
+            for name, level, segment_only in names:
+                candidates = patterns.setdefault(_fold(name), [])
+                if not any(candidate[1] == country["code"] for candidate in candidates):
+                    candidates.append((country["currency"], country["code"], level, segment_only))
+        for country in data["countries"]:
+            for city in country.get("cities", []):
+                patterns.setdefault(_fold(city), [(country["currency"], country["code"], CITY, False)])
+        self._automaton = AhoCorasick(patterns)
+
+    @staticmethod
+    def _is_segment(text: str, start: int, end: int) -> bool:
+        """Whether text[start:end] is a whole comma-separated part of text."""
+        return text[:start].rstrip()[-1:] in ("", ",") and text[end:].lstrip()[:1] in ("", ",")
+
+    def match(self, destination: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the currency named by a destination string.
+
+        Matching ignores case and accents, and only whole words count. A name
+        inside a longer matched name doesn't count ("Mexico" in "New Mexico",
+        "Panama" in "Panama City"). A name used by several countries is read
+        as the one another name in the destination points to ("Georgia" in
+        "Atlanta, Georgia"), or else as the country. Country names then win
+        over regions and regions over cities ("Cambridge, Massachusetts"),
+        then the rightmost match (as in "City, Country"), then the longest.
+
+        Args:
+            destination: Destination as entered by the user
+
+        Returns:
+            Tuple: (currency code, country code) or None if nothing matched
+        """
+        text = _fold(destination)
+        matches = []
+        for start, end, candidates in self._automaton.find_all(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            candidates = [c for c in candidates if not c[3] or self._is_segment(text, start, end)]
+            if candidates:
+                matches.append((start, end, candidates))
+        matches = [
+            (start, end, candidates) for start, end, candidates in matches
+            if not any(s <= start and end <= e and e - s > end - start for s, e, _ in matches)
+        ]
+        supported = {candidates[0][1] for _, _, candidates in matches if len(candidates) == 1}
+
+        best = None
+        best_rank = None
+        for start, end, candidates in matches:
+            backed = [c for c in candidates if c[1] in supported]
+            payload = max(backed or candidates, key=lambda c: c[2])
+            rank = (payload[2], end, end - start)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = payload, rank
+        return (best[0], best[1]) if best else None
+
+    def currency_for_country(self, country_code: str) -> Optional[str]:
+        """Return the currency of an ISO 3166-1 alpha-2 country code."""
+        return self.country_currency.get((country_code or "").upper())
+
+    def symbol(self, currency_code: str) -> str:
+        """Return the symbol for a currency code, or the code itself if unknown."""
+        return self.symbols.get(currency_code.upper(), currency_code)
+
+_resolver: Optional[CurrencyResolver] = None
+_resolver_lock = threading.Lock()
+
+def get_currency_resolver() -> CurrencyResolver:
+    """Return the process-wide resolver, built from the bundled table on first use."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                with open(CURRENCY_DATA_PATH, "r", encoding="utf-8") as f:
+                    _resolver = CurrencyResolver(json.load(f))
+    return _resolver
+
+def resolve_currency_code(destination: str, geocode: bool = True) -> str:
+    """
+    Get the local currency code for a destination.
+
+    Args:
+        destination: Destination as entered by the user
+        geocode: Fall back to the geocoded country when no name matches
+
+    Returns:
+        str: ISO 4217 currency code (USD if it cannot be determined)
+    """
+    resolver = get_currency_resolver()
+    matched = resolver.match(destination or "")
+    if matched:
+        return matched[0]
+    if geocode and destination:
+        coordinates = get_place_coordinates(destination)
+        if coordinates:
+            currency = resolver.currency_for_country(coordinates.get("country_code", ""))
+            if currency:
+                return currency
+    return DEFAULT_CURRENCY
@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.cost_estimation import CostModel, get_cost_model
+from utils.currency_resolver import resolve_currency_code
+from utils.exchange_rates import get_rate_store
+
+DEFAULT_MAX_SCANS = 256
+
+class DestinationFinder:
+    """
+    Reverse search over the cost model: which destinations fit a budget.
+
+    For each (origin, duration, budget level, start date) the trip to every
+    known destination is priced in one vectorized call and the totals are
+    kept sorted. Answering a spending limit is then a binary search, so
+    moving the budget slider never reprices anything.
+    """
+
+    def __init__(self, model: Optional[CostModel] = None, max_scans: int = DEFAULT_MAX_SCANS):
+        self.model = model or get_cost_model()
+        self.max_scans = max_scans
+        # (origin, duration, level, start day) -> (sorted totals, destination indices, flight, hotel, daily)
+        self._scans: "OrderedDict[Tuple, Tuple[np.ndarray, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Destination currencies are resolved from the bundled table only, so a scan never waits on geocoding
+        self.currencies = [resolve_currency_code(city, geocode=False) for city in self.model.cities]
+
+    def _scan(self, origin_idx: int, duration: int, level_idx: int, start_day) -> Tuple[np.ndarray, ...]:
+        key = (origin_idx, duration, level_idx, start_day)
+        with self._lock:
+            scan = self._scans.get(key)
+            if scan is not None:
+                self._scans.move_to_end(key)
+                return scan
+
+        destinations = np.arange(len(self.model.cities))
+        destinations = destinations[destinations != origin_idx]
+        start_dates = None if start_day is None else np.array([start_day], dtype="datetime64[D]")
+        costs = self.model.price(origin_idx, destinations, duration, level_idx, start_dates)
+        order = np.argsort(costs["total_cost"], kind="stable")
+        scan = (
+            costs["total_cost"][order],
+            destinations[order],
+            costs["flight_cost"][order],
+            costs["hotel_cost"][order],
+            costs["daily_expenses"][order],
+        )
+        with self._lock:
+            self._scans[key] = scan
+            while len(self._scans) > self.max_scans:
+                self._scans.popitem(last=False)
+        return scan
+
+    def find(
+        self,
+        origin: str,
+        duration: int,
+        budget_level: str,
+        max_total: float,
+        limit: Optional[int] = 20,
+        start_date: Optional[date] = None
+    ) -> List[Dict]:
+        """
+        List destinations whose estimated trip cost fits a spending limit.
+
+        Args:
+            origin: The starting city
+            duration: Number of days for the trip
+            budget_level: Budget level
+            max_total: Maximum total spend in USD
+            limit: Maximum number of destinations to return (all if None)
+            start_date: Optional start date, for seasonal prices
+
+        Returns:
+            List[Dict]: Destinations cheapest first, each with destination, currency_code,
+            flight_cost, hotel_cost, daily_expenses and total_cost (USD)
+        """
+        origin_idx = int(self.model.city_indices(origin)[0])
+        level_idx = int(self.model.level_indices(budget_level)[0])
+        start_day = None if start_date is None else str(start_date)[:10]
+        totals, destinations, flights, hotels, dailies = self._scan(origin_idx, int(duration), level_idx, start_day)
+
+        end = int(np.searchsorted(totals, max_total, side="right"))
+        if limit is not None:
+            end = min(end, limit)
+        return [
+            {
+                "destination": self.model.cities[destinations[i]].title(),
+                "currency_code": self.currencies[destinations[i]],
+                "flight_cost": float(flights[i]),
+                "hotel_cost": float(hotels[i]),
+                "daily_expenses": float(dailies[i]),
+                "total_cost": float(totals[i])
+            }
+            for i in range(end)
+        ]
+
+_finder: Optional[DestinationFinder] = None
+_finder_lock = threading.Lock()
+
+def get_destination_finder() -> DestinationFinder:
+    """Return the process-wide destination finder."""
+    global _finder
+    if _finder is None:
+        with _finder_lock:
+            if _finder is None:
+                _finder = DestinationFinder()
+    return _finder
+
+def add_local_totals(matches: List[Dict]) -> List[Dict]:
+    """
+    Add each destination's total in its local currency, with one rate lookup.
+
+    Args:
+        matches: Result of DestinationFinder.find
+
+    Returns:
+        List[Dict]: The same matches, with local_total set where a rate is known
+    """
+    if not matches:
+        return matches
+    codes = [match["currency_code"] for match in matches]
+    rates = get_rate_store().get_rate_vector("USD", codes)
+    if rates is None:
+        return matches
+    rates = np.where(np.array(codes) == "USD", 1.0, rates)
+    local_totals = np.array([match["total_cost"] for match in matches]) * rates
+    for match, local_total in zip(matches, local_totals):
+        if not np.isnan(local_total):
+            match["local_total"] = float(local_total)
+    return matches
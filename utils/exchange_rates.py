@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.http_client import http_get
+
+EXCHANGE_RATES_URL = "https://api.exchangeratesapi.io/v1/latest"
+
+# Rates are refreshed at most once per TTL window for each base currency
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_CACHE_PATH = os.path.join(".cache", "exchange_rates.json")
+
+class RateStore:
+    """
+    In-memory store of exchange rate snapshots, one per base currency.
+
+    Each snapshot holds every symbol the API returns for its base, fetched in a
+    single request and reused by all sessions until its TTL expires. Snapshots
+    are optionally persisted to a JSON file so a restart does not refetch them.
+    """
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS, cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.ttl_seconds = ttl_seconds
+        self.cache_path = cache_path
+        # base -> (fetched_at, {code: column}, rates array)
+        self._snapshots: Dict[str, Tuple[float, Dict[str, int], np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._load()
+
+    def _load(self):
+        """Load persisted snapshots from disk, ignoring a missing or corrupt file."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for base, snapshot in data.items():
+                self._store(base, snapshot["rates"], snapshot["fetched_at"])
+        except Exception as e:
+            print(f"Error loading exchange rates: {str(e)}")
+
+    def _save(self):
+        """Persist all snapshots to disk atomically."""
+        if not self.cache_path:
+            return
+        try:
+            with self._lock:
+                data = {
+                    base: {
+                        "fetched_at": fetched_at,
+                        "rates": {code: float(rates[i]) for code, i in index.items()}
+                    }
+                    for base, (fetched_at, index, rates) in self._snapshots.items()
+                }
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"Error saving exchange rates: {str(e)}")
+
+    def _store(self, base: str, rates: Dict[str, float], fetched_at: float):
+        codes = sorted(rates)
+        index = {code: i for i, code in enumerate(codes)}
+        values = np.array([rates[code] for code in codes], dtype=np.float64)
+        with self._lock:
+            self._snapshots[base.upper()] = (fetched_at, index, values)
+
+    def _fresh_snapshot(self, base: str):
+        with self._lock:
+            snapshot = self._snapshots.get(base)
+        if snapshot and time.time() - snapshot[0] < self.ttl_seconds:
+            return snapshot
+        return None
+
+    def _fetch(self, base: str) -> bool:
+        """Fetch every symbol for a base currency in one request."""
+        api_key = os.getenv("EXCHANGERATES_API_KEY")
+        if not api_key:
+            return False
+        try:
+            params = {
+                "access_key": api_key,
+                "base": base
+            }
+            response = http_get("exchangerates", EXCHANGE_RATES_URL, params=params)
+            if response.status_code != 200:
+                print(f"Exchange rate request failed. Error: {response.status_code}")
+                return False
+            data = response.json()
+            if not data.get("rates"):
+                return False
+            rates = dict(data["rates"])
+            rates[base] = 1.0
+            self._store(base, rates, time.time())
+            self._save()
+            return True
+        except Exception as e:
+            print(f"Error fetching exchange rates: {str(e)}")
+            return False
+
+    def get_snapshot(self, base: str):
+        """
+        Return the (fetched_at, index, rates) snapshot for a base currency,
+        fetching it if it is missing or expired. Concurrent callers for the
+        same base share a single request.
+        """
+        base = base.upper()
+        snapshot = self._fresh_snapshot(base)
+        if snapshot:
+            return snapshot
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(base, threading.Lock())
+        with fetch_lock:
+            snapshot = self._fresh_snapshot(base)
+            if snapshot:
+                return snapshot
+            if self._fetch(base):
+                return self._fresh_snapshot(base)
+        # Fall back to a stale snapshot rather than no conversion at all
+        with self._lock:
+            return self._snapshots.get(base)
+
+    def get_rates(self, base: str) -> Optional[Dict[str, float]]:
+        """
+        Get all rates for a base currency.
+
+        Args:
+            base: Base currency code
+
+        Returns:
+            Dict[str, float]: Rate for each currency code or None if unavailable
+        """
+        snapshot = self.get_snapshot(base)
+        if not snapshot:
+            return None
+        _, index, rates = snapshot
+        return {code: float(rates[i]) for code, i in index.items()}
+
+    def get_rate_vector(self, from_currency: str, to_currencies: List[str]) -> Optional[np.ndarray]:
+        """
+        Get rates from one currency to several currencies as an array.
+
+        Args:
+            from_currency: Source currency code
+            to_currencies: Target currency codes
+
+        Returns:
+            np.ndarray: Rates in the order of to_currencies (NaN where unknown) or None if unavailable
+        """
+        snapshot = self.get_snapshot(from_currency)
+        if not snapshot:
+            return None
+        _, index, rates = snapshot
+        columns = np.array([index.get(code.upper(), -1) for code in to_currencies], dtype=np.int64)
+        result = np.full(len(columns), np.nan)
+        known = columns >= 0
+        result[known] = rates[columns[known]]
+        return result
+
+    def get_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """
+        Get the rate between two currencies.
+
+        Args:
+            from_currency: Source currency code
+            to_currency: Target currency code
+
+        Returns:
+            float: Exchange rate or None if unavailable
+        """
+        if from_currency.upper() == to_currency.upper():
+            return 1.0
+        rates = self.get_rate_vector(from_currency, [to_currency])
+        if rates is None or np.isnan(rates[0]):
+            return None
+        return float(rates[0])
+
+_rate_store: Optional[RateStore] = None
+_rate_store_lock = threading.Lock()
+
+def get_rate_store() -> RateStore:
+    """Return the process-wide rate store shared by all sessions."""
+    global _rate_store
+    if _rate_store is None:
+        with _rate_store_lock:
+            if _rate_store is None:
+                _rate_store = RateStore()
+    return _rate_store
+
+def convert_amounts(amounts: Dict[str, float], from_currency: str, to_currency: str) -> Optional[Dict[str, float]]:
+    """
+    Convert a breakdown of amounts (e.g. a cost estimation) in one operation.
+
+    Args:
+        amounts: Mapping of label to amount
+        from_currency: Source currency code
+        to_currency: Target currency code
+
+    Returns:
+        Dict[str, float]: Converted amounts by label or None if the rate is unavailable
+    """
+    rate = get_rate_store().get_rate(from_currency, to_currency)
+    if rate is None:
+        return None
+    labels = list(amounts)
+    values = np.fromiter((amounts[label] for label in labels), dtype=np.float64, count=len(labels))
+    converted = values * rate
+    return {label: float(value) for label, value in zip(labels, converted)}
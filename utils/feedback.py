@@ -0,0 +1,246 @@
+import atexit
+import csv
+import io
+import os
+import queue
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+FEEDBACK_DIR = "feedback"
+FEEDBACK_HEADER = ["Timestamp", "Destination", "Duration", "Rating", "Comments"]
+FEEDBACK_FILE_PATTERN = re.compile(r"^feedback_(\d{6})\.csv$")
+
+class FeedbackWriter:
+    """
+    Buffered feedback sink.
+
+    Sessions enqueue rows; a single background thread drains the queue in
+    batches and appends each month's rows to its CSV with one write call, so
+    concurrent submissions can never interleave within a file.
+    """
+
+    def __init__(self, directory: str = FEEDBACK_DIR, flush_interval: float = 1.0, max_batch: int = 500):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: List):
+        """
+        Queue a feedback row for the current month's file.
+
+        Args:
+            row: Values in FEEDBACK_HEADER order
+        """
+        self._queue.put((datetime.now().strftime("%Y%m"), list(row)))
+
+    def flush(self):
+        """Block until every queued row has been written."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                # Collect whatever else arrives within the flush interval
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get(timeout=self.flush_interval))
+                    except queue.Empty:
+                        break
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"Error saving feedback: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[tuple]):
+        rows_by_month: Dict[str, List[List]] = {}
+        for month, row in batch:
+            rows_by_month.setdefault(month, []).append(row)
+
+        os.makedirs(self.directory, exist_ok=True)
+        for month, rows in rows_by_month.items():
+            filename = os.path.join(self.directory, f"feedback_{month}.csv")
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not os.path.isfile(filename) or os.path.getsize(filename) == 0:
+                writer.writerow(FEEDBACK_HEADER)
+            writer.writerows(rows)
+            data = buffer.getvalue().encode("utf-8")
+            fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+_writer: Optional[FeedbackWriter] = None
+_writer_lock = threading.Lock()
+
+def get_feedback_writer() -> FeedbackWriter:
+    """Return the process-wide feedback writer, flushed at interpreter exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = FeedbackWriter()
+                atexit.register(_writer.flush)
+    return _writer
+
+class FeedbackAnalytics:
+    """
+    Columnar view of the monthly feedback CSVs.
+
+    Each refresh only parses bytes appended since the previous one, so past
+    months are read once. Aggregates run as single NumPy passes over the
+    destination, duration and rating columns.
+    """
+
+    def __init__(self, directory: str = FEEDBACK_DIR):
+        self.directory = directory
+        # filename -> {"offset": bytes parsed, "destination", "duration", "rating": column arrays}
+        self._files: Dict[str, Dict] = {}
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _complete_length(data: bytes) -> int:
+        """Length of the leading complete records: up to the last newline outside a quoted field."""
+        complete = 0
+        quotes = 0
+        start = 0
+        while True:
+            newline = data.find(b"\n", start)
+            if newline < 0:
+                return complete
+            quotes += data.count(b'"', start, newline)
+            if quotes % 2 == 0:
+                complete = newline + 1
+            start = newline + 1
+
+    def _parse(self, path: str, state: Dict) -> bool:
+        """Parse the complete rows after the offset; a row still being appended is left for the next parse."""
+        with open(path, "rb") as f:
+            f.seek(state["offset"])
+            data = f.read()
+        data = data[:self._complete_length(data)]
+        if not data:
+            return False
+        state["offset"] += len(data)
+        destinations, durations, ratings = [], [], []
+        reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+        for row in reader:
+            if len(row) < 4 or row[:4] == FEEDBACK_HEADER[:4]:
+                continue
+            try:
+                duration = int(row[2])
+                rating = float(row[3])
+            except ValueError:
+                continue
+            destinations.append(" ".join(row[1].split()).casefold())
+            durations.append(duration)
+            ratings.append(rating)
+        state["destination"] = np.concatenate([state["destination"], np.array(destinations, dtype=str)])
+        state["duration"] = np.concatenate([state["duration"], np.array(durations, dtype=np.int64)])
+        state["rating"] = np.concatenate([state["rating"], np.array(ratings, dtype=np.float64)])
+        return True
+
+    def refresh(self) -> bool:
+        """
+        Parse new feedback rows.
+
+        Returns:
+            bool: True if any new rows were found
+        """
+        changed = False
+        filenames = sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []
+        with self._lock:
+            for filename in filenames:
+                if not FEEDBACK_FILE_PATTERN.match(filename):
+                    continue
+                path = os.path.join(self.directory, filename)
+                size = os.path.getsize(path)
+                state = self._files.get(filename)
+                if state is None or size < state["offset"]:
+                    # New file, or one that was rewritten: parse from the start
+                    state = {
+                        "offset": 0,
+                        "destination": np.array([], dtype=str),
+                        "duration": np.array([], dtype=np.int64),
+                        "rating": np.array([], dtype=np.float64),
+                    }
+                    self._files[filename] = state
+                if size == state["offset"]:
+                    continue
+                if self._parse(path, state):
+                    changed = True
+            if changed or self._columns is None:
+                states = [self._files[name] for name in sorted(self._files)]
+                self._columns = {
+                    "destination": np.concatenate([np.array([], dtype=str)] + [s["destination"] for s in states]),
+                    "duration": np.concatenate([np.array([], dtype=np.int64)] + [s["duration"] for s in states]),
+                    "rating": np.concatenate([np.array([], dtype=np.float64)] + [s["rating"] for s in states]),
+                }
+        return changed
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Return the destination, duration and rating columns, refreshed."""
+        self.refresh()
+        return self._columns
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Overall feedback statistics.
+
+        Returns:
+            Dict[str, float]: count and mean_rating
+        """
+        ratings = self.columns()["rating"]
+        return {
+            "count": int(len(ratings)),
+            "mean_rating": float(ratings.mean()) if len(ratings) else 0.0
+        }
+
+    def mean_rating_by(self, field: str) -> Dict:
+        """
+        Mean rating grouped by destination or trip length.
+
+        Args:
+            field: "destination" or "duration"
+
+        Returns:
+            Dict: group value -> {"mean_rating": float, "count": int}
+        """
+        if field not in ("destination", "duration"):
+            raise ValueError("field must be 'destination' or 'duration'")
+        columns = self.columns()
+        if not len(columns["rating"]):
+            return {}
+        groups, inverse = np.unique(columns[field], return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=columns["rating"])
+        means = sums / counts
+        return {
+            group.item(): {"mean_rating": float(mean), "count": int(count)}
+            for group, mean, count in zip(groups, means, counts)
+        }
+
+_analytics: Optional[FeedbackAnalytics] = None
+_analytics_lock = threading.Lock()
+
+def get_feedback_analytics() -> FeedbackAnalytics:
+    """Return the process-wide feedback analytics view."""
+    global _analytics
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                _analytics = FeedbackAnalytics()
+    return _analytics
@@ -0,0 +1,298 @@
+import csv
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Optional bulk dataset: a GeoNames dump (e.g. cities15000.txt from
+# https://download.geonames.org/export/dump/) or a CSV with a
+# name,lat,lon[,country_code,population,admin1] header; the GAZETTEER_PATH
+# environment variable points elsewhere
+DEFAULT_GAZETTEER_PATH = os.path.join("data", "cities15000.txt")
+# Places resolved through Nominatim are appended here and reloaded on start
+LEARNED_PATH = os.path.join(".cache", "gazetteer_learned.csv")
+
+# Write-backs are merged into the sorted arrays once this many accumulate
+MERGE_THRESHOLD = 256
+
+def normalize_place_name(name: str) -> str:
+    """Case-fold a place name and collapse whitespace."""
+    return " ".join(str(name).split()).casefold()
+
+class Gazetteer:
+    """
+    Compact index of place names to coordinates.
+
+    Names are kept in a sorted NumPy string array alongside parallel
+    coordinate, country, first-level division (state, province) and
+    population arrays, so exact and prefix lookups are binary searches. Entries sharing a name are ordered by descending
+    population, so an exact lookup returns the most populous match. New
+    entries go to a small overlay that is merged into the arrays in batches.
+    """
+
+    def __init__(self):
+        self._names = np.array([], dtype=str)
+        self._lat = np.array([], dtype=np.float64)
+        self._lon = np.array([], dtype=np.float64)
+        self._country = np.array([], dtype=str)
+        self._admin1 = np.array([], dtype=str)
+        self._population = np.array([], dtype=np.int64)
+        self._pending: Dict[str, tuple] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._names) + len(self._pending)
+
+    def _extend(
+        self,
+        names: List[str],
+        lat: List[float],
+        lon: List[float],
+        country: List[str],
+        population: List[int],
+        admin1: List[str]
+    ):
+        """Merge new rows into the sorted arrays."""
+        if not names:
+            return
+        with self._lock:
+            all_names = np.concatenate([self._names, np.array(names, dtype=str)])
+            all_lat = np.concatenate([self._lat, np.array(lat, dtype=np.float64)])
+            all_lon = np.concatenate([self._lon, np.array(lon, dtype=np.float64)])
+            all_country = np.concatenate([self._country, np.array(country, dtype=str)])
+            all_admin1 = np.concatenate([self._admin1, np.array(admin1, dtype=str)])
+            all_population = np.concatenate([self._population, np.array(population, dtype=np.int64)])
+            # Sort by name, then by descending population
+            order = np.lexsort((-all_population, all_names))
+            self._names = all_names[order]
+            self._lat = all_lat[order]
+            self._lon = all_lon[order]
+            self._country = all_country[order]
+            self._admin1 = all_admin1[order]
+            self._population = all_population[order]
+
+    def _merge_pending(self):
+        with self._lock:
+            if not self._pending:
+                return
+            names = list(self._pending)
+            rows = [self._pending[name] for name in names]
+            self._pending = {}
+            self._extend(
+                names,
+                [row[0] for row in rows],
+                [row[1] for row in rows],
+                [row[2] for row in rows],
+                [row[3] for row in rows],
+                [row[4] for row in rows]
+            )
+
+    def load(self, path: str, include_alternate_names: bool = False) -> int:
+        """
+        Bulk-load places from a dataset file.
+
+        Args:
+            path: GeoNames tab-separated dump or CSV with a name,lat,lon header
+            include_alternate_names: Also index GeoNames alternate names
+
+        Returns:
+            int: Number of names loaded
+        """
+        names, lat, lon, country, population, admin1 = [], [], [], [], [], []
+
+        def add_row(name, row_lat, row_lon, row_country, row_population, row_admin1):
+            key = normalize_place_name(name)
+            if key:
+                names.append(key)
+                lat.append(float(row_lat))
+                lon.append(float(row_lon))
+                country.append(row_country.upper())
+                population.append(int(row_population or 0))
+                admin1.append((row_admin1 or "").upper())
+
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            if path.endswith(".csv"):
+                for row in csv.DictReader(f):
+                    add_row(
+                        row["name"], row["lat"], row["lon"],
+                        row.get("country_code", ""), row.get("population", 0), row.get("admin1", "")
+                    )
+            else:
+                # GeoNames columns: name (1), asciiname (2), alternatenames (3),
+                # latitude (4), longitude (5), country code (8), admin1 code (10), population (14)
+                for line in f:
+                    fields = line.rstrip("\n").split("\t")
+                    if len(fields) < 15:
+                        continue
+                    aliases = {fields[1], fields[2]}
+                    if include_alternate_names and fields[3]:
+                        aliases.update(fields[3].split(","))
+                    for alias in aliases:
+                        add_row(alias, fields[4], fields[5], fields[8], fields[14], fields[10])
+
+        self._extend(names, lat, lon, country, population, admin1)
+        return len(names)
+
+    def add(self, name: str, lat: float, lon: float, country_code: str = "", population: int = 0):
+        """
+        Add a single place, e.g. a successful Nominatim lookup.
+
+        Args:
+            name: Place name as queried
+            lat: Latitude
+            lon: Longitude
+            country_code: ISO 3166-1 alpha-2 country code, if known
+            population: Population used to rank duplicate names
+        """
+        key = normalize_place_name(name)
+        if not key:
+            return
+        with self._lock:
+            self._pending[key] = (float(lat), float(lon), country_code.upper(), int(population), "")
+            if len(self._pending) >= MERGE_THRESHOLD:
+                self._merge_pending()
+
+    def _row(self, i: int) -> Dict:
+        return {
+            "name": str(self._names[i]),
+            "lat": float(self._lat[i]),
+            "lon": float(self._lon[i]),
+            "country_code": str(self._country[i]),
+        }
+
+    @staticmethod
+    def _qualifier_countries(qualifier: str) -> set:
+        """Country codes a qualifier such as "texas", "france" or "tx" may stand for."""
+        # Imported here: the currency resolver geocodes through this module
+        from utils.currency_resolver import get_currency_resolver
+        matched = get_currency_resolver().match(qualifier)
+        return {qualifier.upper(), matched[1]} if matched else {qualifier.upper()}
+
+    def lookup(self, name: str) -> Optional[Dict]:
+        """
+        Find a place by exact (normalized) name.
+
+        In "City, Qualifier" style queries not known as a whole, the
+        qualifiers narrow the places named "City" to those in a matching
+        country (by name, alias or code) or first-level division (by region
+        name or admin1 code): "paris, texas" is not the French Paris.
+
+        Args:
+            name: Place name
+
+        Returns:
+            Dict: name, lat, lon and country_code, or None if unknown or no
+            place matches the qualifiers
+        """
+        key = normalize_place_name(name)
+        parts = [part.strip() for part in key.split(",")]
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending:
+                return {"name": key, "lat": pending[0], "lon": pending[1], "country_code": pending[2]}
+            i = int(np.searchsorted(self._names, key, side="left"))
+            if i < len(self._names) and self._names[i] == key:
+                return self._row(i)
+            if len(parts) < 2 or not parts[0]:
+                return None
+            self._merge_pending()
+            start = int(np.searchsorted(self._names, parts[0], side="left"))
+            end = int(np.searchsorted(self._names, parts[0], side="right"))
+            if start == end:
+                return None
+            qualifiers = [(part.upper(), self._qualifier_countries(part)) for part in parts[1:] if part]
+            best, best_score = None, -1
+            # Rows are ordered by descending population, so ties go to the most populous;
+            # a qualifier naming the division ("il") beats one that only names its country
+            for row in range(start, end):
+                if not all(self._admin1[row] == code or self._country[row] in countries for code, countries in qualifiers):
+                    continue
+                score = sum(self._admin1[row] == code for code, _ in qualifiers)
+                if score > best_score:
+                    best, best_score = row, score
+            if best is not None:
+                return self._row(best)
+        return None
+
+    def prefix_search(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Find places whose name starts with a prefix, most populous first.
+
+        Args:
+            prefix: Name prefix
+            limit: Maximum number of results
+
+        Returns:
+            List[Dict]: Matching places
+        """
+        key = normalize_place_name(prefix)
+        if not key:
+            return []
+        with self._lock:
+            self._merge_pending()
+            start = int(np.searchsorted(self._names, key, side="left"))
+            end = int(np.searchsorted(self._names, key + "\U0010ffff", side="left"))
+            if start == end:
+                return []
+            top = start + np.argsort(-self._population[start:end], kind="stable")[:limit]
+            return [self._row(int(i)) for i in top]
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+_learned_lock = threading.Lock()
+# Names already in the learned file, read on the first write-back
+_learned_names: Optional[set] = None
+
+def get_gazetteer() -> Gazetteer:
+    """Return the process-wide gazetteer, loading the bundled dataset and learned places once."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                gazetteer = Gazetteer()
+                # Resolved here rather than at import, so a path set in .env applies
+                dataset_path = os.getenv("GAZETTEER_PATH", DEFAULT_GAZETTEER_PATH)
+                for path in (dataset_path, LEARNED_PATH):
+                    if os.path.exists(path):
+                        try:
+                            gazetteer.load(path)
+                        except Exception as e:
+                            print(f"Error loading gazetteer {path}: {str(e)}")
+                _gazetteer = gazetteer
+    return _gazetteer
+
+def remember_place(name: str, lat: float, lon: float, country_code: str = ""):
+    """
+    Add a resolved place to the gazetteer and persist it for future runs.
+
+    Args:
+        name: Place name as queried
+        lat: Latitude
+        lon: Longitude
+        country_code: ISO 3166-1 alpha-2 country code, if known
+    """
+    global _learned_names
+    get_gazetteer().add(name, lat, lon, country_code)
+    key = normalize_place_name(name)
+    try:
+        with _learned_lock:
+            if _learned_names is None:
+                _learned_names = set()
+                if os.path.exists(LEARNED_PATH):
+                    with open(LEARNED_PATH, "r", newline="", encoding="utf-8") as f:
+                        _learned_names = {row["name"] for row in csv.DictReader(f)}
+            # Each place is written once, however many times it is resolved
+            if key in _learned_names:
+                return
+            os.makedirs(os.path.dirname(LEARNED_PATH), exist_ok=True)
+            new_file = not os.path.exists(LEARNED_PATH)
+            with open(LEARNED_PATH, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(["name", "lat", "lon", "country_code", "population"])
+                writer.writerow([key, lat, lon, country_code.upper(), 0])
+            _learned_names.add(key)
+    except Exception as e:
+        print(f"Error saving learned place: {str(e)}")
@@ -0,0 +1,137 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_GEOHASH_INDEX = {c: i for i, c in enumerate(_GEOHASH_BASE32)}
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in metres. Accepts scalars or broadcastable arrays.
+
+    Args:
+        lat1, lon1: First point(s) in degrees
+        lat2, lon2: Second point(s) in degrees
+
+    Returns:
+        Distance(s) in metres
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def distance_matrix(lat, lon) -> np.ndarray:
+    """
+    Pairwise great-circle distances between points.
+
+    Args:
+        lat: Latitudes in degrees
+        lon: Longitudes in degrees
+
+    Returns:
+        np.ndarray: n x n matrix of distances in metres
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    return haversine_m(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """Return the (lat, lon) size in degrees of a geohash cell."""
+    bits = 5 * precision
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    """
+    Encode a point as a geohash.
+
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        precision: Number of characters
+
+    Returns:
+        str: Geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bit = 0
+            value = 0
+    return "".join(chars)
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """
+    Decode a geohash to its bounding box.
+
+    Args:
+        geohash: Geohash string
+
+    Returns:
+        Tuple: (south, west, north, east) in degrees
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+def geohashes_covering(lat: float, lon: float, radius_m: float, precision: int) -> List[str]:
+    """
+    List the geohash cells that intersect the bounding box of a circle.
+
+    Args:
+        lat: Centre latitude in degrees
+        lon: Centre longitude in degrees
+        radius_m: Radius in metres
+        precision: Geohash precision
+
+    Returns:
+        List[str]: Geohashes of the covering cells
+    """
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0 - 1e-9)
+    west, east = lon - dlon, lon + dlon
+    cell_lat, cell_lon = geohash_cell_size(precision)
+
+    rows = range(int((south + 90.0) // cell_lat), int((north + 90.0) // cell_lat) + 1)
+    cols = range(int((west + 180.0) // cell_lon), int((east + 180.0) // cell_lon) + 1)
+    n_cols = int(round(360.0 / cell_lon))
+    hashes = []
+    for row in rows:
+        cell_center_lat = -90.0 + (row + 0.5) * cell_lat
+        for col in cols:
+            # Wrap around the antimeridian
+            cell_center_lon = -180.0 + ((col % n_cols) + 0.5) * cell_lon
+            hashes.append(geohash_encode(cell_center_lat, cell_center_lon, precision))
+    return list(dict.fromkeys(hashes))
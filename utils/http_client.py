@@ -0,0 +1,152 @@
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = "AnywhereTravel/1.0 (+https://github.com/manishghevariya1777/anywhere_travel)"
+
+# Pool sizes shared by every service
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 32
+
+DEFAULT_SERVICE = {
+    "connect_timeout": 3.05,
+    "read_timeout": 10.0,
+    "retries": 2,
+    "backoff_factor": 0.5,
+    "max_concurrency": 8,
+}
+
+# Per-service overrides of DEFAULT_SERVICE
+SERVICE_CONFIG: Dict[str, Dict] = {
+    "openweather": {"read_timeout": 10.0},
+    "exchangerates": {"read_timeout": 10.0},
+    # Nominatim's usage policy allows a single client connection at a time
+    "nominatim": {"read_timeout": 10.0, "max_concurrency": 1},
+    "overpass": {"read_timeout": 30.0, "retries": 1, "backoff_factor": 2.0, "max_concurrency": 2},
+}
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+# (service, host) -> semaphore bounding concurrent requests to that host
+_host_limits: Dict[tuple, threading.BoundedSemaphore] = {}
+
+def get_service_config(service: str) -> Dict:
+    """
+    Get the effective configuration of a service.
+
+    Args:
+        service: Service name (e.g. "openweather", "nominatim")
+
+    Returns:
+        Dict: Timeouts, retry and concurrency settings
+    """
+    config = dict(DEFAULT_SERVICE)
+    config.update(SERVICE_CONFIG.get(service, {}))
+    return config
+
+def configure_service(service: str, **settings):
+    """
+    Override settings for a service. Call before the service is first used.
+
+    Args:
+        service: Service name
+        **settings: Any of connect_timeout, read_timeout, retries, backoff_factor, max_concurrency
+    """
+    unknown = set(settings) - set(DEFAULT_SERVICE)
+    if unknown:
+        raise ValueError(f"Unknown HTTP settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        SERVICE_CONFIG.setdefault(service, {}).update(settings)
+        _sessions.pop(service, None)
+        for key in [key for key in _host_limits if key[0] == service]:
+            del _host_limits[key]
+
+def get_session(service: str) -> requests.Session:
+    """
+    Get the pooled session for a service, creating it on first use.
+
+    Sessions keep connections alive between calls and retry failed requests
+    with exponential backoff.
+
+    Args:
+        service: Service name
+
+    Returns:
+        requests.Session: Shared session
+    """
+    session = _sessions.get(service)
+    if session is not None:
+        return session
+    with _lock:
+        session = _sessions.get(service)
+        if session is None:
+            config = get_service_config(service)
+            retry = Retry(
+                total=config["retries"],
+                backoff_factor=config["backoff_factor"],
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET", "POST"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[service] = session
+    return session
+
+def _host_limit(service: str, url: str) -> threading.BoundedSemaphore:
+    key = (service, urlsplit(url).netloc)
+    with _lock:
+        limit = _host_limits.get(key)
+        if limit is None:
+            limit = threading.BoundedSemaphore(get_service_config(service)["max_concurrency"])
+            _host_limits[key] = limit
+    return limit
+
+def request(service: str, method: str, url: str, timeout: Optional[tuple] = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared client.
+
+    Args:
+        service: Service name used to pick timeouts, retries and concurrency limits
+        method: HTTP method
+        url: Request URL
+        timeout: Optional (connect, read) timeout overriding the service defaults
+        **kwargs: Passed through to requests (params, data, json, headers, ...)
+
+    Returns:
+        requests.Response: The response
+
+    Raises:
+        requests.exceptions.RequestException: On connection errors, timeouts, or
+            when the host's concurrency limit stays saturated for a full read timeout
+    """
+    config = get_service_config(service)
+    if timeout is None:
+        timeout = (config["connect_timeout"], config["read_timeout"])
+    limit = _host_limit(service, url)
+    if not limit.acquire(timeout=config["read_timeout"]):
+        raise requests.exceptions.ConnectionError(f"Too many concurrent requests to {urlsplit(url).netloc}")
+    try:
+        return get_session(service).request(method, url, timeout=timeout, **kwargs)
+    finally:
+        limit.release()
+
+def http_get(service: str, url: str, **kwargs) -> requests.Response:
+    """Send a GET request through the shared client (see request)."""
+    return request(service, "GET", url, **kwargs)
+
+def http_post(service: str, url: str, **kwargs) -> requests.Response:
+    """Send a POST request through the shared client (see request)."""
+    return request(service, "POST", url, **kwargs)
@@ -0,0 +1,186 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.geo import EARTH_RADIUS_M, distance_matrix
+from utils.map_checklist import get_nearby_places, get_place_coordinates
+from utils.tour import nearest_neighbour_path, path_cost, two_opt
+
+# Stops per day for each travel pace
+PACE_STOPS_PER_DAY = {"relaxed": 3, "moderate": 5, "packed": 7}
+DEFAULT_STOPS_PER_DAY = PACE_STOPS_PER_DAY["moderate"]
+
+# Search radius around the destination centre
+ITINERARY_RADIUS_M = 3000
+
+# POI types worth building a day around; only OpenStreetMap tourism and amenity
+# values, the tags the places query returns
+SIGHTSEEING_TYPES = {
+    "attraction", "museum", "gallery", "viewpoint", "artwork", "zoo", "aquarium",
+    "theme_park", "theatre", "arts_centre", "place_of_worship", "marketplace", "planetarium",
+}
+
+KMEANS_ITERATIONS = 25
+
+def _project(lat: np.ndarray, lon: np.ndarray, lat0: float, lon0: float) -> np.ndarray:
+    """Equirectangular projection to metres around a centre point; accurate over a city."""
+    x = np.radians(lon - lon0) * math.cos(math.radians(lat0)) * EARTH_RADIUS_M
+    y = np.radians(lat - lat0) * EARTH_RADIUS_M
+    return np.column_stack([x, y])
+
+def _balanced_assignment(distances: np.ndarray, capacity: int) -> np.ndarray:
+    """Assign points to their nearest centre with room, closest pairs first."""
+    n, k = distances.shape
+    labels = np.full(n, -1, dtype=np.intp)
+    load = np.zeros(k, dtype=np.intp)
+    for flat in np.argsort(distances, axis=None, kind="stable"):
+        point, centre = divmod(int(flat), k)
+        if labels[point] < 0 and load[centre] < capacity:
+            labels[point] = centre
+            load[centre] += 1
+    return labels
+
+def cluster_stops(points: np.ndarray, days: int, capacity: int) -> np.ndarray:
+    """
+    Group points into days with k-means, no day holding more than capacity stops.
+
+    Centres start from a deterministic k-means++ seeding; each iteration
+    assigns points to the nearest centre with room, then moves centres to
+    the mean of their points.
+
+    Args:
+        points: n x 2 projected coordinates in metres
+        days: Number of groups
+        capacity: Maximum points per group
+
+    Returns:
+        np.ndarray: Group label for each point
+    """
+    n = len(points)
+    k = min(days, n)
+    rng = np.random.default_rng(0)
+    centres = [points[0]]
+    for _ in range(1, k):
+        nearest = ((points[:, None, :] - np.array(centres)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        centres.append(points[rng.choice(n, p=nearest / nearest.sum())] if nearest.sum() > 0 else points[len(centres)])
+    centres = np.array(centres)
+
+    labels = None
+    for _ in range(KMEANS_ITERATIONS):
+        distances = np.sqrt(((points[:, None, :] - centres[None, :, :]) ** 2).sum(axis=2))
+        new_labels = _balanced_assignment(distances, capacity)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centres)
+        np.add.at(sums, labels, points)
+        occupied = counts > 0
+        centres[occupied] = sums[occupied] / counts[occupied, None]
+    return labels
+
+def plan_daily_routes(
+    places: List[Dict],
+    centre_lat: float,
+    centre_lon: float,
+    duration: int,
+    pace: str
+) -> List[Dict]:
+    """
+    Split places into daily routes.
+
+    Places are clustered into one group per day, sized by pace, and each
+    day's stops are ordered with nearest neighbour + 2-opt, starting from
+    the destination centre.
+
+    Args:
+        places: Candidate places with name, type, lat and lon, best first
+        centre_lat: Latitude of the destination centre
+        centre_lon: Longitude of the destination centre
+        duration: Number of days
+        pace: Travel pace (Relaxed, Moderate or Packed)
+
+    Returns:
+        List[Dict]: One entry per day with stops, day (1-based) and distance_m
+        (walking distance from the centre through every stop); days without stops
+        are left out, so there may be fewer routes than days
+    """
+    capacity = PACE_STOPS_PER_DAY.get((pace or "").lower(), DEFAULT_STOPS_PER_DAY)
+    places = places[:duration * capacity]
+    if not places or duration < 1:
+        return []
+
+    lat = np.array([place["lat"] for place in places], dtype=np.float64)
+    lon = np.array([place["lon"] for place in places], dtype=np.float64)
+    # With few places, fill fewer days at the chosen pace rather than spreading them thin
+    days = min(duration, math.ceil(len(places) / capacity))
+    labels = cluster_stops(_project(lat, lon, centre_lat, centre_lon), days, capacity)
+
+    routes = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        # Node 0 is the centre, where each day starts
+        day_lat = np.concatenate([[centre_lat], lat[members]])
+        day_lon = np.concatenate([[centre_lon], lon[members]])
+        distances = distance_matrix(day_lat, day_lon)
+        path = two_opt(distances, nearest_neighbour_path(distances, 0), fixed_end=False)
+        routes.append({
+            "stops": [places[members[node - 1]] for node in path[1:]],
+            "distance_m": path_cost(distances, path),
+            "bearing": math.atan2(lat[members].mean() - centre_lat, lon[members].mean() - centre_lon),
+        })
+
+    # Sweep around the centre so consecutive days cover neighbouring areas
+    routes.sort(key=lambda route: route.pop("bearing"))
+    for day, route in enumerate(routes, start=1):
+        route["day"] = day
+    return routes
+
+def find_sightseeing_places(destination: str) -> Optional[Dict]:
+    """
+    Find the named sightseeing places around a destination.
+
+    Args:
+        destination: The travel destination
+
+    Returns:
+        Dict: lat and lon of the destination centre and places (distinct by name,
+        best first), or None if the destination or its places can't be found
+    """
+    coordinates = get_place_coordinates(destination)
+    if not coordinates:
+        return None
+    places = get_nearby_places(coordinates["lat"], coordinates["lon"], radius=ITINERARY_RADIUS_M)
+    if places is None:
+        return None
+
+    candidates = []
+    seen = set()
+    for place in places:
+        name = place.get("name")
+        if place.get("type") not in SIGHTSEEING_TYPES or not name or name == "Unnamed Place":
+            continue
+        if name.casefold() in seen:
+            continue
+        seen.add(name.casefold())
+        candidates.append(place)
+    return {"lat": coordinates["lat"], "lon": coordinates["lon"], "places": candidates}
+
+def format_route_section(routes: Optional[List[Dict]]) -> str:
+    """
+    Format daily routes as a Markdown section for the planning prompt.
+
+    Args:
+        routes: Result of build_itinerary
+
+    Returns:
+        str: Markdown section, empty if there are no routes
+    """
+    if not routes:
+        return ""
+    route_info = "\n\n### Suggested Daily Routes (stops in visiting order, grouped by area)\n"
+    for route in routes:
+        stops = " → ".join(stop["name"] for stop in route["stops"])
+        route_info += f"- Day {route['day']}: {stops} (about {route['distance_m'] / 1000:.1f} km)\n"
+    return route_info
@@ -1,61 +1,92 @@
-import requests
 from typing import Dict, List, Optional
 import os
 from datetime import datetime, timedelta
 
+from utils.http_client import http_get, http_post
+from utils.gazetteer import get_gazetteer, remember_place
+from utils.rate_limit import TokenBucket
+from utils.poi_index import get_poi_index
+
+# Nominatim's usage policy: at most one request per second
+NOMINATIM_RATE_PER_SECOND = 1.0
+# Longest a lookup waits in the Nominatim queue before giving up
+NOMINATIM_QUEUE_TIMEOUT = 10.0
+
+_nominatim_bucket = TokenBucket(rate=NOMINATIM_RATE_PER_SECOND, capacity=1)
+
 def get_place_coordinates(place: str) -> Optional[Dict[str, float]]:
     """
-    Get coordinates (latitude, longitude) for a place using OpenStreetMap Nominatim API.
+    Get coordinates (latitude, longitude) for a place.
+    
+    Places are resolved from the local gazetteer first. Misses are queued for
+    the OpenStreetMap Nominatim API at its permitted rate and the results are
+    written back to the gazetteer.
     
     Args:
         place: Name of the place
         
     Returns:
-        Dict: Dictionary with 'lat' and 'lon' keys or None if error
+        Dict: Dictionary with 'lat', 'lon' and 'country_code' keys or None if error
     """
     try:
+        match = get_gazetteer().lookup(place)
+        if match:
+            return {
+                "lat": match["lat"],
+                "lon": match["lon"],
+                "country_code": match["country_code"]
+            }
+            
+        if not _nominatim_bucket.acquire(timeout=NOMINATIM_QUEUE_TIMEOUT):
+            print(f"Error getting coordinates: Nominatim queue is full, skipped {place}")
+            return None
+            
         base_url = "https://nominatim.openstreetmap.org/search"
         params = {
             "q": place,
             "format": "json",
+            "addressdetails": 1,
             "limit": 1
         }
         
-        response = requests.get(base_url, params=params)
+        response = http_get("nominatim", base_url, params=params)
         if response.status_code == 200:
             data = response.json()
             if data:
-                return {
+                coordinates = {
                     "lat": float(data[0]["lat"]),
-                    "lon": float(data[0]["lon"])
+                    "lon": float(data[0]["lon"]),
+                    "country_code": data[0].get("address", {}).get("country_code", "").upper()
                 }
+                remember_place(place, coordinates["lat"], coordinates["lon"], coordinates["country_code"])
+                return coordinates
     except Exception as e:
         print(f"Error getting coordinates: {str(e)}")
     return None
 
-def get_nearby_places(lat: float, lon: float, radius: int = 1000) -> Optional[List[Dict]]:
+def _fetch_places_in_bbox(south: float, west: float, north: float, east: float) -> Optional[List[Dict]]:
     """
-    Get nearby places of interest using OpenStreetMap Overpass API.
+    Get places of interest inside a bounding box using OpenStreetMap Overpass API.
     
     Args:
-        lat: Latitude
-        lon: Longitude
-        radius: Search radius in meters (default 1000m)
+        south, west, north, east: Bounding box in degrees
         
     Returns:
-        List[Dict]: List of nearby places or None if error
+        List[Dict]: Places with name, type, lat and lon or None if error
     """
     try:
+        bbox = f"{south},{west},{north},{east}"
         query = f"""
         [out:json];
         (
-          node["tourism"](around:{radius},{lat},{lon});
-          node["amenity"](around:{radius},{lat},{lon});
+          node["tourism"]({bbox});
+          node["amenity"]({bbox});
         );
         out body;
         """
         
-        response = requests.post(
+        response = http_post(
+            "overpass",
             "https://overpass-api.de/api/interpreter",
             data=query
         )
@@ -72,6 +103,29 @@ def get_nearby_places(lat: float, lon: float, radius: int = 1000) -> Optional[Li
                         "lon": element["lon"]
                     })
             return places
+        print(f"Error getting nearby places: Overpass returned {response.status_code}")
+    except Exception as e:
+        print(f"Error getting nearby places: {str(e)}")
+    return None
+
+def get_nearby_places(lat: float, lon: float, radius: int = 1000, place_type: Optional[str] = None) -> Optional[List[Dict]]:
+    """
+    Get nearby places of interest, nearest first.
+    
+    Results come from the geohash tile cache; only tiles not seen before are
+    fetched from the OpenStreetMap Overpass API.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        radius: Search radius in meters (default 1000m)
+        place_type: Only return places of this tourism/amenity type (e.g. "museum")
+        
+    Returns:
+        List[Dict]: List of nearby places (with distance in meters) or None if error
+    """
+    try:
+        return get_poi_index().query(lat, lon, radius, _fetch_places_in_bbox, place_type)
     except Exception as e:
         print(f"Error getting nearby places: {str(e)}")
     return None
@@ -1,34 +1,278 @@
 import re
 
+_LINE_EVENTS = re.compile(r"[\[\]\n]")
+_LINK_EVENTS = re.compile(r"[\[\]()]")
+_BRACKETS = re.compile(r"[\[\]]")
+_WHITESPACE = re.compile(r"\s*")
+
+class _TrailingBracketStage:
+    """
+    Drops a "[" that is the last bracket on its line (an incomplete link).
+
+    Holds back from that "[" until the line ends or another bracket shows up.
+    """
+
+    def __init__(self):
+        self._open = False
+        self._held = []
+
+    def feed(self, text: str) -> str:
+        out = []
+        pos = 0
+        for match in _LINE_EVENTS.finditer(text):
+            (self._held if self._open else out).append(text[pos:match.start()])
+            char = match.group()
+            if char == "\n":
+                if self._open:
+                    out.extend(self._held)
+                out.append("\n")
+                self._open = False
+            else:
+                if self._open:
+                    out.append("[")
+                    out.extend(self._held)
+                if char == "[":
+                    self._open = True
+                else:
+                    out.append("]")
+                    self._open = False
+            self._held = []
+            pos = match.end()
+        (self._held if self._open else out).append(text[pos:])
+        return "".join(out)
+
+    def close(self) -> str:
+        text = "".join(self._held)
+        self._open = False
+        self._held = []
+        return text
+
+class _UnclosedLinkStage:
+    """
+    Cuts the document at a link whose URL is never closed: "[text](..." with
+    no ")" anywhere after the "(" becomes "text".
+
+    Holds back from the first such link until a ")" arrives, and from a
+    "[" that may still become one until its "(" does or doesn't follow.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pending = []
+        self._pending_len = 0
+        # A link "[text](" with no ")" since starts the pending text; this is the offset of its "]"
+        self._alive_close = None
+        # Offset of a "[" that may still become such a link, and of its "]" once seen
+        self._build_start = None
+        self._build_close = None
+
+    def _hold(self, text: str):
+        self._pending.append(text)
+        self._pending_len += len(text)
+
+    def _take(self, end: int) -> str:
+        """Remove and return the pending text before offset end."""
+        text = "".join(self._pending)
+        self._pending = [text[end:]]
+        self._pending_len = len(text) - end
+        if self._build_start is not None:
+            self._build_start -= end
+            if self._build_close is not None:
+                self._build_close -= end
+        return text[:end]
+
+    def _holding(self) -> bool:
+        return self._alive_close is not None or self._build_start is not None
+
+    def feed(self, text: str) -> str:
+        out = []
+        pos = 0
+        while pos < len(text):
+            if self._build_close is not None:
+                # After "]": whitespace, then "(" makes it a link, anything else ends the candidate
+                end = _WHITESPACE.match(text, pos).end()
+                self._hold(text[pos:end])
+                pos = end
+                if pos == len(text):
+                    break
+                if text[pos] == "(":
+                    self._hold("(")
+                    pos += 1
+                    if self._alive_close is None:
+                        out.append(self._take(self._build_start))
+                        self._alive_close = self._build_close
+                self._build_start = self._build_close = None
+                if self._alive_close is None:
+                    out.append(self._take(self._pending_len))
+                continue
+
+            match = _LINK_EVENTS.search(text, pos)
+            end = match.start() if match else len(text)
+            if self._holding():
+                self._hold(text[pos:end])
+            else:
+                out.append(text[pos:end])
+            if not match:
+                break
+            char = match.group()
+            pos = match.end()
+            if char == "[":
+                if self._alive_close is None:
+                    out.append(self._take(self._pending_len))
+                self._build_start = self._pending_len
+                self._hold("[")
+            elif char == "]":
+                if self._build_start is not None:
+                    self._build_close = self._pending_len
+                self._hold("]") if self._holding() else out.append("]")
+            elif char == ")" and self._alive_close is not None:
+                self._alive_close = None
+                out.append(self._take(self._build_start if self._build_start is not None else self._pending_len))
+                self._hold(")") if self._holding() else out.append(")")
+            else:
+                self._hold(char) if self._holding() else out.append(char)
+        return "".join(out)
+
+    def close(self) -> str:
+        text = "".join(self._pending)
+        if self._alive_close is not None:
+            text = text[1:self._alive_close]
+        self._reset()
+        return text
+
+class _EmptyLinkStage:
+    """
+    Replaces links with an empty URL, "[text]()", by their text.
+
+    Holds back from a "[" until the link is complete or ruled out.
+    """
+
+    IDLE, TEXT, CLOSED, OPENED = range(4)
+
+    def __init__(self):
+        self._state = self.IDLE
+        self._held = []
+
+    def feed(self, text: str) -> str:
+        out = []
+        pos = 0
+        while pos < len(text):
+            if self._state == self.IDLE:
+                start = text.find("[", pos)
+                if start < 0:
+                    out.append(text[pos:])
+                    break
+                out.append(text[pos:start])
+                self._held = ["["]
+                self._state = self.TEXT
+                pos = start + 1
+            elif self._state == self.TEXT:
+                match = _BRACKETS.search(text, pos)
+                if not match:
+                    self._held.append(text[pos:])
+                    break
+                self._held.append(text[pos:match.start()])
+                pos = match.end()
+                if match.group() == "[":
+                    # Starts over at the new "["
+                    out.extend(self._held)
+                    self._held = ["["]
+                else:
+                    self._held.append("]")
+                    self._state = self.CLOSED
+            else:
+                expected = "(" if self._state == self.CLOSED else ")"
+                if text[pos] != expected:
+                    # Not an empty link; the character is looked at again from IDLE
+                    out.extend(self._held)
+                    self._held = []
+                    self._state = self.IDLE
+                    continue
+                pos += 1
+                if self._state == self.CLOSED:
+                    self._held.append("(")
+                    self._state = self.OPENED
+                else:
+                    out.append("".join(self._held)[1:-2])
+                    self._held = []
+                    self._state = self.IDLE
+        return "".join(out)
+
+    def close(self) -> str:
+        text = "".join(self._held)
+        self._held = []
+        self._state = self.IDLE
+        return text
+
+class MarkdownSanitizer:
+    """
+    Streaming fixer for malformed links in generated Markdown.
+
+    Text is fed in chunks as it arrives. Each call returns the part that is
+    already final, holding back only a link that isn't closed yet, and
+    close() returns the rest. Every character passes through three small
+    state machines once, so cleaning is linear in the length of the text
+    whatever its brackets look like.
+    """
+
+    def __init__(self):
+        self._stages = (_TrailingBracketStage(), _UnclosedLinkStage(), _EmptyLinkStage())
+
+    def feed(self, text: str) -> str:
+        """
+        Add text and return the newly finished cleaned text.
+
+        Args:
+            text: Next chunk of Markdown
+
+        Returns:
+            str: Cleaned text that can be shown now
+        """
+        for stage in self._stages:
+            text = stage.feed(text)
+        return text
+
+    def close(self) -> str:
+        """
+        Finish the document and return the remaining cleaned text.
+
+        Returns:
+            str: Cleaned text that was held back
+        """
+        text = ""
+        for stage in self._stages:
+            text = stage.feed(text) + stage.close()
+        return text
+
 def clean_markdown(text: str) -> str:
     """
     Clean and fix malformed Markdown text.
-    
+
+    Removes incomplete links, links with unfinished URLs and links with
+    empty URLs, keeping their text (see MarkdownSanitizer).
+
     Args:
         text: The Markdown text to clean
-        
+
     Returns:
         str: Cleaned Markdown text
     """
-    # Remove incomplete links
-    text = re.sub(r'\[([^\[\]]*?)(?=\s*$|\n)', r'\1', text)
-    # Remove links with invalid URLs
-    text = re.sub(r'\[([^\[\]]*?)\]\s*(\([^)]*$)', r'\1', text)
-    # Remove any remaining malformed markdown
-    text = re.sub(r'\[([^\[\]]*?)\]\(\)', r'\1', text)
-    return text
+    sanitizer = MarkdownSanitizer()
+    return sanitizer.feed(text) + sanitizer.close()
 
 def sanitize_filename(name: str) -> str:
     """
     Sanitize a string to be used as a filename.
-    
+
     Args:
         name: The string to sanitize
-        
+
     Returns:
         str: Sanitized filename
     """
     import string
     valid_chars = "-_.() %s%s" % (string.ascii_letters, string.digits)
     sanitized = ''.join(c for c in name if c in valid_chars)
-    return sanitized.strip() 
\ No newline at end of file
+    return sanitized.strip()
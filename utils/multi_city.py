@@ -0,0 +1,90 @@
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+from utils.cost_estimation import get_cost_model
+from utils.tour import held_karp_path, nearest_neighbour_path, path_cost, two_opt
+
+# Largest number of stops ordered exactly; longer trips use nearest neighbour + 2-opt
+HELD_KARP_MAX_CITIES = 12
+
+def plan_multi_city(
+    origin: str,
+    cities: List[str],
+    days: Union[int, Sequence[int]],
+    budget_level: str,
+    return_to_origin: bool = True
+) -> Dict:
+    """
+    Find the cheapest order in which to visit several cities.
+
+    Flight legs are priced from the cost model's flight matrix. Hotel and
+    daily expenses don't depend on the order but are included in the totals.
+
+    Args:
+        origin: The starting city
+        cities: Cities to visit (duplicates and the origin itself are ignored)
+        days: Days in each city, either one number for all or one per city (in input order,
+            including any duplicates)
+        budget_level: Budget level
+        return_to_origin: Whether the trip ends with a flight back to the origin
+
+    Returns:
+        Dict: order (city names), legs (from, to, flight_cost), stays (city, days,
+        hotel_cost, daily_expenses), flight_cost, hotel_cost, daily_expenses,
+        total_cost (all USD) and method ("exact" or "heuristic")
+
+    Raises:
+        ValueError: If days is a sequence whose length differs from cities
+    """
+    days_by_city = days if isinstance(days, (list, tuple, np.ndarray)) else [days] * len(cities)
+    if len(days_by_city) != len(cities):
+        raise ValueError(f"Expected {len(cities)} day counts, one per city, got {len(days_by_city)}")
+    stops, stop_days = [], []
+    seen = {" ".join(origin.split()).casefold()}
+    for city, city_days in zip(cities, days_by_city):
+        key = " ".join(city.split()).casefold()
+        if key and key not in seen:
+            seen.add(key)
+            stops.append(city.strip())
+            stop_days.append(int(city_days))
+
+    model = get_cost_model()
+    nodes = model.city_indices([origin] + stops)
+    flight = model.flight[np.ix_(nodes, nodes)]
+    end = 0 if return_to_origin else None
+    if len(stops) <= HELD_KARP_MAX_CITIES:
+        path = held_karp_path(flight, 0, end)
+        method = "exact"
+    else:
+        path = two_opt(flight, nearest_neighbour_path(flight, 0, end), fixed_end=return_to_origin)
+        method = "heuristic"
+
+    names = [origin.strip()] + stops
+    stop_days = np.array(stop_days, dtype=np.float64)
+    level = model.level_indices(budget_level)[0]
+    hotel = model.hotel[nodes[1:], level] * stop_days
+    daily = model.daily[nodes[1:], level] * stop_days
+    visit_order = [int(node) for node in path if node != 0]
+    flight_cost = path_cost(flight, path)
+    return {
+        "order": [names[node] for node in visit_order],
+        "legs": [
+            {"from": names[a], "to": names[b], "flight_cost": float(flight[a, b])}
+            for a, b in zip(path[:-1], path[1:])
+        ],
+        "stays": [
+            {
+                "city": names[node],
+                "days": int(stop_days[node - 1]),
+                "hotel_cost": float(hotel[node - 1]),
+                "daily_expenses": float(daily[node - 1])
+            }
+            for node in visit_order
+        ],
+        "flight_cost": flight_cost,
+        "hotel_cost": float(hotel.sum()),
+        "daily_expenses": float(daily.sum()),
+        "total_cost": flight_cost + float(hotel.sum() + daily.sum()),
+        "method": method
+    }
@@ -0,0 +1,272 @@
+import queue
+import re
+import threading
+from collections import Counter
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from agents.planning_agent import check_plan, PlanError
+from agents.section_planner import add_drafts, build_section_inputs, section_chunks
+from agents.search_agent import SEARCH_ERROR_MESSAGE, search_destination_info
+from utils.weather_currency import get_weather_forecast, get_currency_symbol, next_forecast_refresh
+from utils.currency_resolver import resolve_currency_code
+from utils.markdown_utils import clean_markdown
+from utils.plan_cache import get_plan_cache, make_plan_key
+from utils.plan_similarity import get_similar_plans
+from utils.itinerary import find_sightseeing_places, plan_daily_routes
+from utils.exchange_rates import convert_amounts
+from utils.cost_estimation import estimate_total_cost
+from utils.stage_graph import Stage, StageGraph, with_script_context
+
+# Destination pipelines running at once across all sessions in comparison mode
+MAX_CONCURRENT_PIPELINES = 6
+_pipeline_slots = threading.BoundedSemaphore(MAX_CONCURRENT_PIPELINES)
+
+def convert_cost_estimation(cost_estimation: Dict[str, float], currency_code: str) -> Optional[Dict[str, float]]:
+    """
+    Convert a USD cost estimation to the local currency with a single rate lookup.
+
+    Args:
+        cost_estimation: Result of estimate_total_cost (amounts in USD)
+        currency_code: Local currency code
+
+    Returns:
+        Dict[str, float]: Local amounts, the USD amounts for USD, or None if the rate is unavailable
+    """
+    if currency_code == 'USD':
+        return dict(cost_estimation)
+    converted = convert_amounts(cost_estimation, 'USD', currency_code)
+    if converted is None:
+        st.warning(f"Currency conversion not available for USD to {currency_code}")
+    return converted
+
+def _search_stage(destination: str) -> Optional[str]:
+    search_data = search_destination_info(destination)
+    # Failed searches come back as messages; None keeps them out of the memo so the next request retries
+    if search_data.startswith("Error") or search_data == SEARCH_ERROR_MESSAGE:
+        return None
+    return search_data
+
+def _weather_stage(forecast: Optional[Dict], duration: int) -> Optional[Dict]:
+    if not forecast:
+        return None
+    return dict(forecast, forecast=forecast["forecast"][:duration])
+
+def _cost_stage(cost_estimate: Dict[str, float], currency_code: str) -> Dict[str, Any]:
+    return {"estimate": cost_estimate, "local": convert_cost_estimation(cost_estimate, currency_code)}
+
+def _route_stage(places: Optional[Dict], duration: int, pace: Optional[str]) -> Optional[List[Dict]]:
+    if not places:
+        return None
+    return plan_daily_routes(places["places"], places["lat"], places["lon"], duration, pace)
+
+# The trip data stages and the request fields each one depends on. Weather
+# and places depend on the destination alone; costs don't depend on interests
+# or pace; changing the pace only re-plans the daily routes.
+TRIP_STAGES = StageGraph([
+    Stage("search", _search_stage, inputs=("destination",), ttl_seconds=24 * 3600),
+    # Forecasts expire at the provider's next refresh, like the cached responses they come from
+    Stage(
+        "forecast", lambda destination: get_weather_forecast(destination),
+        inputs=("destination",), expires_at=next_forecast_refresh
+    ),
+    Stage("weather", _weather_stage, inputs=("duration",), after=("forecast",), expires_at=next_forecast_refresh),
+    Stage(
+        "cost_estimate",
+        lambda origin, destination, duration, budget, start_date: estimate_total_cost(
+            origin, destination, duration, budget, start_date
+        ),
+        inputs=("origin", "destination", "duration", "budget", "start_date"),
+        ttl_seconds=24 * 3600
+    ),
+    Stage("cost", _cost_stage, inputs=("currency_code",), after=("cost_estimate",)),
+    Stage("places", find_sightseeing_places, inputs=("destination",), ttl_seconds=24 * 3600),
+    Stage("route", _route_stage, inputs=("duration", "pace"), after=("places",)),
+])
+
+def gather_trip_data(
+    origin: str,
+    destination: str,
+    duration: int,
+    budget: str,
+    currency_code: str,
+    start_date: Optional[date] = None,
+    pace: Optional[str] = None,
+    memo: Optional[MutableMapping] = None
+) -> Dict[str, Any]:
+    """
+    Run the search, weather, cost and route lookups for a trip concurrently.
+
+    Only stages whose inputs changed since they last ran are run again
+    (see TRIP_STAGES); the rest are reused from the session's memo or
+    from another session's identical request.
+
+    Args:
+        origin: The starting city
+        destination: The travel destination
+        duration: Number of days for the trip
+        budget: Budget level
+        currency_code: Local currency code
+        start_date: First day of the trip, for seasonal cost estimates
+        pace: Travel pace, which sets the number of stops in each daily route
+        memo: Per-session memo kept between requests (e.g. in Streamlit session state)
+
+    Returns:
+        Dict[str, Any]: search (str), weather (forecast dict), cost
+        ({"estimate": USD breakdown, "local": local breakdown or None})
+        and route (daily routes), None where a stage failed
+    """
+    return TRIP_STAGES.run({
+        "origin": origin,
+        "destination": destination,
+        "duration": duration,
+        "budget": budget,
+        "currency_code": currency_code,
+        "start_date": start_date,
+        "pace": pace,
+    }, memo)
+
+def summarize_trip_data(results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce gathered trip data to the figures shown in a comparison table.
+
+    Args:
+        results: Result of gather_trip_data
+
+    Returns:
+        Dict[str, Any]: cost (USD breakdown or None), avg_temp and conditions
+        (None without a forecast) and highlights (search result titles)
+    """
+    forecast = (results.get("weather") or {}).get("forecast") or []
+    search = results.get("search") or ""
+    return {
+        "cost": (results.get("cost") or {}).get("estimate"),
+        "avg_temp": round(sum(day["temp"] for day in forecast) / len(forecast), 1) if forecast else None,
+        "conditions": Counter(day["description"] for day in forecast).most_common(1)[0][0] if forecast else None,
+        "highlights": re.findall(r"^### (.+)$", search, flags=re.MULTILINE)[:3],
+    }
+
+def _compare_destination(
+    origin: str,
+    destination: str,
+    duration: int,
+    preferences: Dict,
+    start_date: Optional[date],
+    events: "queue.Queue[Tuple[str, str, Any]]"
+):
+    """Run one destination's full pipeline, reporting progress as events."""
+    with _pipeline_slots:
+        try:
+            currency_code = resolve_currency_code(destination, geocode=False)
+            currency_symbol = get_currency_symbol(currency_code)
+            trip_preferences = dict(preferences, currency=currency_symbol)
+            cache_key = make_plan_key(destination, duration, trip_preferences, origin, start_date)
+
+            results = gather_trip_data(
+                origin, destination, duration, trip_preferences["budget"],
+                currency_code, start_date, trip_preferences.get("pace")
+            )
+            summary = summarize_trip_data(results)
+            summary.update(currency_code=currency_code, currency_symbol=currency_symbol)
+            events.put(("summary", destination, summary))
+
+            plan_cache = get_plan_cache()
+            cached_plan = plan_cache.get(cache_key)
+            if cached_plan:
+                events.put(("done", destination, cached_plan))
+                return
+            similar = get_similar_plans().find(destination, duration, trip_preferences, origin, start_date)
+            if similar and similar["mode"] == "serve":
+                events.put(("done", destination, similar["note"] + similar["plan"]))
+                return
+
+            # Plans are written section by section, as in single-destination mode, so a
+            # cached comparison plan can have its sections regenerated later
+            trip_preferences["currency_code"] = currency_code
+            section_inputs = add_drafts(
+                build_section_inputs(destination, duration, trip_preferences, results, start_date), similar
+            )
+            sections = {}
+            plan = ""
+            for chunk in section_chunks(destination, duration, section_inputs, sections):
+                if isinstance(chunk, PlanError):
+                    events.put(("done", destination, chunk))
+                    return
+                plan += chunk
+                events.put(("chunk", destination, chunk))
+
+            plan_error = check_plan(plan)
+            if plan_error:
+                events.put(("done", destination, PlanError(plan_error)))
+                return
+            cleaned_plan = clean_markdown(plan)
+            # Plans with a failed section are not cached, so the next request retries it
+            if all(sections.values()):
+                plan_cache.put(cache_key, cleaned_plan, {
+                    "origin": origin,
+                    "destination": destination,
+                    "duration": duration,
+                    "start_date": None if start_date is None else str(start_date),
+                    "preferences": trip_preferences,
+                    "sections": sections,
+                    "section_inputs": section_inputs
+                })
+            events.put(("done", destination, cleaned_plan))
+        except Exception as e:
+            print(f"Error comparing {destination}: {str(e)}")
+            events.put(("done", destination, PlanError(f"Error: Unable to plan {destination}.")))
+
+def stream_comparison(
+    origin: str,
+    destinations: List[str],
+    duration: int,
+    preferences: Dict,
+    start_date: Optional[date] = None
+) -> Iterator[Tuple[str, str, Any]]:
+    """
+    Plan several destinations at once, yielding progress as it happens.
+
+    Each destination runs its full pipeline (search, weather, cost and routes,
+    then section generation) on its own thread, so the comparison takes about as
+    long as the slowest destination. Pipelines share a process-wide limit of
+    MAX_CONCURRENT_PIPELINES. They run in a dedicated executor: each fans its
+    stages out to a pool of its own, so no pipeline ever waits on a thread
+    held by another.
+
+    Args:
+        origin: The starting city
+        destinations: Destinations to compare
+        duration: Number of days for the trip
+        preferences: User preferences dictionary (interests, budget, pace)
+        start_date: First day of the trip, for seasonal cost estimates
+
+    Yields:
+        Tuple: (event, destination, payload), where event is "summary" (payload from
+        summarize_trip_data plus currency_code and currency_symbol), "chunk" (plan text)
+        or "done" (the cleaned plan, or a PlanError). Every destination ends with "done".
+    """
+    if not destinations:
+        return
+    events: "queue.Queue[Tuple[str, str, Any]]" = queue.Queue()
+    ctx = get_script_run_ctx()
+    executor = ThreadPoolExecutor(max_workers=len(destinations), thread_name_prefix="compare")
+    try:
+        for destination in destinations:
+            executor.submit(with_script_context(
+                lambda destination=destination: _compare_destination(
+                    origin, destination, duration, preferences, start_date, events
+                ),
+                ctx
+            ))
+        remaining = len(destinations)
+        while remaining:
+            event = events.get()
+            if event[0] == "done":
+                remaining -= 1
+            yield event
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Union
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "plans")
+SECTION_CACHE_DIR = os.path.join(".cache", "plan_sections")
+DEFAULT_MEMORY_ENTRIES = 128
+DEFAULT_MAX_DISK_BYTES = 50 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+def _normalize_text(value: str) -> str:
+    return " ".join(str(value).split()).casefold()
+
+def normalize_plan_request(
+    destination: str,
+    duration: int,
+    preferences: Dict,
+    origin: str = "",
+    start_date: Optional[Union[date, str]] = None
+) -> Dict:
+    """
+    Normalize the fields of a plan request that determine its result.
+
+    Args:
+        destination: The travel destination
+        duration: Number of days for the trip
+        preferences: User preferences dictionary (interests, budget, pace)
+        origin: The starting city, if it affects the plan
+        start_date: First day of the trip, whose month sets the season and its prices
+
+    Returns:
+        Dict: Normalized request, with start_month as "YYYY-MM" (empty if no start date is given)
+    """
+    interests = preferences.get("interests") or []
+    return {
+        "origin": _normalize_text(origin),
+        "destination": _normalize_text(destination),
+        "duration": int(duration),
+        "start_month": "" if start_date is None else str(start_date)[:7],
+        "budget": _normalize_text(preferences.get("budget", "")),
+        "pace": _normalize_text(preferences.get("pace", "")),
+        "interests": sorted({_normalize_text(interest) for interest in interests}),
+    }
+
+def make_plan_key(
+    destination: str,
+    duration: int,
+    preferences: Dict,
+    origin: str = "",
+    start_date: Optional[Union[date, str]] = None
+) -> str:
+    """
+    Build a cache key for a plan request.
+
+    Requests that differ only in letter case, whitespace or interest order
+    share the same key. The start month is part of the key, since the
+    season sets the prices the plan quotes; keying on the exact date would
+    make the same request miss every day as the default start date moves.
+
+    Args:
+        destination: The travel destination
+        duration: Number of days for the trip
+        preferences: User preferences dictionary (interests, budget, pace)
+        origin: The starting city, if it affects the plan
+        start_date: First day of the trip
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    request = normalize_plan_request(destination, duration, preferences, origin, start_date)
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _normalize_inputs(value):
+    if isinstance(value, str):
+        return _normalize_text(value)
+    if isinstance(value, dict):
+        return {key: _normalize_inputs(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_inputs(item) for item in value]
+    return value
+
+def make_section_key(section: str, inputs: Dict, version: int = 1) -> str:
+    """
+    Build a cache key for one section of a plan.
+
+    The key covers only the inputs the section is written from, so a
+    section is reused whenever those are unchanged, whatever else about
+    the request changed.
+
+    Args:
+        section: Section name
+        inputs: Values the section's prompt is built from
+        version: Prompt version, bumped to retire sections written by older prompts
+
+    Returns:
+        str: Hex digest identifying the section
+    """
+    payload = json.dumps(
+        {"section": section, "version": version, "inputs": _normalize_inputs(inputs)},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class PlanCache:
+    """
+    Two-tier cache of generated plans.
+
+    A small in-memory LRU sits over a directory of JSON files. Disk entries
+    expire after a TTL and the oldest ones are evicted once the directory
+    grows past its size limit.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS
+    ):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        # key -> (size, mtime) of each file on disk
+        self._disk_index: Dict[str, tuple] = {}
+        self._scan_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _scan_disk(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    self._disk_index[entry.name[:-5]] = (stat.st_size, stat.st_mtime)
+        except Exception as e:
+            print(f"Error scanning plan cache: {str(e)}")
+
+    def _expired(self, entry: Dict) -> bool:
+        return time.time() - entry.get("created_at", 0) > self.ttl_seconds
+
+    def _remember(self, key: str, entry: Dict):
+        """Insert an entry into the memory tier, evicting the least recently used."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading plan cache entry: {str(e)}")
+            return None
+
+    def _remove_disk(self, key: str):
+        self._disk_index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error removing plan cache entry: {str(e)}")
+
+    def _evict_disk(self):
+        """Remove the oldest files until the directory fits within max_disk_bytes."""
+        total = sum(size for size, _ in self._disk_index.values())
+        if total <= self.max_disk_bytes:
+            return
+        for key, (size, _) in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_disk_bytes:
+                break
+            self._remove_disk(key)
+            total -= size
+
+    def get_entry(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached entry.
+
+        Args:
+            key: Key from make_plan_key
+
+        Returns:
+            Dict: Entry with 'plan', 'created_at' and 'meta' or None on a miss
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry
+                del self._memory[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None or self._expired(entry):
+                if entry is not None:
+                    self._remove_disk(key)
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, entry)
+            return entry
+
+    def peek_entry(self, key: str) -> Optional[Dict]:
+        """
+        Read a cached entry without affecting LRU order or hit statistics.
+
+        Args:
+            key: Key from make_plan_key
+
+        Returns:
+            Dict: Entry with 'plan', 'created_at' and 'meta' or None if missing or expired
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+        if entry is None or self._expired(entry):
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached plan.
+
+        Args:
+            key: Key from make_plan_key
+
+        Returns:
+            str: Cached plan or None on a miss
+        """
+        entry = self.get_entry(key)
+        return entry["plan"] if entry else None
+
+    def put(self, key: str, plan: str, meta: Optional[Dict] = None):
+        """
+        Store a plan in both tiers.
+
+        Args:
+            key: Key from make_plan_key
+            plan: Generated plan
+            meta: Optional request details stored alongside the plan
+        """
+        entry = {"created_at": time.time(), "plan": plan, "meta": meta or {}}
+        with self._lock:
+            self._remember(key, entry)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            stat = os.stat(path)
+            with self._lock:
+                self._disk_index[key] = (stat.st_size, stat.st_mtime)
+                self._evict_disk()
+        except Exception as e:
+            print(f"Error writing plan cache entry: {str(e)}")
+
+    def invalidate(self, key: str):
+        """Remove a plan from both tiers."""
+        with self._lock:
+            self._memory.pop(key, None)
+            self._remove_disk(key)
+
+    def keys(self) -> List[str]:
+        """Return the keys currently stored on disk."""
+        with self._lock:
+            return list(self._disk_index)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return hit/miss statistics.
+
+        Returns:
+            Dict[str, float]: Memory hits, disk hits, misses, hit rate and entry counts
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = len(self._disk_index)
+            stats["disk_bytes"] = sum(size for size, _ in self._disk_index.values())
+        return stats
+
+_plan_cache: Optional[PlanCache] = None
+_plan_cache_lock = threading.Lock()
+
+def get_plan_cache() -> PlanCache:
+    """Return the process-wide plan cache shared by all sessions."""
+    global _plan_cache
+    if _plan_cache is None:
+        with _plan_cache_lock:
+            if _plan_cache is None:
+                _plan_cache = PlanCache()
+    return _plan_cache
+
+_section_cache: Optional[PlanCache] = None
+
+def get_section_cache() -> PlanCache:
+    """Return the process-wide cache of individual plan sections."""
+    global _section_cache
+    if _section_cache is None:
+        with _plan_cache_lock:
+            if _section_cache is None:
+                _section_cache = PlanCache(cache_dir=SECTION_CACHE_DIR)
+    return _section_cache
@@ -0,0 +1,357 @@
+import math
+import threading
+import zlib
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.currency_resolver import get_currency_resolver
+from utils.plan_cache import PlanCache, get_plan_cache, normalize_plan_request
+
+# Width of the hashed request vectors
+FEATURE_DIM = 512
+# Cosine similarity at which a cached plan is served as is (with a note) or used as a draft
+SERVE_THRESHOLD = 0.9
+DRAFT_THRESHOLD = 0.75
+# Plans served as is are at most this many days longer or shorter than requested
+SERVE_MAX_DAY_DIFFERENCE = 1
+# Fields a plan served as is must share with the request; a plan that differs
+# in any of them is only used as a draft
+SERVE_SAME_FIELDS = ("origin", "budget", "pace")
+# Share of interests (intersection over union) a plan served as is must have in common with the request
+SERVE_MIN_INTEREST_OVERLAP = 0.5
+
+# Past this many plans, search only the IVF_PROBES partitions nearest the query
+IVF_MIN_ENTRIES = 4096
+IVF_PROBES = 4
+IVF_ITERATIONS = 10
+
+# Weight of each request field in the vector
+FIELD_WEIGHTS = {
+    "place": 4.0,
+    "place_word": 0.5,
+    "budget": 2.0,
+    "interest": 1.5,
+    "days": 1.2,
+    "pace": 1.0,
+    "origin": 0.5,
+    "month": 1.0,
+}
+# Nearby trip lengths share part of their weight
+DAY_NEIGHBOUR_WEIGHTS = {1: 0.6, 2: 0.3}
+
+def primary_place(destination: str) -> str:
+    """The place name without trailing qualifiers: "tokyo, japan" -> "tokyo"."""
+    return destination.split(",")[0].strip()
+
+def start_month(request: Dict) -> str:
+    """The "YYYY-MM" a normalized request starts in, empty if it has no start date."""
+    return request.get("start_month", "")
+
+def interest_overlap(request: Dict, matched: Dict) -> float:
+    """Intersection over union of two normalized requests' interests (1.0 if neither has any)."""
+    wanted, covered = set(request["interests"]), set(matched["interests"])
+    if not wanted and not covered:
+        return 1.0
+    return len(wanted & covered) / len(wanted | covered)
+
+def same_place(request: Dict, matched: Dict) -> bool:
+    """
+    Whether two normalized requests are for the same place.
+
+    Either the destinations are identical, or they share a place name and
+    resolve to the same country ("tokyo" and "tokyo, japan", but not
+    "paris" and "paris, texas").
+    """
+    if request["destination"] == matched["destination"]:
+        return True
+    if primary_place(request["destination"]) != primary_place(matched["destination"]):
+        return False
+    resolver = get_currency_resolver()
+    country = resolver.match(request["destination"])
+    return country is not None and country == resolver.match(matched["destination"])
+
+def request_features(request: Dict) -> Dict[str, float]:
+    """
+    Weighted features of a normalized plan request.
+
+    Args:
+        request: Result of utils.plan_cache.normalize_plan_request
+
+    Returns:
+        Dict[str, float]: Feature name to weight
+    """
+    features: Dict[str, float] = {}
+    features[f"place:{primary_place(request['destination'])}"] = FIELD_WEIGHTS["place"]
+    for word in request["destination"].replace(",", " ").split():
+        features[f"place_word:{word}"] = FIELD_WEIGHTS["place_word"]
+    features[f"budget:{request['budget']}"] = FIELD_WEIGHTS["budget"]
+    features[f"pace:{request['pace']}"] = FIELD_WEIGHTS["pace"]
+    if request["origin"]:
+        features[f"origin:{request['origin']}"] = FIELD_WEIGHTS["origin"]
+    interests = request["interests"]
+    for interest in interests:
+        # The interests together weigh as much as one field, however many there are
+        features[f"interest:{interest}"] = FIELD_WEIGHTS["interest"] * math.sqrt(2.0 / len(interests))
+    if start_month(request):
+        features[f"month:{start_month(request)[5:]}"] = FIELD_WEIGHTS["month"]
+    duration = request["duration"]
+    features[f"days:{duration}"] = FIELD_WEIGHTS["days"]
+    for offset, share in DAY_NEIGHBOUR_WEIGHTS.items():
+        for days in (duration - offset, duration + offset):
+            features[f"days:{days}"] = FIELD_WEIGHTS["days"] * share
+    return features
+
+def embed_request(request: Dict, dim: int = FEATURE_DIM) -> np.ndarray:
+    """
+    Embed a normalized plan request with signed feature hashing.
+
+    Args:
+        request: Result of utils.plan_cache.normalize_plan_request
+        dim: Vector width
+
+    Returns:
+        np.ndarray: Unit-length float32 vector
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in request_features(request).items():
+        digest = zlib.crc32(feature.encode("utf-8"))
+        vector[digest % dim] += weight if digest & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def adaptation_note(request: Dict, matched: Dict) -> str:
+    """
+    Describe how a cached plan differs from the request it is served for.
+
+    Args:
+        request: Normalized request being answered
+        matched: Normalized request the cached plan was written for
+
+    Returns:
+        str: Markdown note to show above the plan
+    """
+    changes = []
+    if matched["duration"] != request["duration"]:
+        action = "skip the last day" if matched["duration"] > request["duration"] else "add a free day of your own"
+        changes.append(f"it covers {matched['duration']} days rather than {request['duration']}, so {action}")
+    missing = [interest for interest in request["interests"] if interest not in matched["interests"]]
+    extra = [interest for interest in matched["interests"] if interest not in request["interests"]]
+    if missing:
+        changes.append(f"it doesn't focus on {', '.join(missing)}")
+    if extra:
+        changes.append(f"it also covers {', '.join(extra)}")
+    if matched["pace"] != request["pace"]:
+        changes.append(f"it is paced as {matched['pace']} rather than {request['pace']}")
+    if matched["origin"] and matched["origin"] != request["origin"]:
+        changes.append(f"flight costs were estimated from {matched['origin'].title()}")
+    if start_month(matched) and start_month(matched) != start_month(request):
+        changes.append(f"costs were estimated for a trip starting in {start_month(matched)}")
+    if matched["destination"] != request["destination"]:
+        changes.append(f"it was written for \"{matched['destination'].title()}\"")
+    detail = "; ".join(changes) if changes else "it matches your request"
+    return f"> ℹ️ This plan was adapted from a saved plan for a very similar trip: {detail}.\n\n"
+
+class SimilarPlanIndex:
+    """
+    Nearest-neighbour index of cached plan requests.
+
+    Requests are embedded with a hashed-feature vectorizer and kept as rows
+    of a NumPy matrix, searched by brute-force cosine similarity. Once the
+    index holds IVF_MIN_ENTRIES rows, rows are partitioned with spherical
+    k-means and a search only scores the partitions nearest the query.
+    The index follows the plan cache: new cache entries are added and
+    evicted ones dropped on the next lookup.
+    """
+
+    def __init__(self, plan_cache: Optional[PlanCache] = None, dim: int = FEATURE_DIM, ivf_min_entries: int = IVF_MIN_ENTRIES):
+        self.plan_cache = plan_cache or get_plan_cache()
+        self.dim = dim
+        self.ivf_min_entries = ivf_min_entries
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._keys: List[str] = []
+        self._requests: List[Dict] = []
+        self._rows: Dict[str, int] = {}
+        # Keys whose entries can't be indexed (no request details), so they aren't read again
+        self._skipped = set()
+        self._centroids: Optional[np.ndarray] = None
+        self._partitions = np.zeros(0, dtype=np.intp)
+        self._trained_size = 0
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "served": 0, "drafts": 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._keys)
+
+    def _append(self, key: str, request: Dict):
+        vector = embed_request(request, self.dim)
+        if len(self._keys) == len(self._vectors):
+            grown = np.zeros((max(64, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+            grown[:len(self._keys)] = self._vectors[:len(self._keys)]
+            self._vectors = grown
+        self._rows[key] = len(self._keys)
+        self._vectors[len(self._keys)] = vector
+        self._keys.append(key)
+        self._requests.append(request)
+        if self._centroids is not None:
+            self._partitions = np.append(self._partitions, int(np.argmax(self._centroids @ vector)))
+
+    def _remove(self, removed: set):
+        keep = [row for row, key in enumerate(self._keys) if key not in removed]
+        self._vectors = self._vectors[keep].copy()
+        self._keys = [self._keys[row] for row in keep]
+        self._requests = [self._requests[row] for row in keep]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        if self._centroids is not None:
+            self._partitions = self._partitions[keep]
+
+    def _sync(self):
+        """Index new plan cache entries and drop evicted ones."""
+        cached = set(self.plan_cache.keys())
+        removed = (set(self._rows) - cached) | (self._skipped - cached)
+        if removed:
+            self._skipped -= removed
+            self._remove(removed)
+        for key in cached - set(self._rows) - self._skipped:
+            entry = self.plan_cache.peek_entry(key)
+            meta = (entry or {}).get("meta") or {}
+            if not meta.get("destination") or not isinstance(meta.get("preferences"), dict):
+                self._skipped.add(key)
+                continue
+            self._append(key, normalize_plan_request(
+                meta["destination"], meta.get("duration", 0), meta["preferences"],
+                meta.get("origin", ""), meta.get("start_date")
+            ))
+        size = len(self._keys)
+        if size >= self.ivf_min_entries and size >= 2 * self._trained_size:
+            self._train_partitions()
+        elif size < self.ivf_min_entries:
+            self._centroids = None
+
+    def _train_partitions(self):
+        """Spherical k-means over the stored vectors, about sqrt(n) partitions."""
+        vectors = self._vectors[:len(self._keys)]
+        count = int(math.sqrt(len(vectors)))
+        rng = np.random.default_rng(0)
+        centroids = vectors[rng.choice(len(vectors), count, replace=False)].copy()
+        for _ in range(IVF_ITERATIONS):
+            partitions = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, partitions, vectors)
+            norms = np.linalg.norm(sums, axis=1)
+            occupied = norms > 0
+            centroids[occupied] = sums[occupied] / norms[occupied, None]
+        self._centroids = centroids
+        self._partitions = np.argmax(vectors @ centroids.T, axis=1)
+        self._trained_size = len(vectors)
+
+    def search(self, request: Dict, limit: int = 5) -> List[Tuple[float, str, Dict]]:
+        """
+        Find the cached requests most similar to a request.
+
+        Args:
+            request: Result of utils.plan_cache.normalize_plan_request
+            limit: Maximum number of matches
+
+        Returns:
+            List[Tuple[float, str, Dict]]: (cosine similarity, plan cache key, normalized request),
+            most similar first
+        """
+        query = embed_request(request, self.dim)
+        with self._lock:
+            self._sync()
+            vectors = self._vectors[:len(self._keys)]
+            if not len(vectors):
+                return []
+            if self._centroids is not None:
+                probes = np.argsort(-(self._centroids @ query))[:IVF_PROBES]
+                rows = np.flatnonzero(np.isin(self._partitions, probes))
+            else:
+                rows = np.arange(len(vectors))
+            scores = vectors[rows] @ query
+            best = np.argsort(-scores, kind="stable")[:limit]
+            return [(float(scores[i]), self._keys[rows[i]], self._requests[rows[i]]) for i in best]
+
+    def find(
+        self,
+        destination: str,
+        duration: int,
+        preferences: Dict,
+        origin: str = "",
+        start_date: Optional[Union[date, str]] = None
+    ) -> Optional[Dict]:
+        """
+        Look for a cached plan close enough to reuse for a request.
+
+        Matches must be for the same place (see same_place) and budget
+        level. A match can be served as is, with its note, only if it is at
+        SERVE_THRESHOLD or above, shares the SERVE_SAME_FIELDS, the start
+        month and at least SERVE_MIN_INTEREST_OVERLAP of its interests, and is
+        within SERVE_MAX_DAY_DIFFERENCE days; any other match at
+        DRAFT_THRESHOLD or above is only good as a draft to adapt.
+
+        Args:
+            destination: The travel destination
+            duration: Number of days for the trip
+            preferences: User preferences dictionary (interests, budget, pace)
+            origin: The starting city
+            start_date: First day of the trip
+
+        Returns:
+            Dict: key, plan, request (the normalized request the plan was written for),
+            sections and section_inputs (None for plans not written by section),
+            similarity, mode ("serve" or "draft") and note, or None if nothing is close enough
+        """
+        request = normalize_plan_request(destination, duration, preferences, origin, start_date)
+        with self._lock:
+            self._stats["lookups"] += 1
+        for similarity, key, matched in self.search(request):
+            if similarity < DRAFT_THRESHOLD:
+                break
+            if matched["budget"] != request["budget"] or not same_place(request, matched):
+                continue
+            entry = self.plan_cache.peek_entry(key)
+            if not entry:
+                continue
+            serve = (
+                similarity >= SERVE_THRESHOLD
+                and all(matched[field] == request[field] for field in SERVE_SAME_FIELDS)
+                and interest_overlap(request, matched) >= SERVE_MIN_INTEREST_OVERLAP
+                and start_month(matched) == start_month(request)
+                and abs(matched["duration"] - request["duration"]) <= SERVE_MAX_DAY_DIFFERENCE
+            )
+            with self._lock:
+                self._stats["served" if serve else "drafts"] += 1
+            return {
+                "key": key,
+                "plan": entry["plan"],
+                "request": matched,
+                "sections": entry["meta"].get("sections"),
+                "section_inputs": entry["meta"].get("section_inputs"),
+                "similarity": similarity,
+                "mode": "serve" if serve else "draft",
+                "note": adaptation_note(request, matched),
+            }
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        """Return lookups, served, drafts, serve_rate and entries."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["serve_rate"] = stats["served"] / stats["lookups"] if stats["lookups"] else 0.0
+            stats["entries"] = len(self._keys)
+        return stats
+
+_similar_plans: Optional[SimilarPlanIndex] = None
+_similar_plans_lock = threading.Lock()
+
+def get_similar_plans() -> SimilarPlanIndex:
+    """Return the process-wide index over the shared plan cache."""
+    global _similar_plans
+    if _similar_plans is None:
+        with _similar_plans_lock:
+            if _similar_plans is None:
+                _similar_plans = SimilarPlanIndex()
+    return _similar_plans
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.geo import geohash_bounds, geohash_encode, geohashes_covering, haversine_m
+
+# Precision 6 cells are roughly 1.2 km x 0.6 km
+TILE_PRECISION = 6
+DEFAULT_MAX_TILES = 2000
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+# Fetches POIs inside a (south, west, north, east) box; returns None on failure
+BBoxFetcher = Callable[[float, float, float, float], Optional[List[Dict]]]
+
+class PoiTileIndex:
+    """
+    Cache of points of interest grouped by geohash tile.
+
+    Each tile stores its POIs as NumPy coordinate arrays. A radius query
+    gathers the tiles covering the circle, fetches only the tiles not yet
+    cached (in a single bounding-box request), and filters by distance and
+    type locally with a vectorized haversine. Queries needing the same
+    tiles share one fetch; queries for other tiles don't wait on it.
+    """
+
+    def __init__(
+        self,
+        precision: int = TILE_PRECISION,
+        max_tiles: int = DEFAULT_MAX_TILES,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS
+    ):
+        self.precision = precision
+        self.max_tiles = max_tiles
+        self.ttl_seconds = ttl_seconds
+        # geohash -> (loaded_at, lat array, lon array, names, types)
+        self._tiles: "OrderedDict[str, Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # geohash -> event set when the fetch loading that tile has finished
+        self._in_flight: Dict[str, threading.Event] = {}
+
+    def _fresh_tile(self, geohash: str) -> Optional[Tuple]:
+        tile = self._tiles.get(geohash)
+        if tile is None:
+            return None
+        if time.time() - tile[0] > self.ttl_seconds:
+            del self._tiles[geohash]
+            return None
+        self._tiles.move_to_end(geohash)
+        return tile
+
+    def _store_tiles(self, geohashes: List[str], places: List[Dict]) -> Dict[str, Tuple]:
+        """Distribute fetched places into their tiles, mark every requested tile as loaded and return the tiles."""
+        buckets: Dict[str, List[Dict]] = {geohash: [] for geohash in geohashes}
+        for place in places:
+            geohash = geohash_encode(place["lat"], place["lon"], self.precision)
+            if geohash in buckets:
+                buckets[geohash].append(place)
+        now = time.time()
+        tiles = {
+            geohash: (
+                now,
+                np.array([p["lat"] for p in tile_places], dtype=np.float64),
+                np.array([p["lon"] for p in tile_places], dtype=np.float64),
+                [p["name"] for p in tile_places],
+                np.array([p["type"] or "" for p in tile_places], dtype=str),
+            )
+            for geohash, tile_places in buckets.items()
+        }
+        with self._lock:
+            for geohash, tile in tiles.items():
+                self._tiles[geohash] = tile
+                self._tiles.move_to_end(geohash)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return tiles
+
+    def _claim(
+        self,
+        geohashes: List[str],
+        found: Dict[str, Tuple]
+    ) -> Tuple[List[str], Optional[threading.Event], List[threading.Event]]:
+        """
+        Collect cached tiles into found, and split the rest into those this caller
+        must fetch and those already being fetched.
+
+        Returns:
+            Tuple: tiles claimed by this caller, the event to set once they are fetched
+            (None if nothing was claimed) and the events of the other fetches to wait for
+        """
+        with self._lock:
+            missing = []
+            for geohash in geohashes:
+                tile = found.get(geohash) or self._fresh_tile(geohash)
+                if tile is None:
+                    missing.append(geohash)
+                else:
+                    found[geohash] = tile
+            waiting = list({self._in_flight[geohash] for geohash in missing if geohash in self._in_flight})
+            claimed = [geohash for geohash in missing if geohash not in self._in_flight]
+            done = threading.Event() if claimed else None
+            for geohash in claimed:
+                self._in_flight[geohash] = done
+            return claimed, done, waiting
+
+    def _fetch_tiles(self, geohashes: List[str], done: threading.Event, fetch: BBoxFetcher) -> Optional[Dict[str, Tuple]]:
+        """Fetch claimed tiles in one bounding-box request; None if the fetch failed."""
+        try:
+            bounds = np.array([geohash_bounds(geohash) for geohash in geohashes])
+            places = fetch(
+                float(bounds[:, 0].min()), float(bounds[:, 1].min()),
+                float(bounds[:, 2].max()), float(bounds[:, 3].max())
+            )
+            if places is None:
+                return None
+            return self._store_tiles(geohashes, places)
+        finally:
+            with self._lock:
+                for geohash in geohashes:
+                    self._in_flight.pop(geohash, None)
+            done.set()
+
+    def query(
+        self,
+        lat: float,
+        lon: float,
+        radius: float,
+        fetch: BBoxFetcher,
+        place_type: Optional[str] = None
+    ) -> Optional[List[Dict]]:
+        """
+        Find POIs within a radius, fetching uncached tiles as needed.
+
+        Args:
+            lat: Centre latitude
+            lon: Centre longitude
+            radius: Search radius in metres
+            fetch: Function returning POIs in a bounding box
+            place_type: Only return POIs of this tourism/amenity type
+
+        Returns:
+            List[Dict]: POIs sorted by distance, or None if uncached tiles could not be fetched
+        """
+        geohashes = geohashes_covering(lat, lon, radius, self.precision)
+        # Tiles are kept here as they are found, so a cover wider than max_tiles
+        # doesn't evict (and re-fetch) tiles this query still needs
+        found: Dict[str, Tuple] = {}
+        while True:
+            # Tiles another session is already fetching are waited for rather than requested again;
+            # if that fetch fails, they are claimed and fetched here on the next pass
+            claimed, done, waiting = self._claim(geohashes, found)
+            if not claimed and not waiting:
+                break
+            if claimed:
+                fetched = self._fetch_tiles(claimed, done, fetch)
+                if fetched is None:
+                    return None
+                found.update(fetched)
+            for event in waiting:
+                event.wait()
+
+        tiles = [found[geohash] for geohash in geohashes]
+        if not tiles:
+            return []
+        lats = np.concatenate([tile[1] for tile in tiles])
+        lons = np.concatenate([tile[2] for tile in tiles])
+        types = np.concatenate([tile[4] for tile in tiles])
+        names = [name for tile in tiles for name in tile[3]]
+        if not len(lats):
+            return []
+
+        distances = haversine_m(lat, lon, lats, lons)
+        mask = distances <= radius
+        if place_type:
+            mask &= types == place_type
+        matches = np.flatnonzero(mask)
+        matches = matches[np.argsort(distances[matches], kind="stable")]
+        return [
+            {
+                "name": names[i],
+                "type": str(types[i]) or None,
+                "lat": float(lats[i]),
+                "lon": float(lons[i]),
+                "distance": float(distances[i])
+            }
+            for i in matches
+        ]
+
+_poi_index: Optional[PoiTileIndex] = None
+_poi_index_lock = threading.Lock()
+
+def get_poi_index() -> PoiTileIndex:
+    """Return the process-wide POI tile index."""
+    global _poi_index
+    if _poi_index is None:
+        with _poi_index_lock:
+            if _poi_index is None:
+                _poi_index = PoiTileIndex()
+    return _poi_index
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with a first-come, first-served wait queue.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Callers
+    that cannot be served immediately queue up and are served in arrival order,
+    so a large request is not starved by a stream of small ones.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = deque()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        """Return the number of tokens currently available."""
+        with self._cond:
+            self._refill()
+            return self._tokens
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """
+        Take tokens without waiting.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            bool: True if the tokens were taken
+        """
+        with self._cond:
+            if self._waiters:
+                return False
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Take tokens, waiting in line until they are available.
+
+        Args:
+            tokens: Number of tokens to take (capped at the bucket capacity)
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if the tokens were taken, False on timeout
+        """
+        tokens = min(tokens, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = object()
+        with self._cond:
+            self._waiters.append(waiter)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] is waiter and self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return True
+                    if self._waiters[0] is waiter:
+                        wait = (tokens - self._tokens) / self.rate
+                    else:
+                        wait = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+    def refund(self, tokens: float):
+        """Return unused tokens to the bucket (e.g. after over-estimating a request)."""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
+            self._cond.notify_all()
+
+class FairSemaphore:
+    """
+    Counting semaphore that grants permits in arrival order.
+
+    threading.Semaphore wakes an arbitrary waiter; here a caller that starts
+    waiting first is always served first.
+    """
+
+    def __init__(self, value: int):
+        if value <= 0:
+            raise ValueError("value must be positive")
+        self.value = value
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._waiters = deque()
+
+    def in_use(self) -> int:
+        """Return the number of permits currently held."""
+        with self._cond:
+            return self._in_use
+
+    def waiting(self) -> int:
+        """Return the number of callers waiting for a permit."""
+        with self._cond:
+            return len(self._waiters)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take a permit, waiting in line until one is free.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if a permit was taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = object()
+        with self._cond:
+            self._waiters.append(waiter)
+            try:
+                while not (self._waiters[0] is waiter and self._in_use < self.value):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self._in_use += 1
+                return True
+            finally:
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+    def release(self):
+        """Return a permit."""
+        with self._cond:
+            if self._in_use <= 0:
+                raise ValueError("FairSemaphore released too many times")
+            self._in_use -= 1
+            self._cond.notify_all()
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_DB_PATH = os.path.join(".cache", "search.db")
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+def make_search_key(destination: str, query_template: str, max_results: int) -> str:
+    """
+    Build a cache key for a destination search.
+
+    Args:
+        destination: The destination searched for
+        query_template: Query template the destination is formatted into
+        max_results: Number of results requested
+
+    Returns:
+        str: Hex digest identifying the search
+    """
+    normalized = " ".join(destination.split()).casefold()
+    payload = json.dumps([normalized, query_template, max_results])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SearchCache:
+    """
+    TTL cache of raw search result lists stored in a local SQLite file.
+
+    The database runs in WAL mode so several Streamlit server processes can
+    read it while one of them writes. Each thread keeps its own connection.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_results (
+                    key TEXT PRIMARY KEY,
+                    destination TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    results TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_search_results_created ON search_results (created_at)")
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """
+        Look up cached search results.
+
+        Args:
+            key: Key from make_search_key
+
+        Returns:
+            List[Dict]: Cached results or None if missing or expired
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT created_at, results FROM search_results WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None or time.time() - row[0] > self.ttl_seconds:
+                return None
+            return json.loads(row[1])
+        except Exception as e:
+            print(f"Error reading search cache: {str(e)}")
+            return None
+
+    def put(self, key: str, destination: str, results: List[Dict]):
+        """
+        Store search results, evicting expired and then the oldest entries.
+
+        Args:
+            key: Key from make_search_key
+            destination: The destination searched for
+            results: Raw search results
+        """
+        try:
+            conn = self._connect()
+            now = time.time()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_results (key, destination, created_at, results) VALUES (?, ?, ?, ?)",
+                    (key, destination, now, json.dumps(results))
+                )
+                conn.execute(
+                    "DELETE FROM search_results WHERE created_at < ?",
+                    (now - self.ttl_seconds,)
+                )
+                conn.execute(
+                    """
+                    DELETE FROM search_results WHERE key IN (
+                        SELECT key FROM search_results ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,)
+                )
+        except Exception as e:
+            print(f"Error writing search cache: {str(e)}")
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache."""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache()
+    return _search_cache
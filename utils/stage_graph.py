@@ -0,0 +1,237 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Sequence, Tuple
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+DEFAULT_STAGE_TTL_SECONDS = 3600
+DEFAULT_MEMO_ENTRIES = 512
+# Upper bound on threads used to run the stages of one request
+MAX_STAGE_WORKERS = 4
+
+def with_script_context(func: Callable[[], Any], ctx) -> Callable[[], Any]:
+    """
+    Wrap a stage so Streamlit calls made inside it (spinners, warnings)
+    are attached to the session that submitted the request.
+    """
+    def runner():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return func()
+    return runner
+
+def _normalize_value(value):
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize_value(item) for item in value]
+        return sorted(items, key=str) if isinstance(value, set) else items
+    if isinstance(value, dict):
+        return {key: _normalize_value(item) for key, item in value.items()}
+    return value
+
+class Stage:
+    """
+    One step of a pipeline.
+
+    A stage is called with the request fields named in `inputs` and the
+    outputs of the stages named in `after`, as keyword arguments. Its
+    result is reused for as long as those are unchanged, up to ttl_seconds,
+    or until the time returned by expires_at (given the time the result was
+    computed) for data that goes stale on a schedule.
+    A stage returns None when its lookup failed, so the result isn't reused.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        inputs: Sequence[str] = (),
+        after: Sequence[str] = (),
+        ttl_seconds: float = DEFAULT_STAGE_TTL_SECONDS,
+        expires_at: Optional[Callable[[float], float]] = None
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.after = tuple(after)
+        self.ttl_seconds = ttl_seconds
+        self.expires_at = expires_at
+
+    def expiry(self, now: float) -> float:
+        """Return the epoch time at which a result computed at `now` expires."""
+        return self.expires_at(now) if self.expires_at else now + self.ttl_seconds
+
+class StageMemo:
+    """
+    Thread-safe LRU of stage results with per-entry expiry, shared by all sessions.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Return (expires_at, value) for a live entry, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, expires_at: float, value: Any):
+        """Store a result until expires_at, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+_stage_memo: Optional[StageMemo] = None
+_stage_memo_lock = threading.Lock()
+
+def get_stage_memo() -> StageMemo:
+    """Return the process-wide stage memo."""
+    global _stage_memo
+    if _stage_memo is None:
+        with _stage_memo_lock:
+            if _stage_memo is None:
+                _stage_memo = StageMemo()
+    return _stage_memo
+
+class StageGraph:
+    """
+    A pipeline of stages with declared inputs, run incrementally.
+
+    Each stage's key is a hash of its own request fields and the keys of
+    the stages it runs after, so a change to one field only invalidates
+    the stages downstream of it. Results are looked up first in the
+    caller's session memo (the last result of each stage), then in the
+    process-wide memo; only stages found in neither run, concurrently as
+    soon as the stages they depend on have finished.
+    """
+
+    def __init__(self, stages: List[Stage], version: int = 1):
+        self.stages = {stage.name: stage for stage in stages}
+        self.version = version
+        self.order: List[Stage] = []
+        placed = set()
+        remaining = list(stages)
+        while remaining:
+            ready = [stage for stage in remaining if all(name in placed for name in stage.after)]
+            if not ready:
+                unknown = {name for stage in remaining for name in stage.after} - set(self.stages)
+                raise ValueError(f"Unknown or cyclic stage dependencies: {sorted(unknown) or [s.name for s in remaining]}")
+            for stage in ready:
+                self.order.append(stage)
+                placed.add(stage.name)
+                remaining.remove(stage)
+
+    def keys(self, request: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Compute every stage's key for a request.
+
+        Args:
+            request: Request fields by name
+
+        Returns:
+            Dict[str, str]: Hex digest per stage
+        """
+        keys = {}
+        for stage in self.order:
+            payload = json.dumps(
+                [
+                    self.version,
+                    stage.name,
+                    {name: _normalize_value(request.get(name)) for name in stage.inputs},
+                    {name: keys[name] for name in stage.after},
+                ],
+                sort_keys=True,
+                separators=(",", ":"),
+                default=str
+            )
+            keys[stage.name] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return keys
+
+    def run(
+        self,
+        request: Dict[str, Any],
+        session_memo: Optional[MutableMapping] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the stages whose inputs changed and reuse the rest.
+
+        Args:
+            request: Request fields by name
+            session_memo: Mapping kept by the caller between runs (e.g. a dict in
+                Streamlit session state); holds the last result of each stage
+            max_workers: Maximum number of threads (defaults to MAX_STAGE_WORKERS)
+
+        Returns:
+            Dict[str, Any]: Result of each stage by name, None for stages that raised
+            (failed and None results are not memoized, so they run again next time)
+        """
+        memo = get_stage_memo()
+        keys = self.keys(request)
+        now = time.time()
+        results: Dict[str, Any] = {}
+        pending = []
+        for stage in self.order:
+            key = keys[stage.name]
+            entry = session_memo.get(stage.name) if session_memo is not None else None
+            if entry and entry[0] == key and entry[1] > now:
+                results[stage.name] = entry[2]
+                continue
+            shared = memo.get(key)
+            if shared:
+                results[stage.name] = shared[1]
+                if session_memo is not None:
+                    session_memo[stage.name] = (key, shared[0], shared[1])
+                continue
+            pending.append(stage)
+        if not pending:
+            return results
+
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers or MAX_STAGE_WORKERS, len(pending)),
+            thread_name_prefix="plan-stage"
+        ) as executor:
+            running = {}
+            while pending or running:
+                for stage in [stage for stage in pending if all(name in results for name in stage.after)]:
+                    pending.remove(stage)
+                    kwargs = {name: request.get(name) for name in stage.inputs}
+                    kwargs.update({name: results[name] for name in stage.after})
+                    future = executor.submit(with_script_context(lambda s=stage, k=kwargs: s.func(**k), ctx))
+                    running[future] = stage
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        print(f"Error in {stage.name} stage: {str(e)}")
+                        value = None
+                    results[stage.name] = value
+                    if value is not None:
+                        expires_at = stage.expiry(time.time())
+                        memo.put(keys[stage.name], expires_at, value)
+                        if session_memo is not None:
+                            session_memo[stage.name] = (keys[stage.name], expires_at, value)
+        return results
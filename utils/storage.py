@@ -1,70 +1,327 @@
 import json
 import os
+import re
+import sqlite3
+import threading
+import uuid
 from datetime import datetime
 from typing import Dict, List, Optional
 
+PLANS_DIR = "plans"
+DB_PATH = os.path.join(PLANS_DIR, "plans.db")
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+def _connect() -> sqlite3.Connection:
+    """Return this thread's connection to the plan index, creating the schema on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == DB_PATH:
+        return conn
+    os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=10000")
+    with _init_lock:
+        if DB_PATH not in _initialized_paths:
+            _init_schema(conn)
+            _migrate_json_plans(conn)
+            _initialized_paths.add(DB_PATH)
+    _local.conn = conn
+    _local.path = DB_PATH
+    return conn
+
+def _init_schema(conn: sqlite3.Connection):
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS plans (
+                id TEXT PRIMARY KEY,
+                destination TEXT,
+                origin TEXT,
+                start_date TEXT,
+                end_date TEXT,
+                budget TEXT,
+                duration INTEGER,
+                created_at TEXT NOT NULL,
+                body TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_created ON plans (created_at DESC, id DESC)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_destination ON plans (destination COLLATE NOCASE, created_at DESC)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_start_date ON plans (start_date)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # The full-text index is keyed by the plans rowid, so a plan's entry is updated without a scan.
+        # Earlier versions keyed it by an unindexed id column; that table is rebuilt once.
+        fts = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'plans_fts'").fetchone()
+        if fts and "content_rowid" not in fts[0]:
+            conn.execute("DROP TABLE plans_fts")
+            fts = None
+        if fts is None:
+            conn.execute(
+                "CREATE VIRTUAL TABLE plans_fts USING fts5("
+                "destination, content, content='plans', content_rowid='rowid')"
+            )
+            for row in conn.execute("SELECT rowid, destination, body FROM plans").fetchall():
+                _index_plan(conn, "insert", row)
+
+def _text_values(value) -> List[str]:
+    """Collect every string inside a plan for full-text indexing."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in _text_values(item)]
+    if isinstance(value, (list, tuple)):
+        return [text for item in value for text in _text_values(item)]
+    return []
+
+def _index_plan(conn: sqlite3.Connection, action: str, row: sqlite3.Row):
+    """
+    Add a plans row to the full-text index, or remove it (action "delete").
+
+    The indexed text is derived from the stored body, so a removal passes
+    exactly the values that were indexed, as an external-content table needs.
+    """
+    values = (row[0], row[1] or "", "\n".join(_text_values(json.loads(row[2]))))
+    if action == "delete":
+        conn.execute("INSERT INTO plans_fts (plans_fts, rowid, destination, content) VALUES ('delete', ?, ?, ?)", values)
+    else:
+        conn.execute("INSERT INTO plans_fts (rowid, destination, content) VALUES (?, ?, ?)", values)
+
+def _insert_plan(conn: sqlite3.Connection, plan_id: str, plan_data: Dict, created_at: str):
+    preferences = plan_data.get("preferences") if isinstance(plan_data.get("preferences"), dict) else {}
+    budget = plan_data.get("budget") or preferences.get("budget")
+    try:
+        duration = int(plan_data.get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    old = conn.execute("SELECT rowid, destination, body FROM plans WHERE id = ?", (plan_id,)).fetchone()
+    if old:
+        _index_plan(conn, "delete", old)
+    conn.execute(
+        """
+        INSERT INTO plans
+            (id, destination, origin, start_date, end_date, budget, duration, created_at, body)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            destination = excluded.destination, origin = excluded.origin,
+            start_date = excluded.start_date, end_date = excluded.end_date, budget = excluded.budget,
+            duration = excluded.duration, created_at = excluded.created_at, body = excluded.body
+        """,
+        (
+            plan_id,
+            plan_data.get("destination"),
+            plan_data.get("origin"),
+            str(plan_data["start_date"]) if plan_data.get("start_date") else None,
+            str(plan_data["end_date"]) if plan_data.get("end_date") else None,
+            budget,
+            duration,
+            created_at,
+            json.dumps(plan_data, default=str)
+        )
+    )
+    _index_plan(conn, "insert", conn.execute(
+        "SELECT rowid, destination, body FROM plans WHERE id = ?", (plan_id,)
+    ).fetchone())
+
+def _migrate_json_plans(conn: sqlite3.Connection):
+    """Import plans saved as individual JSON files by earlier versions, once."""
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+        return
+    migrated = 0
+    if os.path.isdir(PLANS_DIR):
+        with conn:
+            for filename in sorted(os.listdir(PLANS_DIR)):
+                if not filename.endswith(".json"):
+                    continue
+                try:
+                    path = os.path.join(PLANS_DIR, filename)
+                    with open(path, "r", encoding="utf-8") as f:
+                        plan_data = json.load(f)
+                    # Files were named plan_<id>.json
+                    plan_id = filename[len("plan_"):-len(".json")] if filename.startswith("plan_") else filename[:-len(".json")]
+                    created_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+                    plan_data.setdefault("id", plan_id)
+                    _insert_plan(conn, plan_id, plan_data, created_at)
+                    migrated += 1
+                except Exception as e:
+                    print(f"Error migrating plan {filename}: {str(e)}")
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (str(migrated),))
+
+def _row_to_plan(row: sqlite3.Row) -> Dict:
+    plan_data = json.loads(row["body"])
+    plan_data.setdefault("id", row["id"])
+    return plan_data
+
 def save_travel_plan(plan_data: Dict) -> bool:
     """
-    Save a travel plan to the plans directory.
-    
+    Save a travel plan to the plan store.
+
+    A unique id is generated and stored in plan_data["id"] if it has none;
+    saving a plan with an existing id replaces it.
+
     Args:
         plan_data: Dictionary containing plan information
-        
+
     Returns:
         bool: True if saved successfully
     """
     try:
-        # Create plans directory if it doesn't exist
-        os.makedirs("plans", exist_ok=True)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"plans/plan_{timestamp}.json"
-        
-        # Save plan data
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(plan_data, f, indent=2)
+        if not plan_data.get("id"):
+            plan_data["id"] = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        conn = _connect()
+        with conn:
+            _insert_plan(conn, str(plan_data["id"]), plan_data, datetime.now().isoformat())
         return True
     except Exception as e:
         print(f"Error saving plan: {str(e)}")
         return False
 
-def load_travel_plans() -> List[Dict]:
+def _filters(
+    destination: Optional[str],
+    budget: Optional[str],
+    start_from: Optional[str],
+    start_to: Optional[str]
+) -> tuple:
+    clauses, params = [], []
+    if destination:
+        clauses.append("destination = ? COLLATE NOCASE")
+        params.append(destination.strip())
+    if budget:
+        clauses.append("budget = ? COLLATE NOCASE")
+        params.append(budget)
+    if start_from:
+        clauses.append("start_date >= ?")
+        params.append(str(start_from))
+    if start_to:
+        clauses.append("start_date <= ?")
+        params.append(str(start_to))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+def load_travel_plans(
+    limit: Optional[int] = None,
+    offset: int = 0,
+    destination: Optional[str] = None,
+    budget: Optional[str] = None,
+    start_from: Optional[str] = None,
+    start_to: Optional[str] = None
+) -> List[Dict]:
     """
-    Load all saved travel plans.
-    
+    Load saved travel plans, newest first.
+
+    Args:
+        limit: Maximum number of plans to return (all if None)
+        offset: Number of plans to skip, for pagination
+        destination: Only plans for this destination (case-insensitive)
+        budget: Only plans with this budget level
+        start_from: Only plans starting on or after this ISO date
+        start_to: Only plans starting on or before this ISO date
+
     Returns:
         List[Dict]: List of travel plans
     """
-    plans = []
     try:
-        if not os.path.exists("plans"):
-            return plans
-            
-        for filename in os.listdir("plans"):
-            if filename.endswith(".json"):
-                with open(os.path.join("plans", filename), "r", encoding="utf-8") as f:
-                    plan_data = json.load(f)
-                    plans.append(plan_data)
+        where, params = _filters(destination, budget, start_from, start_to)
+        rows = _connect().execute(
+            f"SELECT id, body FROM plans {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit if limit is not None else -1, offset]
+        ).fetchall()
+        return [_row_to_plan(row) for row in rows]
     except Exception as e:
         print(f"Error loading plans: {str(e)}")
-    return plans
+    return []
+
+def count_travel_plans(
+    destination: Optional[str] = None,
+    budget: Optional[str] = None,
+    start_from: Optional[str] = None,
+    start_to: Optional[str] = None
+) -> int:
+    """
+    Count saved travel plans matching the same filters as load_travel_plans.
+
+    Returns:
+        int: Number of matching plans
+    """
+    try:
+        where, params = _filters(destination, budget, start_from, start_to)
+        return _connect().execute(f"SELECT COUNT(*) FROM plans {where}", params).fetchone()[0]
+    except Exception as e:
+        print(f"Error counting plans: {str(e)}")
+    return 0
+
+def search_travel_plans(query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+    """
+    Full-text search over saved plans, best matches first.
+
+    Args:
+        query: Words to search for; all must appear in the plan
+        limit: Maximum number of plans to return
+        offset: Number of matches to skip, for pagination
+
+    Returns:
+        List[Dict]: Matching travel plans
+    """
+    terms = re.findall(r"\w+", query or "")
+    if not terms:
+        return []
+    match = " ".join(f'"{term}"' for term in terms)
+    try:
+        rows = _connect().execute(
+            """
+            SELECT plans.id, plans.body FROM plans_fts
+            JOIN plans ON plans.rowid = plans_fts.rowid
+            WHERE plans_fts MATCH ?
+            ORDER BY bm25(plans_fts)
+            LIMIT ? OFFSET ?
+            """,
+            (match, limit, offset)
+        ).fetchall()
+        return [_row_to_plan(row) for row in rows]
+    except Exception as e:
+        print(f"Error searching plans: {str(e)}")
+    return []
+
+def get_travel_plan(plan_id: str) -> Optional[Dict]:
+    """
+    Load a single saved travel plan.
+
+    Args:
+        plan_id: The ID of the plan
+
+    Returns:
+        Dict: The travel plan or None if not found
+    """
+    try:
+        row = _connect().execute("SELECT id, body FROM plans WHERE id = ?", (plan_id,)).fetchone()
+        if row:
+            return _row_to_plan(row)
+    except Exception as e:
+        print(f"Error loading plan: {str(e)}")
+    return None
 
 def delete_travel_plan(plan_id: str) -> bool:
     """
     Delete a saved travel plan.
-    
+
     Args:
         plan_id: The ID of the plan to delete
-        
+
     Returns:
         bool: True if deleted successfully
     """
     try:
-        filename = f"plans/plan_{plan_id}.json"
-        if os.path.exists(filename):
-            os.remove(filename)
-            return True
+        conn = _connect()
+        with conn:
+            old = conn.execute("SELECT rowid, destination, body FROM plans WHERE id = ?", (plan_id,)).fetchone()
+            if old is None:
+                return False
+            _index_plan(conn, "delete", old)
+            conn.execute("DELETE FROM plans WHERE rowid = ?", (old[0],))
+        return True
     except Exception as e:
         print(f"Error deleting plan: {str(e)}")
-    return False 
\ No newline at end of file
+    return False
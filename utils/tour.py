@@ -0,0 +1,144 @@
+from typing import Optional
+
+import numpy as np
+
+def path_cost(cost: np.ndarray, path: np.ndarray) -> float:
+    """Sum of cost[a, b] over consecutive stops of a path."""
+    path = np.asarray(path)
+    return float(cost[path[:-1], path[1:]].sum())
+
+def _with_open_end(cost: np.ndarray) -> np.ndarray:
+    """Append a free terminal node, so an open path can be solved as one with a fixed end."""
+    n = len(cost)
+    extended = np.zeros((n + 1, n + 1), dtype=np.float64)
+    extended[:n, :n] = cost
+    return extended
+
+def held_karp_path(cost: np.ndarray, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+    """
+    Exact cheapest path through every node by dynamic programming over subsets.
+
+    Runs in O(2^n * n^2) time, vectorized one subset size at a time; keep n
+    small (about 12 nodes takes a few milliseconds).
+
+    Args:
+        cost: n x n matrix of travel costs, not necessarily symmetric
+        start: Node the path starts at
+        end: Node the path ends at (start for a round trip), or None to end anywhere
+
+    Returns:
+        np.ndarray: Node indices in visiting order, from start to end
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if end is None:
+        path = held_karp_path(_with_open_end(cost), start, len(cost))
+        return path[:-1]
+
+    n = len(cost)
+    # Nodes visited between the fixed endpoints
+    inner = np.array([i for i in range(n) if i != start and i != end], dtype=np.intp)
+    m = len(inner)
+    if m == 0:
+        return np.array([start] if end == start and n == 1 else [start, end], dtype=np.intp)
+
+    inner_cost = cost[np.ix_(inner, inner)]
+    bits = 1 << np.arange(m)
+    masks = np.arange(1 << m)
+    sizes = np.zeros(len(masks), dtype=np.intp)
+    for bit in bits:
+        sizes += (masks & bit) != 0
+
+    # best[mask, j]: cheapest path from start through exactly the nodes in mask, ending at j
+    best = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.intp)
+    best[bits, np.arange(m)] = cost[start, inner]
+    for size in range(2, m + 1):
+        layer = masks[sizes == size]
+        contains = (layer[:, None] & bits[None, :]) != 0
+        previous = layer[:, None] & ~bits[None, :]
+        # candidates[mask, k, j] = best[mask without k, j] + cost[j, k]
+        candidates = best[previous] + inner_cost.T[None, :, :]
+        candidates[~contains] = np.inf
+        parent[layer] = candidates.argmin(axis=2)
+        best[layer] = np.take_along_axis(candidates, parent[layer][:, :, None], axis=2)[:, :, 0]
+
+    full = (1 << m) - 1
+    last = int(np.argmin(best[full] + cost[inner, end]))
+    order = []
+    mask = full
+    while last >= 0:
+        order.append(last)
+        mask, last = mask & ~(1 << last), parent[mask, last]
+    return np.concatenate([[start], inner[order[::-1]], [end]]).astype(np.intp)
+
+def nearest_neighbour_path(cost: np.ndarray, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+    """
+    Greedy path that always moves to the cheapest unvisited node.
+
+    Args:
+        cost: n x n matrix of travel costs
+        start: Node the path starts at
+        end: Node the path ends at (start for a round trip), or None to end anywhere
+
+    Returns:
+        np.ndarray: Node indices in visiting order, from start to end
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    n = len(cost)
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[start] = False
+    if end is not None:
+        unvisited[end] = False
+    path = [start]
+    while unvisited.any():
+        candidates = np.where(unvisited, cost[path[-1]], np.inf)
+        nxt = int(np.argmin(candidates))
+        path.append(nxt)
+        unvisited[nxt] = False
+    if end is not None and (end != start or n > 1):
+        path.append(end)
+    return np.array(path, dtype=np.intp)
+
+def two_opt(cost: np.ndarray, path: np.ndarray, fixed_end: bool = True, max_passes: int = 1000) -> np.ndarray:
+    """
+    Improve a path by repeatedly reversing the segment that saves the most.
+
+    Every possible reversal is scored at once from prefix sums of the
+    forward and backward edge costs, so asymmetric costs are handled exactly.
+
+    Args:
+        cost: n x n matrix of travel costs
+        path: Initial path; its first node always stays in place
+        fixed_end: Keep the last node in place too (False lets it move)
+        max_passes: Upper bound on the number of reversals applied
+
+    Returns:
+        np.ndarray: Improved path
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    path = np.asarray(path, dtype=np.intp).copy()
+    if not fixed_end:
+        extended = _with_open_end(cost)
+        path = two_opt(extended, np.append(path, len(cost)), True, max_passes)
+        return path[:-1]
+    if len(path) < 4:
+        return path
+
+    for _ in range(max_passes):
+        forward = np.concatenate([[0.0], np.cumsum(cost[path[:-1], path[1:]])])
+        backward = np.concatenate([[0.0], np.cumsum(cost[path[1:], path[:-1]])])
+        # Reverse path[i..k] for 1 <= i < k <= len - 2
+        i = np.arange(1, len(path) - 1)[:, None]
+        k = np.arange(1, len(path) - 1)[None, :]
+        delta = (
+            cost[path[i - 1], path[k]] + cost[path[i], path[k + 1]] + (backward[k] - backward[i])
+            - cost[path[i - 1], path[i]] - cost[path[k], path[k + 1]] - (forward[k] - forward[i])
+        )
+        delta = np.where(k > i, delta, np.inf)
+        flat = int(np.argmin(delta))
+        if delta.flat[flat] >= -1e-9:
+            break
+        a, b = np.unravel_index(flat, delta.shape)
+        a, b = int(a) + 1, int(b) + 1
+        path[a:b + 1] = path[a:b + 1][::-1]
+    return path
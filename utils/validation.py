@@ -1,8 +1,7 @@
-import os
-import csv
-from datetime import datetime
 import streamlit as st
 
+from utils.feedback import get_feedback_writer
+
 def validate_inputs(origin: str, destination: str, duration: int, preferences: dict) -> tuple[bool, str]:
     """
     Validate user inputs for travel planning.
@@ -58,7 +57,7 @@ def validate_feedback(rating: int, comments: str) -> tuple[bool, str]:
 
 def save_feedback(timestamp: str, destination: str, duration: int, rating: int, comments: str) -> bool:
     """
-    Save user feedback to a CSV file.
+    Queue user feedback for the monthly CSV file.
     
     Args:
         timestamp: Feedback timestamp
@@ -77,20 +76,8 @@ def save_feedback(timestamp: str, destination: str, duration: int, rating: int,
             st.error(f"Invalid feedback: {error_msg}")
             return False
         
-        # Create feedback directory if it doesn't exist
-        os.makedirs("feedback", exist_ok=True)
-        
-        # Use a structured filename with date
-        filename = f"feedback/feedback_{datetime.now().strftime('%Y%m')}.csv"
-        
-        # Check if file exists to determine if we need headers
-        file_exists = os.path.isfile(filename)
-        
-        with open(filename, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(["Timestamp", "Destination", "Duration", "Rating", "Comments"])
-            writer.writerow([timestamp, destination, duration, rating, comments])
+        # Rows are batched and appended by a single writer thread
+        get_feedback_writer().submit([timestamp, destination, duration, rating, comments])
         return True
     except Exception as e:
         st.error(f"Error saving feedback: {str(e)}")
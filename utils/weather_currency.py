@@ -1,12 +1,113 @@
-import requests
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import os
+import threading
+import time
+import numpy as np
 import streamlit as st
 
+from utils.exchange_rates import get_rate_store
+from utils.http_client import http_get
+from utils.currency_resolver import get_currency_resolver
+
+# OpenWeather refreshes the 5-day/3-hour forecast every three hours
+FORECAST_REFRESH_SECONDS = 3 * 3600
+
+_forecast_cache: Dict[str, Tuple[float, Dict]] = {}
+_forecast_cache_lock = threading.Lock()
+
+def next_forecast_refresh(now: float) -> float:
+    """Return the epoch time of the provider's next forecast update."""
+    return (now // FORECAST_REFRESH_SECONDS + 1) * FORECAST_REFRESH_SECONDS
+
+def _fetch_forecast(city: str, api_key: str) -> Optional[Dict]:
+    """
+    Fetch the raw 5-day/3-hour forecast for a city, reusing a cached response
+    until the provider's next refresh boundary.
+    """
+    key = " ".join(city.split()).casefold()
+    now = time.time()
+    with _forecast_cache_lock:
+        cached = _forecast_cache.get(key)
+        if cached and now < cached[0]:
+            return cached[1]
+            
+    base_url = "http://api.openweathermap.org/data/2.5/forecast"
+    params = {
+        "q": city,
+        "appid": api_key,
+        "units": "metric"
+    }
+    
+    response = http_get("openweather", base_url, params=params)
+    if response.status_code != 200:
+        st.warning(f"Weather data not available for {city}. Error: {response.status_code}")
+        return None
+        
+    data = response.json()
+    with _forecast_cache_lock:
+        # Drop entries from earlier refresh cycles before adding this one
+        for stale_key in [k for k, (expires_at, _) in _forecast_cache.items() if expires_at <= now]:
+            del _forecast_cache[stale_key]
+        _forecast_cache[key] = (next_forecast_refresh(now), data)
+    return data
+
+def aggregate_daily_forecast(slots: List[Dict], utc_offset: int = 0) -> List[Dict]:
+    """
+    Reduce 3-hour forecast slots to one entry per local calendar day.
+    
+    Args:
+        slots: The "list" entries of an OpenWeather forecast response
+        utc_offset: City offset from UTC in seconds
+        
+    Returns:
+        List[Dict]: Per-day date, mean/min/max temperature and most common condition
+    """
+    if not slots:
+        return []
+        
+    timestamps = np.array([slot["dt"] for slot in slots], dtype=np.int64)
+    temps = np.array([slot["main"]["temp"] for slot in slots], dtype=np.float64)
+    temp_mins = np.array([slot["main"].get("temp_min", slot["main"]["temp"]) for slot in slots], dtype=np.float64)
+    temp_maxs = np.array([slot["main"].get("temp_max", slot["main"]["temp"]) for slot in slots], dtype=np.float64)
+    descriptions = np.array([slot["weather"][0]["description"] for slot in slots])
+    icons = [slot["weather"][0]["icon"] for slot in slots]
+    
+    # Group slots by local day; the API returns them in chronological order
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, temps, temp_mins, temp_maxs, descriptions = (
+        timestamps[order], temps[order], temp_mins[order], temp_maxs[order], descriptions[order]
+    )
+    day_numbers = (timestamps + utc_offset) // 86400
+    days, day_starts, day_index = np.unique(day_numbers, return_index=True, return_inverse=True)
+    slot_counts = np.bincount(day_index)
+    
+    mean_temps = np.add.reduceat(temps, day_starts) / slot_counts
+    min_temps = np.minimum.reduceat(temp_mins, day_starts)
+    max_temps = np.maximum.reduceat(temp_maxs, day_starts)
+    
+    # Most common condition per day from a day x condition count matrix
+    conditions, condition_first, condition_index = np.unique(descriptions, return_index=True, return_inverse=True)
+    condition_counts = np.zeros((len(days), len(conditions)), dtype=np.int64)
+    np.add.at(condition_counts, (day_index, condition_index), 1)
+    top_conditions = condition_counts.argmax(axis=1)
+    
+    dates = (days * 86400).astype("datetime64[s]").astype("datetime64[D]").astype(str)
+    return [
+        {
+            "date": str(dates[i]),
+            "temp": round(float(mean_temps[i]), 1),
+            "temp_min": round(float(min_temps[i]), 1),
+            "temp_max": round(float(max_temps[i]), 1),
+            "description": str(conditions[top_conditions[i]]),
+            "icon": icons[order[condition_first[top_conditions[i]]]]
+        }
+        for i in range(len(days))
+    ]
+
 def get_weather_forecast(city: str, days: int = 5) -> Optional[Dict]:
     """
-    Get weather forecast for a city using OpenWeatherMap API.
+    Get daily weather forecast for a city using OpenWeatherMap API.
     
     Args:
         city: City name
@@ -21,43 +122,21 @@ def get_weather_forecast(city: str, days: int = 5) -> Optional[Dict]:
             st.warning("OpenWeather API key not found. Weather information will not be available.")
             return None
             
-        base_url = "http://api.openweathermap.org/data/2.5/forecast"
-        params = {
-            "q": city,
-            "appid": api_key,
-            "units": "metric"
-        }
-        
-        response = requests.get(base_url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            forecast = []
-            
-            # Get daily forecasts
-            for item in data["list"]:
-                date = datetime.fromtimestamp(item["dt"])
-                if len(forecast) < days:
-                    forecast.append({
-                        "date": date.strftime("%Y-%m-%d"),
-                        "temp": item["main"]["temp"],
-                        "description": item["weather"][0]["description"],
-                        "icon": item["weather"][0]["icon"]
-                    })
-            
+        data = _fetch_forecast(city, api_key)
+        if data:
+            forecast = aggregate_daily_forecast(data["list"], data["city"].get("timezone", 0))
             return {
                 "city": data["city"]["name"],
                 "country": data["city"]["country"],
-                "forecast": forecast
+                "forecast": forecast[:days]
             }
-        else:
-            st.warning(f"Weather data not available for {city}. Error: {response.status_code}")
     except Exception as e:
         st.warning(f"Error getting weather for {city}: {str(e)}")
     return None
 
 def convert_currency(amount: float, from_currency: str, to_currency: str) -> Optional[float]:
     """
-    Convert currency using Exchange Rates API.
+    Convert currency using the shared Exchange Rates snapshot store.
     
     Args:
         amount: Amount to convert
@@ -73,23 +152,10 @@ def convert_currency(amount: float, from_currency: str, to_currency: str) -> Opt
             st.warning("Exchange Rates API key not found. Currency conversion will not be available.")
             return None
             
-        base_url = "https://api.exchangeratesapi.io/v1/latest"
-        params = {
-            "access_key": api_key,
-            "base": from_currency,
-            "symbols": to_currency
-        }
-        
-        response = requests.get(base_url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if "rates" in data and to_currency in data["rates"]:
-                rate = data["rates"][to_currency]
-                return amount * rate
-            else:
-                st.warning(f"Currency conversion not available for {from_currency} to {to_currency}")
-        else:
-            st.warning(f"Currency conversion failed. Error: {response.status_code}")
+        rate = get_rate_store().get_rate(from_currency, to_currency)
+        if rate is not None:
+            return amount * rate
+        st.warning(f"Currency conversion not available for {from_currency} to {to_currency}")
     except Exception as e:
         st.warning(f"Error converting currency: {str(e)}")
     return None
@@ -104,14 +170,4 @@ def get_currency_symbol(currency_code: str) -> str:
     Returns:
         str: Currency symbol
     """
-    symbols = {
-        "USD": "$",
-        "EUR": "€",
-        "GBP": "£",
-        "JPY": "¥",
-        "INR": "₹",
-        "CNY": "¥",
-        "AUD": "A$",
-        "CAD": "C$"
-    }
-    return symbols.get(currency_code.upper(), currency_code) 
\ No newline at end of file
+    return get_currency_resolver().symbol(currency_code)